@@ -55,6 +55,11 @@ def big_longstr_object(n):
     str_template = b"value that is very long and should cause a bit less of JSON parsing"
     return b'{' + b',\n'.join([b'"key_%d": "%s"' % (i, str_template) for i in range(n)]) + b'}'
 
+@benchmark
+def huge_str_values(n):
+    value = b'"' + b'0123456789' * (n * 10) + b'"'
+    return b'[' + b',\n'.join(value for _ in range(10)) + b']'
+
 @benchmark
 def object_with_10_keys(n):
     template = b'{' + b',\n'.join([b'"key_%d": "value_%d"' % (i, i) for i in range(10)]) + b'}'
@@ -62,6 +67,14 @@ def object_with_10_keys(n):
         template
         for _ in range(n)) + b']'
 
+@benchmark
+def small_objects(n):
+    # Mostly events, little data: use with -M items -p 'item.*' or
+    # -M kvitems -p item to measure the per-event cost of items/kvitems
+    return b'[' + b',\n'.join(
+        b'{"id": %d, "ok": true, "tag": "t", "xy": [%d, 0]}' % (i, i)
+        for i in range(n)) + b']'
+
 @benchmark
 def empty_lists(n):
     return b'[' + b', '.join(b'[]' for _ in range(n)) + b']'
@@ -9,6 +9,24 @@ Main API:
 - ``ijson.items``: iterator returning Python objects found under a specified prefix,
   see ``ijson.common.items`` for docs.
 
+- ``ijson.items_multi``: iterator returning (prefix, object) pairs for objects
+  found under any of several prefixes in a single pass.
+
+- ``ijson.arrays``: iterator returning typed arrays (``array.array`` or NumPy
+  arrays) with the numbers of the arrays found under a specified prefix.
+
+- ``ijson.columns``: iterator returning the members of the objects of the
+  arrays found under a specified prefix as columns of values.
+
+- ``ijson.get``: returns the first Python object found under a specified
+  prefix, reading no further input.
+
+- ``ijson.dump_events`` and ``ijson.writer_coro``: write parsing events back
+  as compact JSON text.
+
+- ``ijson.build_index`` and ``ijson.IndexedDocument``: random access to the
+  values under a prefix through a sidecar index of their byte offsets.
+
 Top-level ``ijson`` module exposes method from the pure Python backend. There's
 also two other backends using the C library yajl in ``ijson.backends`` that have
 the same API and are faster under CPython.
@@ -16,6 +34,7 @@ the same API and are faster under CPython.
 from ijson.common import JSONError, IncompleteJSONError, ObjectBuilder, compat
 
 from ijson.utils import coroutine, sendable_list
+from ijson.index import build_index, IndexedDocument
 from .version import __version__
 
 def get_backend(backend):
@@ -44,9 +63,21 @@ items = backend.items
 items_coro = backend.items_coro
 kvitems = backend.kvitems
 kvitems_coro = backend.kvitems_coro
+items_multi = backend.items_multi
+items_multi_coro = backend.items_multi_coro
+arrays = backend.arrays
+arrays_coro = backend.arrays_coro
+columns = backend.columns
+columns_coro = backend.columns_coro
+get = backend.get
+dump_events = backend.dump_events
+writer_coro = backend.writer_coro
 if compat.IS_PY35:
     basic_parse_async = backend.basic_parse_async
     parse_async = backend.parse_async
     items_async = backend.items_async
     kvitems_async = backend.kvitems_async
+    items_multi_async = backend.items_multi_async
+    arrays_async = backend.arrays_async
+    columns_async = backend.columns_async
 backend = backend.backend
\ No newline at end of file
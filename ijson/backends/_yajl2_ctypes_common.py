@@ -17,7 +17,7 @@ C_DOUBLE = CFUNCTYPE(c_int, c_void_p, c_double)
 C_STR = CFUNCTYPE(c_int, c_void_p, POINTER(c_ubyte), c_uint)
 
 
-def _get_callback_data(yajl_version):
+def _get_callback_data(yajl_version, to_number):
     return  [
         # Mapping of JSON parser events to callback C types and value converters.
         # Used to define the Callbacks structure and actual callback functions
@@ -26,7 +26,7 @@ def _get_callback_data(yajl_version):
         ('boolean', 'boolean', C_INT, lambda v: bool(v)),
         ('integer', 'number', C_LONG if yajl_version == 1 else C_LONGLONG, lambda v: int(v)),
         ('double', 'number', C_DOUBLE, lambda v: v),
-        ('number', 'number', C_STR, lambda v, l: common.integer_or_decimal(b2s(string_at(v, l)))),
+        ('number', 'number', C_STR, lambda v, l: to_number(b2s(string_at(v, l)))),
         ('string', 'string', C_STR, lambda v, l: string_at(v, l).decode('utf-8')),
         ('start_map', 'start_map', C_EMPTY, lambda: None),
         ('map_key', 'map_key', C_STR, lambda v, l: string_at(v, l).decode('utf-8')),
@@ -48,21 +48,37 @@ def get_yajl(version):
     yajl.yajl_get_error.restype = POINTER(c_char)
     return yajl
 
-def _callback(send, use_float, field, event, func_type, func):
-    if use_float and field == 'number':
+def _callback(send, to_number, field, event, func_type, func):
+    # yajl parses integers and doubles itself if there is no number callback
+    if to_number is common.integer_or_float and field == 'number':
         return func_type()
     def c_callback(_context, *args):
         send((event, func(*args)))
         return 1
     return func_type(c_callback)
 
-def make_callbaks(send, use_float, yajl_version):
-    callback_data = _get_callback_data(yajl_version)
+def make_callbaks(send, use_float, yajl_version, number_type=None):
+    to_number = common.number_converter(use_float, number_type)
+    callback_data = _get_callback_data(yajl_version, to_number)
     class Callbacks(Structure):
         _fields_ = [(name, type) for name, _, type, _ in callback_data]
-    return Callbacks(*[_callback(send, use_float, *data) for data in callback_data])
+    return Callbacks(*[_callback(send, to_number, *data) for data in callback_data])
+
+def c_buffer(buffer):
+    '''
+    Returns `buffer` in a form that can be given to yajl as a char pointer,
+    sharing its memory unless it's read-only and not a bytes object.
+    '''
+    if isinstance(buffer, bytes):
+        return buffer
+    try:
+        return (c_char * len(buffer)).from_buffer(buffer)
+    except TypeError:
+        return (c_char * len(buffer)).from_buffer_copy(buffer)
+
 
 def yajl_get_error(yajl, handle, buffer):
+    buffer = c_buffer(buffer)
     perror = yajl.yajl_get_error(handle, 1, buffer, len(buffer))
     error = cast(perror, c_char_p).value
     try:
@@ -2,14 +2,17 @@
 Pure-python parsing backend.
 '''
 from json.decoder import scanstring
+import array
+import decimal
+import json
 import re
 
-from ijson import common, utils
+from ijson import common, compat, utils
 import codecs
 
 
-LEXEME_RE = re.compile(r'[a-z0-9eE\.\+-]+|\S')
-UNARY_LEXEMES = set('[]{},')
+LEXEME_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(?:"|\\?\Z)|[a-z0-9eE\.\+-]+|\S', re.DOTALL)
+LITERAL_RE = re.compile(r'[a-z0-9eE\.\+-]+')
 EOF = -1, None
 
 
@@ -20,10 +23,24 @@ class UnexpectedSymbol(common.JSONError):
         )
 
 
+def _utf8_decoder():
+    '''
+    The decode function of an incremental UTF-8 decoder, which on python 2
+    takes memoryviews too
+    '''
+    decode = codecs.getincrementaldecoder('utf-8')().decode
+    if not compat.IS_PY2:
+        return decode
+    def decode_buffer(bdata, final=False):
+        if isinstance(bdata, memoryview):
+            bdata = bdata.tobytes()
+        return decode(bdata, final)
+    return decode_buffer
+
+
 @utils.coroutine
 def utf8_encoder(target):
-    decoder = codecs.getincrementaldecoder('utf-8')()
-    decode = decoder.decode
+    decode = _utf8_decoder()
     send = target.send
     while True:
         try:
@@ -46,80 +63,157 @@ def utf8_encoder(target):
             target.close()
             break
 
+class ChunkLexer(object):
+    """
+    Splits chunks of content into lists of (position, lexeme) tuples. Each
+    chunk is tokenized in a single pass.
+
+    Lexemes spanning more than one chunk of data (e.g., long strings) are
+    accumulated as a list of pieces that is joined only once the lexeme is
+    complete, so their cost grows linearly with their size. Complete lexemes
+    are returned along with those of the chunk where they finish.
+    """
+
+    def __init__(self):
+        self.discarded = 0
+        self.pieces = None
+        self.lexeme_pos = 0
+        self.in_string = False
+        self.escaped = 0
+
+    def feed(self, buf, final=False):
+        """
+        Returns the text to tokenize after receiving `buf`, and its position
+        in the content. The text is prefixed with the lexeme left incomplete
+        by the previous chunk, if any. If `buf` only continues that lexeme
+        there is nothing to tokenize yet, and None is returned as text.
+        """
+        pos = self.discarded
+        self.discarded += len(buf)
+        pieces = self.pieces
+        if pieces is None:
+            return (buf or None), pos
+        if final:
+            if self.in_string:
+                raise common.IncompleteJSONError('Incomplete string lexeme')
+        elif self.in_string:
+            if _string_end(buf, self.escaped) == -1:
+                pieces.append(buf)
+                self.escaped = _trailing_backslashes(buf, 0, len(buf), self.escaped)
+                return None, pos
+        else:
+            match = LITERAL_RE.match(buf)
+            if match and match.end() == len(buf):
+                pieces.append(buf)
+                return None, pos
+        pieces.append(buf)
+        self.pieces = None
+        return ''.join(pieces), self.lexeme_pos
+
+    def defer(self, lexeme, pos):
+        """
+        Keeps `lexeme`, found at the end of the text, as the start of a lexeme
+        that could continue in the next chunk. Returns whether it was kept.
+        """
+        if lexeme[0] == '"':
+            in_string = len(lexeme) == 1 or lexeme[-1] != '"' or \
+                _trailing_backslashes(lexeme, 1, len(lexeme) - 1)
+            if not in_string:
+                return False
+            self.escaped = _trailing_backslashes(lexeme, 1, len(lexeme))
+        elif LITERAL_RE.match(lexeme):
+            in_string = False
+        else:
+            return False
+        self.in_string = in_string
+        self.lexeme_pos = pos
+        self.pieces = [lexeme]
+        return True
+
+    def lex(self, buf, final=False):
+        """Returns the lexemes completed by `buf`"""
+        buf, pos = self.feed(buf, final)
+        if buf is None:
+            return []
+        lexemes = [(pos + match.start(), match.group())
+                   for match in LEXEME_RE.finditer(buf)]
+
+        # The last lexeme could continue in the next chunk
+        if lexemes and not final:
+            lexeme_pos, lexeme = lexemes[-1]
+            if lexeme_pos - pos + len(lexeme) == len(buf) and \
+                    self.defer(lexeme, lexeme_pos):
+                lexemes.pop()
+        return lexemes
+
+    def finish(self):
+        """Returns the lexemes left once the content has been exhausted"""
+        return self.lex('', True)
+
+
 @utils.coroutine
 def Lexer(target):
     """
     Parses lexemes out of the incoming content, and sends them to parse_value.
-    A special EOF result is sent when the data source has been exhausted to
-    give parse_value the possibility of raising custom exceptions due to missing
-    content.
+    The lexemes of each chunk of data are sent together as a list of
+    (position, lexeme) tuples. A special EOF result is sent when the data source
+    has been exhausted to give parse_value the possibility of raising custom
+    exceptions due to missing content.
     """
-    try:
-        data = (yield)
-    except GeneratorExit:
-        data = ''
-    buf = data
-    pos = 0
-    discarded = 0
     send = target.send
+    lexer = ChunkLexer()
+    lex = lexer.lex
     while True:
-        match = LEXEME_RE.search(buf, pos)
-        if match:
-            lexeme = match.group()
-            if lexeme == '"':
-                pos = match.start()
-                start = pos + 1
-                while True:
-                    try:
-                        end = buf.index('"', start)
-                        escpos = end - 1
-                        while buf[escpos] == '\\':
-                            escpos -= 1
-                        if (end - escpos) % 2 == 0:
-                            start = end + 1
-                        else:
-                            break
-                    except ValueError:
-                        try:
-                            data = (yield)
-                        except GeneratorExit:
-                            data = ''
-                        if not data:
-                            raise common.IncompleteJSONError('Incomplete string lexeme')
-                        buf += data
-                send((discarded + pos, buf[pos:end + 1]))
-                pos = end + 1
-            else:
-                while lexeme not in UNARY_LEXEMES and match.end() == len(buf):
-                    try:
-                        data = (yield)
-                    except GeneratorExit:
-                        data = ''
-                    if not data:
-                        break
-                    buf += data
-                    match = LEXEME_RE.search(buf, pos)
-                    lexeme = match.group()
-                send((discarded + match.start(), lexeme))
-                pos = match.end()
-        else:
-            # Don't ask data from an already exhausted source
-            if data:
-                try:
-                    data = (yield)
-                except GeneratorExit:
-                    data = ''
-            if not data:
-                # Normally should raise StopIteration, but can raise
-                # IncompleteJSONError too, which is the point of sending EOF
-                try:
-                    target.send(EOF)
-                except StopIteration:
-                    pass
-                break
-            discarded += len(buf)
-            buf = data
-            pos = 0
+        try:
+            buf = (yield)
+        except GeneratorExit:
+            buf = ''
+        if not buf:
+            break
+        lexemes = lex(buf)
+        if lexemes:
+            send(lexemes)
+
+    lexemes = lexer.finish()
+    if lexemes:
+        send(lexemes)
+
+    # Normally should raise StopIteration, but can raise
+    # IncompleteJSONError too, which is the point of sending EOF
+    try:
+        send(EOF)
+    except StopIteration:
+        pass
+
+
+def _trailing_backslashes(buf, start, end, escaped=0):
+    '''
+    Parity of the number of consecutive backslashes ending buf[start:end].
+    `escaped` is the parity of those found before start, taken into account
+    if buf[start:end] is made entirely out of backslashes.
+    '''
+    i = end - 1
+    while i >= start and buf[i] == '\\':
+        i -= 1
+    backslashes = end - 1 - i
+    if i < start:
+        backslashes += escaped
+    return backslashes % 2
+
+
+def _string_end(buf, escaped):
+    '''
+    Position of the first unescaped double quote in buf, or -1 if there is none.
+    `escaped` indicates whether buf[0] is escaped by content preceding buf.
+    '''
+    start = 0
+    while True:
+        end = buf.find('"', start)
+        if end == -1:
+            return -1
+        if not _trailing_backslashes(buf, 0, end, escaped):
+            return end
+        start = end + 1
 
 
 # Parsing states
@@ -127,16 +221,20 @@ _PARSE_VALUE = 0
 _PARSE_ARRAY_ELEMENT_END = 1
 _PARSE_OBJECT_KEY = 2
 _PARSE_OBJECT_END = 3
+_PARSE_ARRAY_FIRST_ELEMENT = 4
+_PARSE_OBJECT_FIRST_KEY = 5
+_PARSE_OBJECT_COLON = 6
 
 # infinity singleton for overflow checks
 inf = float("inf")
 
 @utils.coroutine
-def parse_value(target, multivalue, use_float):
+def parse_value(target, multivalue, to_number):
     """
     Parses results coming out of the Lexer into ijson events, which are sent to
     `target`. A stack keeps track of the type of object being parsed at the time
     (a value, and object or array -- the last two being values themselves).
+    Lexemes are received in batches, which are consumed in a single loop.
 
     A special EOF result coming from the Lexer indicates that no more content is
     expected. This is used to check for incomplete content and raise the
@@ -150,112 +248,102 @@ def parse_value(target, multivalue, use_float):
     pop = state_stack.pop
     push = state_stack.append
     send = target.send
-    prev_pos, prev_symbol = None, None
-    to_number = common.integer_or_float if use_float else common.integer_or_decimal
     while True:
 
-        if prev_pos is None:
-            pos, symbol = (yield)
-            if (pos, symbol) == EOF:
-                if state_stack:
-                    raise common.IncompleteJSONError('Incomplete JSON content')
-                break
-        else:
-            pos, symbol = prev_pos, prev_symbol
-            prev_pos, prev_symbol = None, None
-        try:
-            state = state_stack[-1]
-        except IndexError:
-            if multivalue:
-                state = _PARSE_VALUE
-                push(state)
-            else:
-                raise common.JSONError('Additional data found')
-        assert state_stack
-
-        if state == _PARSE_VALUE:
-            # Simple, common cases
-            if symbol == 'null':
-                send(('null', None))
-                pop()
-            elif symbol == 'true':
-                send(('boolean', True))
-                pop()
-            elif symbol == 'false':
-                send(('boolean', False))
-                pop()
-            elif symbol[0] == '"':
-                send(('string', parse_string(symbol)))
-                pop()
-            # Array start
-            elif symbol == '[':
-                send(('start_array', None))
-                pos, symbol = (yield)
-                if (pos, symbol) == EOF:
-                    raise common.IncompleteJSONError('Incomplete JSON content')
+        lexemes = (yield)
+        if lexemes is EOF:
+            if state_stack:
+                raise common.IncompleteJSONError('Incomplete JSON content')
+            break
+
+        for pos, symbol in lexemes:
+            try:
+                state = state_stack[-1]
+            except IndexError:
+                if multivalue:
+                    state = _PARSE_VALUE
+                    push(state)
+                else:
+                    raise common.JSONError('Additional data found')
+
+            if state == _PARSE_ARRAY_FIRST_ELEMENT:
                 if symbol == ']':
                     send(('end_array', None))
                     pop()
-                else:
-                    prev_pos, prev_symbol = pos, symbol
-                    push(_PARSE_ARRAY_ELEMENT_END)
-                    push(_PARSE_VALUE)
-            # Object start
-            elif symbol == '{':
-                send(('start_map', None))
-                pos, symbol = (yield)
-                if (pos, symbol) == EOF:
-                    raise common.IncompleteJSONError('Incomplete JSON content')
+                    continue
+                state_stack[-1] = _PARSE_ARRAY_ELEMENT_END
+                push(_PARSE_VALUE)
+                state = _PARSE_VALUE
+            elif state == _PARSE_OBJECT_FIRST_KEY:
                 if symbol == '}':
                     send(('end_map', None))
                     pop()
+                    continue
+                state = _PARSE_OBJECT_KEY
+
+            if state == _PARSE_VALUE:
+                # Simple, common cases
+                if symbol[0] == '"':
+                    send(('string', parse_string(symbol)))
+                    pop()
+                elif symbol == 'null':
+                    send(('null', None))
+                    pop()
+                elif symbol == 'true':
+                    send(('boolean', True))
+                    pop()
+                elif symbol == 'false':
+                    send(('boolean', False))
+                    pop()
+                # Array start
+                elif symbol == '[':
+                    send(('start_array', None))
+                    state_stack[-1] = _PARSE_ARRAY_FIRST_ELEMENT
+                # Object start
+                elif symbol == '{':
+                    send(('start_map', None))
+                    state_stack[-1] = _PARSE_OBJECT_FIRST_KEY
+                # A number
                 else:
-                    prev_pos, prev_symbol = pos, symbol
-                    push(_PARSE_OBJECT_KEY)
-            # A number
-            else:
-                try:
-                    number = to_number(symbol)
-                    if number == inf:
-                        raise common.JSONError("float overflow: %s" % (symbol,))
-                except:
+                    try:
+                        number = to_number(symbol)
+                        if number == inf:
+                            raise common.JSONError("float overflow: %s" % (symbol,))
+                    except:
+                        raise UnexpectedSymbol(symbol, pos)
+                    else:
+                        send(('number', number))
+                        pop()
+
+            elif state == _PARSE_OBJECT_KEY:
+                if symbol[0] != '"':
+                    raise UnexpectedSymbol(symbol, pos)
+                send(('map_key', parse_string(symbol)))
+                state_stack[-1] = _PARSE_OBJECT_COLON
+
+            elif state == _PARSE_OBJECT_COLON:
+                if symbol != ':':
+                    raise UnexpectedSymbol(symbol, pos)
+                state_stack[-1] = _PARSE_OBJECT_END
+                push(_PARSE_VALUE)
+
+            elif state == _PARSE_OBJECT_END:
+                if symbol == ',':
+                    state_stack[-1] = _PARSE_OBJECT_KEY
+                elif symbol != '}':
                     raise UnexpectedSymbol(symbol, pos)
                 else:
-                    send(('number', number))
+                    send(('end_map', None))
                     pop()
 
-        elif state == _PARSE_OBJECT_KEY:
-            if symbol[0] != '"':
-                raise UnexpectedSymbol(symbol, pos)
-            send(('map_key', parse_string(symbol)))
-            pos, symbol = (yield)
-            if (pos, symbol) == EOF:
-                raise common.IncompleteJSONError('Incomplete JSON content')
-            if symbol != ':':
-                raise UnexpectedSymbol(symbol, pos)
-            state_stack[-1] = _PARSE_OBJECT_END
-            push(_PARSE_VALUE)
-
-        elif state == _PARSE_OBJECT_END:
-            if symbol == ',':
-                state_stack[-1] = _PARSE_OBJECT_KEY
-            elif symbol != '}':
-                raise UnexpectedSymbol(symbol, pos)
-            else:
-                send(('end_map', None))
-                pop()
-                pop()
-
-        elif state == _PARSE_ARRAY_ELEMENT_END:
-            if symbol == ',':
-                state_stack[-1] = _PARSE_ARRAY_ELEMENT_END
-                push(_PARSE_VALUE)
-            elif symbol != ']':
-                raise UnexpectedSymbol(symbol, pos)
-            else:
-                send(('end_array', None))
-                pop()
-                pop()
+            elif state == _PARSE_ARRAY_ELEMENT_END:
+                if symbol == ',':
+                    push(_PARSE_VALUE)
+                elif symbol != ']':
+                    raise UnexpectedSymbol(symbol, pos)
+                else:
+                    send(('end_array', None))
+                    pop()
 
 
 def parse_string(symbol):
@@ -263,7 +351,7 @@ def parse_string(symbol):
 
 
 def basic_parse_basecoro(target, multiple_values=False, allow_comments=False,
-                         use_float=False):
+                         use_float=False, intern_strings=False, number_type=None):
     '''
     Iterator yielding unprefixed events.
 
@@ -273,7 +361,594 @@ def basic_parse_basecoro(target, multiple_values=False, allow_comments=False,
     '''
     if allow_comments:
         raise ValueError("Comments are not supported by the python backend")
-    return utf8_encoder(Lexer(parse_value(target, multiple_values, use_float)))
+    to_number = common.number_converter(use_float, number_type)
+    return utf8_encoder(Lexer(parse_value(target, multiple_values, to_number)))
+
+
+def _float(str_value):
+    value = float(str_value)
+    if value == inf:
+        raise ValueError("float overflow: %s" % (str_value,))
+    return value
+
+
+# The json module's parse_float for the numbers given to users, which are
+# handed as they are (even integers) for other number types
+_JSON_PARSE_FLOAT = {
+    common.integer_or_decimal: decimal.Decimal,
+    common.integer_or_float: _float,
+}
+
+
+def _reject_constant(symbol):
+    raise ValueError("Unexpected symbol %r" % (symbol,))
+
+
+def _pairs_hook(map_type):
+    def build(pairs):
+        obj = map_type()
+        for key, value in pairs:
+            obj[key] = value
+        return obj
+    return build
+
+
+# Runs of comma-terminated numbers in arrays, which are converted all at once
+_FLOATS_RE = re.compile(
+    r'[ \t\n\r]*(?:-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?[ \t\n\r]*,[ \t\n\r]*)+')
+_INTEGERS_RE = re.compile(r'[ \t\n\r]*(?:-?(?:0|[1-9][0-9]*)[ \t\n\r]*,[ \t\n\r]*)+')
+# Only these numbers can be too big for a float
+_MAYBE_OVERFLOW_RE = re.compile(r'[eE]|[0-9]{309}')
+
+
+def _bulk_numbers(numbers, buf, pos, numbers_re, convert):
+    '''
+    Appends to the `numbers` array the run of comma-terminated numbers found at
+    `pos` in `buf`, returning where the run ends (`pos` if there's none). If the
+    numbers can't be stored in the array it is left untouched, and None is
+    returned.
+    '''
+    match = numbers_re.match(buf, pos)
+    if not match:
+        return pos
+    span = match.group()
+    values = span.split(',')
+    values.pop()
+    values = list(map(convert, values))
+    if convert is float and _MAYBE_OVERFLOW_RE.search(span) and (
+            inf in values or -inf in values):
+        raise common.JSONError("float overflow in array")
+    try:
+        numbers.fromlist(values)
+    except OverflowError:
+        return None
+    return match.end()
+
+
+def _send_chunks(numbers, chunk_size, send):
+    '''Sends the full chunks of the `numbers` array, leaving the rest'''
+    while len(numbers) >= chunk_size:
+        send(numbers[:chunk_size])
+        del numbers[:chunk_size]
+
+
+# Events given by _FusedParser
+_VALUE = 0
+_MAP_KEY = 1
+_START_MAP = 2
+_START_ARRAY = 3
+_END_CONTAINER = 4
+
+# The names of the events of values, by their first symbol
+_EVENT_NAMES = {'{': 'start_map', '[': 'start_array', '"': 'string', 'n': 'null',
+                't': 'boolean', 'f': 'boolean'}
+
+# The ObjectBuilder handler of each event
+_BUILDER_HANDLERS = (common._builder_value, common._builder_map_key, common._builder_start_map,
+                     common._builder_start_array, common._builder_end)
+
+# What follows an array element that isn't the last one
+_COMMA_RE = re.compile(r'[ \t\n\r]*,')
+
+
+class _FusedParser(object):
+    """
+    Decodes, lexes and parses chunks of raw bytes for the fused coroutines,
+    tracking the location of values against a prefix. All this happens in the
+    single frame of the `events` generator, which otherwise would need a
+    pipeline of five coroutines.
+
+    The location is tracked as a stack with the states of a PrefixMatcher for
+    the prefix (which can be a pattern), advanced as containers are entered
+    and left, so no prefix strings are ever built. With `members` the values
+    at the prefix are the members of the objects there, like for kvitems.
+
+    Lexemes are matched lazily, so consumers can decode values found whole in
+    the text at hand by other means (e.g., the json module's scanner) and
+    have the tokenization of their text skipped (see `skip`).
+    """
+
+    def __init__(self, prefix, members=False, multiple_values=False, allow_comments=False,
+                 to_number=common.integer_or_decimal):
+        if allow_comments:
+            raise ValueError("Comments are not supported by the python backend")
+        matcher = common.PrefixMatcher(prefix)
+        self.transitions = matcher.transitions
+        self.defaults = matcher.defaults
+        self.accepting = matcher.accepting
+        self.path = [matcher.start]
+        self.members = members
+        self.member_matches = False
+        self.multiple_values = multiple_values
+        self.to_number = to_number
+        self.decode = _utf8_decoder()
+        self.lexer = ChunkLexer()
+        self.state_stack = [_PARSE_VALUE]
+        self.key = None
+        self.buf = None
+        self.base = 0
+        self.offset = -1
+
+    def events(self, bdata):
+        """
+        Yields (event, value, match, at_prefix) for the text completed by
+        `bdata` (b'' once the data is exhausted), where `match` is that of the
+        event's lexeme in `self.buf`, and `at_prefix` is whether the value
+        starting with it is at the prefix. The key of the last member is kept
+        in `self.key`.
+        """
+        try:
+            sdata = self.decode(bdata, not bdata)
+        except UnicodeDecodeError as e:
+            raise common.IncompleteJSONError(e)
+        if bdata and not sdata:
+            return
+
+        lexer = self.lexer
+        defer = lexer.defer
+        finditer = LEXEME_RE.finditer
+        to_number = self.to_number
+        state_stack = self.state_stack
+        pop = state_stack.pop
+        push = state_stack.append
+        path = self.path
+        transitions = self.transitions
+        defaults = self.defaults
+        accepting = self.accepting
+        members = self.members
+        member_matches = self.member_matches
+
+        buf, base = lexer.feed(sdata, not bdata)
+        self.buf = buf
+        self.base = base
+        buflen = len(buf) if buf else 0
+        offset = 0 if buf else -1
+        while offset >= 0:
+            matches = finditer(buf, offset)
+            offset = -1
+            for match in matches:
+                symbol = match.group()
+                if match.end() == buflen and bdata and \
+                        defer(symbol, base + match.start()):
+                    break
+
+                # Same parsing logic as in parse_value
+                try:
+                    state = state_stack[-1]
+                except IndexError:
+                    if self.multiple_values:
+                        state = _PARSE_VALUE
+                        push(state)
+                    else:
+                        raise common.JSONError('Additional data found')
+
+                if state == _PARSE_ARRAY_FIRST_ELEMENT:
+                    if symbol == ']':
+                        pop()
+                        path.pop()
+                        yield _END_CONTAINER, None, match, False
+                        continue
+                    state_stack[-1] = _PARSE_ARRAY_ELEMENT_END
+                    push(_PARSE_VALUE)
+                    state = _PARSE_VALUE
+                elif state == _PARSE_OBJECT_FIRST_KEY:
+                    if symbol == '}':
+                        pop()
+                        path.pop()
+                        yield _END_CONTAINER, None, match, False
+                        continue
+                    state = _PARSE_OBJECT_KEY
+
+                if state == _PARSE_VALUE:
+                    at_prefix = member_matches if members else accepting[path[-1]]
+                    member_matches = False
+                    if symbol == '{':
+                        state_stack[-1] = _PARSE_OBJECT_FIRST_KEY
+                        path.append(None)
+                        yield _START_MAP, None, match, at_prefix
+                    elif symbol == '[':
+                        state_stack[-1] = _PARSE_ARRAY_FIRST_ELEMENT
+                        state = path[-1]
+                        path.append(transitions[state].get('item', defaults[state]))
+                        yield _START_ARRAY, None, match, at_prefix
+                    else:
+                        if symbol[0] == '"':
+                            value = parse_string(symbol)
+                        elif symbol == 'null':
+                            value = None
+                        elif symbol == 'true':
+                            value = True
+                        elif symbol == 'false':
+                            value = False
+                        else:
+                            try:
+                                value = to_number(symbol)
+                                if value == inf:
+                                    raise common.JSONError("float overflow: %s" % (symbol,))
+                            except:
+                                raise UnexpectedSymbol(symbol, base + match.start())
+                        pop()
+                        yield _VALUE, value, match, at_prefix
+                    if self.offset >= 0:
+                        offset = self.offset
+                        self.offset = -1
+                        break
+
+                elif state == _PARSE_OBJECT_KEY:
+                    if symbol[0] != '"':
+                        raise UnexpectedSymbol(symbol, base + match.start())
+                    key = self.key = parse_string(symbol)
+                    state_stack[-1] = _PARSE_OBJECT_COLON
+                    state = path[-2]
+                    path[-1] = transitions[state].get(key, defaults[state])
+                    member_matches = accepting[state]
+                    yield _MAP_KEY, key, match, False
+
+                elif state == _PARSE_OBJECT_COLON:
+                    if symbol != ':':
+                        raise UnexpectedSymbol(symbol, base + match.start())
+                    state_stack[-1] = _PARSE_OBJECT_END
+                    push(_PARSE_VALUE)
+
+                elif state == _PARSE_OBJECT_END:
+                    if symbol == ',':
+                        state_stack[-1] = _PARSE_OBJECT_KEY
+                    elif symbol != '}':
+                        raise UnexpectedSymbol(symbol, base + match.start())
+                    else:
+                        pop()
+                        path.pop()
+                        yield _END_CONTAINER, None, match, False
+
+                elif state == _PARSE_ARRAY_ELEMENT_END:
+                    if symbol == ',':
+                        push(_PARSE_VALUE)
+                    elif symbol != ']':
+                        raise UnexpectedSymbol(symbol, base + match.start())
+                    else:
+                        pop()
+                        path.pop()
+                        yield _END_CONTAINER, None, match, False
+
+        self.member_matches = member_matches
+        if not bdata and state_stack:
+            raise common.IncompleteJSONError('Incomplete JSON content')
+
+    def skip(self, end):
+        """
+        Called on the start event of a container found to end at offset `end`
+        of `self.buf`: leaves the container, and carries on from there.
+        """
+        self.state_stack.pop()
+        self.path.pop()
+        self.offset = end
+
+    def skip_elements(self, end):
+        """
+        Called on the start event of an array or the event of one of its
+        elements once the elements up to offset `end` of `self.buf`, which is
+        right after a comma, have been taken care of: carries on from there
+        with the next element.
+        """
+        self.state_stack[-1] = _PARSE_ARRAY_ELEMENT_END
+        self.state_stack.append(_PARSE_VALUE)
+        self.offset = end
+
+    def lexed_end(self):
+        """The position in the content up to which lexemes have been given"""
+        if self.lexer.pieces is not None:
+            return self.lexer.lexeme_pos
+        return self.base + len(self.buf)
+
+
+def _raw_decode(to_number, map_type):
+    '''
+    The raw_decode method of a json.JSONDecoder building values like the
+    parser and an ObjectBuilder would with `to_number` and `map_type`.
+    '''
+    return json.JSONDecoder(
+        parse_float=_JSON_PARSE_FLOAT.get(to_number, to_number),
+        parse_int=None if to_number in _JSON_PARSE_FLOAT else to_number,
+        parse_constant=_reject_constant,
+        object_pairs_hook=None if map_type is dict else _pairs_hook(map_type)
+    ).raw_decode
+
+
+def _build(builder, event, value):
+    _BUILDER_HANDLERS[event](builder, value)
+
+
+@utils.coroutine
+def _items_basecoro(target, prefix, map_type, kvitems, multiple_values=False,
+                    allow_comments=False, use_float=False, intern_strings=False,
+                    number_type=None, fields=None, schema=None):
+    '''
+    Coroutine dispatching the values of items (or the pairs of kvitems, if
+    `kvitems` is True) out of raw bytes.
+
+    Containers found whole in the text at hand are decoded by the json
+    module's scanner; only those crossing chunk boundaries (or that the json
+    module rejects) are built from events. Projections with `fields` are
+    applied on the values once built, which is still cheaper than building
+    only some of their members event by event, and so are schemas.
+    '''
+    map_type = map_type or dict
+    to_number = common.number_converter(use_float, number_type)
+    send = target.send
+    if schema is not None:
+        _, schema = common._items_options(fields, schema, map_type)
+        send_built = send
+        send = lambda value: send_built(common._apply_schema(value, schema))
+    elif fields is not None:
+        projection = common._projection(fields)
+        send_whole = send
+        send = lambda value: send_whole(common._project(value, projection))
+    parser = _FusedParser(prefix, kvitems, multiple_values, allow_comments, to_number)
+    raw_decode = _raw_decode(to_number, map_type)
+    builder = common.ObjectBuilder(map_type)
+    containers = builder.containers
+    key = None
+
+    while True:
+        try:
+            bdata = (yield)
+        except GeneratorExit:
+            bdata = b''
+        for event, value, match, at_prefix in parser.events(bdata):
+            if containers:
+                _build(builder, event, value)
+                if not containers:
+                    send((key, builder.value) if kvitems else builder.value)
+            elif at_prefix:
+                key = parser.key
+                if event == _VALUE:
+                    send((key, value) if kvitems else value)
+                    continue
+                try:
+                    value, end = raw_decode(parser.buf, match.start())
+                except (ValueError, RuntimeError):
+                    builder.reset()
+                    _build(builder, event, value)
+                    continue
+                parser.skip(end)
+                send((key, value) if kvitems else value)
+        if not bdata:
+            break
+
+
+@utils.coroutine
+def _raw_items_basecoro(target, prefix, multiple_values=False, allow_comments=False,
+                        use_float=False, intern_strings=False, number_type=None):
+    '''
+    Coroutine dispatching the text of the values of items out of raw bytes,
+    encoded back into the bytes it was decoded from.
+
+    Values are still validated. The ends of containers found whole in the
+    text at hand are found by decoding them with the json module's scanner,
+    which builds their contents only to throw them away, but is still much
+    faster than following their lexemes. The text of the rest is collected
+    piece by piece, following the positions of their lexemes (without
+    building anything), until they end.
+    '''
+    send = target.send
+    parser = _FusedParser(prefix, False, multiple_values, allow_comments)
+    raw_end = json.JSONDecoder(parse_constant=_reject_constant).raw_decode
+    depth = 0
+
+    while True:
+        try:
+            bdata = (yield)
+        except GeneratorExit:
+            bdata = b''
+        for event, value, match, at_prefix in parser.events(bdata):
+            if depth:
+                if event == _START_MAP or event == _START_ARRAY:
+                    depth += 1
+                elif event == _END_CONTAINER:
+                    depth -= 1
+                    if not depth:
+                        pieces.append(parser.buf[start - parser.base:match.end()])
+                        send(''.join(pieces).encode('utf-8'))
+            elif at_prefix:
+                if event == _VALUE:
+                    send(match.group().encode('utf-8'))
+                    continue
+                try:
+                    end = raw_end(parser.buf, match.start())[1]
+                except (ValueError, RuntimeError):
+                    depth = 1
+                    start = parser.base + match.start()
+                    pieces = []
+                    continue
+                parser.skip(end)
+                send(parser.buf[match.start():end].encode('utf-8'))
+
+        # The text of a raw value continues in the next chunk, which starts
+        # with the lexeme deferred by the lexer, if any
+        if depth and parser.buf:
+            end = parser.lexed_end()
+            pieces.append(parser.buf[start - parser.base:end - parser.base])
+            start = end
+        if not bdata:
+            break
+
+
+@utils.coroutine
+def _arrays_basecoro(target, prefix, typecode, chunk_size, multiple_values=False,
+                     allow_comments=False, use_float=False, intern_strings=False,
+                     number_type=None):
+    '''
+    Coroutine dispatching array.array objects with the numbers of the arrays
+    at a prefix out of raw bytes.
+
+    Numbers are converted in bulk: the runs of comma-separated numbers found
+    in the text at hand are validated with a regular expression, split and
+    converted all at once. Only numbers at the edges of these runs (or in
+    runs that don't fit in the array) go through the parser.
+    '''
+    send = target.send
+    to_number = common.number_converter(use_float, number_type)
+    parser = _FusedParser(prefix, False, multiple_values, allow_comments, to_number)
+    numbers_re, convert = (_FLOATS_RE, float) if typecode in 'fd' else (_INTEGERS_RE, int)
+    numbers = None
+
+    while True:
+        try:
+            bdata = (yield)
+        except GeneratorExit:
+            bdata = b''
+        for event, value, match, at_prefix in parser.events(bdata):
+            if numbers is not None:
+                if event == _END_CONTAINER:
+                    if numbers or not chunk_size:
+                        send(numbers)
+                    numbers = None
+                    continue
+                if event != _VALUE or match.group()[0] not in '-0123456789':
+                    raise ValueError(common._NOT_NUMBERS % _EVENT_NAMES.get(match.group()[0], 'number'))
+                try:
+                    common._store_number(numbers, value)
+                except (TypeError, OverflowError):
+                    raise ValueError(common._UNSTORABLE % (value, typecode))
+                if len(numbers) == chunk_size:
+                    send(numbers)
+                    numbers = array.array(typecode)
+                comma = _COMMA_RE.match(parser.buf, match.end())
+                if not comma:
+                    continue
+                pos = comma.end()
+            elif at_prefix:
+                if event != _START_ARRAY:
+                    raise ValueError(common._NOT_NUMBERS % _EVENT_NAMES.get(match.group()[0], 'number'))
+                numbers = array.array(typecode)
+                bulk = True
+                pos = match.end()
+            else:
+                continue
+
+            # The run of numbers following the array's start or a number
+            if bulk:
+                end = _bulk_numbers(numbers, parser.buf, pos, numbers_re, convert)
+                if end is None:
+                    bulk = False
+                elif end != pos:
+                    if chunk_size:
+                        _send_chunks(numbers, chunk_size, send)
+                    parser.skip_elements(end)
+        if not bdata:
+            break
+
+
+@utils.coroutine
+def _records_basecoro(target, prefix, map_type, multiple_values=False, allow_comments=False,
+                      use_float=False, intern_strings=False, number_type=None):
+    '''
+    Coroutine dispatching the objects of the arrays at a prefix out of raw
+    bytes, followed by None at the end of each array.
+
+    Objects found whole in the text at hand are decoded one by one by the
+    json module's scanner; only those crossing chunk boundaries (or that the
+    json module rejects) are built from events.
+    '''
+    map_type = map_type or dict
+    to_number = common.number_converter(use_float, number_type)
+    send = target.send
+    parser = _FusedParser(prefix, False, multiple_values, allow_comments, to_number)
+    raw_decode = _raw_decode(to_number, map_type)
+    builder = common.ObjectBuilder(map_type)
+    containers = builder.containers
+    in_records = False
+
+    while True:
+        try:
+            bdata = (yield)
+        except GeneratorExit:
+            bdata = b''
+        for event, value, match, at_prefix in parser.events(bdata):
+            if containers:
+                _build(builder, event, value)
+                if not containers:
+                    send(builder.value)
+            elif in_records:
+                if event == _END_CONTAINER:
+                    send(None)
+                    in_records = False
+                    continue
+                if event != _START_MAP:
+                    raise ValueError(common._NOT_OBJECTS % _EVENT_NAMES.get(match.group()[0], 'number'))
+                try:
+                    value, end = raw_decode(parser.buf, match.start())
+                except (ValueError, RuntimeError):
+                    builder.reset()
+                    _build(builder, event, value)
+                    continue
+                parser.skip(end)
+                send(value)
+            elif at_prefix:
+                if event != _START_ARRAY:
+                    raise ValueError(common._NOT_OBJECTS % _EVENT_NAMES.get(match.group()[0], 'number'))
+                in_records = True
+        if not bdata:
+            break
+
+
+def items_fused_basecoro(target, prefix, map_type=None, fields=None, schema=None, raw=False,
+                         **config):
+    '''
+    Coroutine dispatching native Python objects constructed from the events
+    under a given prefix, fed directly with raw bytes.
+    '''
+    if raw:
+        common._items_options(fields, schema, map_type, raw)
+        return _raw_items_basecoro(target, prefix, **config)
+    return _items_basecoro(target, prefix, map_type, False, fields=fields, schema=schema,
+                           **config)
+
+
+def kvitems_fused_basecoro(target, prefix, map_type=None, **config):
+    '''
+    Coroutine dispatching (key, value) pairs constructed from the events
+    under a given prefix, fed directly with raw bytes.
+    '''
+    return _items_basecoro(target, prefix, map_type, True, **config)
+
+
+def arrays_fused_basecoro(target, prefix, typecode='d', chunk_size=None, **config):
+    '''
+    Coroutine dispatching array.array objects with the numbers of the arrays
+    under a given prefix, fed directly with raw bytes.
+    '''
+    return _arrays_basecoro(target, prefix, typecode, chunk_size, **config)
+
+
+def columns_fused_basecoro(target, prefix, fields, chunk_size=None, map_type=None,
+                           masks=False, **config):
+    '''
+    Coroutine dispatching the members of the objects of the arrays under a
+    given prefix as columns, fed directly with raw bytes.
+    '''
+    columns = common._records_to_columns(target, fields, chunk_size, masks)
+    return _records_basecoro(columns, prefix, map_type, **config)
 
 
 common.enrich_backend(globals())
@@ -19,7 +19,7 @@ class Config(Structure):
 
 @utils.coroutine
 def basic_parse_basecoro(target, allow_comments=False, multiple_values=False,
-                         use_float=False):
+                         use_float=False, intern_strings=False, number_type=None):
     '''
     Iterator yielding unprefixed events.
 
@@ -32,7 +32,8 @@ def basic_parse_basecoro(target, allow_comments=False, multiple_values=False,
     '''
     if multiple_values:
         raise ValueError("yajl backend doesn't support multiple_values")
-    callbacks = _yajl2_ctypes_common.make_callbaks(target.send, use_float, 1)
+    callbacks = _yajl2_ctypes_common.make_callbaks(target.send, use_float, 1,
+                                                   number_type)
     config = Config(allow_comments, True)
     handle = yajl.yajl_alloc(byref(callbacks), byref(config), None, None)
     try:
@@ -42,7 +43,7 @@ def basic_parse_basecoro(target, allow_comments=False, multiple_values=False,
             except GeneratorExit:
                 buffer = b''
             if buffer:
-                result = yajl.yajl_parse(handle, buffer, len(buffer))
+                result = yajl.yajl_parse(handle, _yajl2_ctypes_common.c_buffer(buffer), len(buffer))
             else:
                 result = yajl.yajl_parse_complete(handle)
             if result == _yajl2_ctypes_common.YAJL_ERROR:
@@ -17,7 +17,7 @@ YAJL_MULTIPLE_VALUES = 8
 
 @utils.coroutine
 def basic_parse_basecoro(target, allow_comments=False, multiple_values=False,
-                         use_float=False):
+                         use_float=False, intern_strings=False, number_type=None):
     '''
     Iterator yielding unprefixed events.
 
@@ -28,7 +28,8 @@ def basic_parse_basecoro(target, allow_comments=False, multiple_values=False,
     - buf_size: a size of an input buffer
     - multiple_values: allows the parser to parse multiple JSON objects
     '''
-    callbacks = _yajl2_ctypes_common.make_callbaks(target.send, use_float, 2)
+    callbacks = _yajl2_ctypes_common.make_callbaks(target.send, use_float, 2,
+                                                   number_type)
     handle = yajl.yajl_alloc(byref(callbacks), None, None)
     if allow_comments:
         yajl.yajl_config(handle, YAJL_ALLOW_COMMENTS, 1)
@@ -41,7 +42,7 @@ def basic_parse_basecoro(target, allow_comments=False, multiple_values=False,
             except GeneratorExit:
                 buffer = b''
             if buffer:
-                result = yajl.yajl_parse(handle, buffer, len(buffer))
+                result = yajl.yajl_parse(handle, _yajl2_ctypes_common.c_buffer(buffer), len(buffer))
             else:
                 result = yajl.yajl_complete_parse(handle)
             if result != _yajl2_ctypes_common.YAJL_OK:
@@ -14,11 +14,21 @@ from . import _yajl2
 
 
 _get_buf_size = lambda kwargs: kwargs.pop('buf_size', 64 * 1024)
-_get_prefix = lambda prefix: [] if not prefix else prefix.split(".")
+_get_batch = lambda kwargs: kwargs.pop('batch', False)
 
-def _itemlike_pipeline(itemslike_coro, prefix, map_type, config):
+def _get_prefix(prefix):
+    if common.is_prefix_pattern(prefix):
+        return common.PrefixMatcher(prefix)
+    return [] if not prefix else prefix.split(".")
+
+def _get_pattern(prefix):
+    if common.is_prefix_pattern(prefix):
+        return common.PrefixMatcher(prefix)
+    return prefix
+
+def _itemlike_pipeline(itemslike_coro, prefix, map_type, config, *args):
     return (
-        (itemslike_coro, (_get_prefix(prefix), map_type), {}),
+        (itemslike_coro, (_get_prefix(prefix), map_type) + args, {}),
         (_yajl2.parse_basecoro, (False,), {}),
         (_yajl2.basic_parse_basecoro, [], config)
     )
@@ -30,11 +40,13 @@ def basic_parse_basecoro(target, **kwargs):
 def basic_parse_gen(file, **kwargs):
     f = compat.bytes_reader(file)
     buf_size = _get_buf_size(kwargs)
-    return _yajl2.basic_parse(f, buf_size, **kwargs)
+    batch = _get_batch(kwargs)
+    return _yajl2.basic_parse(f, buf_size, batch, **kwargs)
 
 def basic_parse_async(file, **kwargs):
     buf_size = _get_buf_size(kwargs)
-    return _yajl2.basic_parse_async(file, buf_size, **kwargs)
+    batch = _get_batch(kwargs)
+    return _yajl2.basic_parse_async(file, buf_size, batch, **kwargs)
 
 @utils.coroutine
 def parse_basecoro(target, **kwargs):
@@ -43,16 +55,18 @@ def parse_basecoro(target, **kwargs):
 def parse_gen(file, **kwargs):
     f = compat.bytes_reader(file)
     buf_size = _get_buf_size(kwargs)
-    return _yajl2.parse(f, buf_size, **kwargs)
+    batch = _get_batch(kwargs)
+    return _yajl2.parse(f, buf_size, batch, **kwargs)
 
 def parse_async(file, **kwargs):
     buf_size = _get_buf_size(kwargs)
-    return _yajl2.parse_async(file, buf_size, **kwargs)
+    batch = _get_batch(kwargs)
+    return _yajl2.parse_async(file, buf_size, batch, **kwargs)
 
 
 @utils.coroutine
 def kvitems_basecoro(target, prefix, map_type=None, **kwargs):
-    return _yajl2.kvitems_basecoro(target.send, prefix, map_type, **kwargs)
+    return _yajl2.kvitems_basecoro(target.send, _get_pattern(prefix), map_type, **kwargs)
 
 def kvitems_coro(target, prefix, map_type=None, **config):
     return utils.chain(target.send,
@@ -62,33 +76,169 @@ def kvitems_coro(target, prefix, map_type=None, **config):
 def kvitems_gen(file, prefix, map_type=None, **kwargs):
     f = compat.bytes_reader(file)
     buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
     prefix = _get_prefix(prefix)
-    return _yajl2.kvitems(f, buf_size, prefix, map_type, **kwargs)
+    return _yajl2.kvitems(f, buf_size, batch, prefix, map_type, **kwargs)
 
 def kvitems_async(file, prefix, map_type=None, **kwargs):
     buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
     prefix = _get_prefix(prefix)
-    return _yajl2.kvitems_async(file, buf_size, prefix, map_type, **kwargs)
+    return _yajl2.kvitems_async(file, buf_size, batch, prefix, map_type, **kwargs)
 
 
 @utils.coroutine
-def items_basecoro(target, prefix, map_type=None, **kwargs):
-    return _yajl2.items_basecoro(target.send, prefix, map_type, **kwargs)
+def items_basecoro(target, prefix, map_type=None, fields=None, schema=None, raw=False, **kwargs):
+    fields, schema = common._items_options(fields, schema, map_type, raw)
+    return _yajl2.items_basecoro(target.send, _get_pattern(prefix), map_type, fields, schema,
+                                 raw, **kwargs)
 
-def items_coro(target, prefix, map_type=None, **config):
+def items_coro(target, prefix, map_type=None, fields=None, schema=None, raw=False, **config):
+    fields, schema = common._items_options(fields, schema, map_type, raw)
     return utils.chain(target.send,
-        *_itemlike_pipeline(_yajl2.items_basecoro, prefix, map_type, config)
+        *_itemlike_pipeline(_yajl2.items_basecoro, prefix, map_type, config, fields, schema, raw)
     )
 
-def items_gen(file, prefix, map_type=None, **kwargs):
+def items_gen(file, prefix, map_type=None, fields=None, schema=None, raw=False, **kwargs):
     f = compat.bytes_reader(file)
     buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
     prefix = _get_prefix(prefix)
-    return _yajl2.items(f, buf_size, prefix, map_type, **kwargs)
+    fields, schema = common._items_options(fields, schema, map_type, raw)
+    return _yajl2.items(f, buf_size, batch, prefix, map_type, fields, schema, raw, **kwargs)
 
-def items_async(file, prefix, map_type=None, **kwargs):
+def items_async(file, prefix, map_type=None, fields=None, schema=None, raw=False, **kwargs):
     buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
     prefix = _get_prefix(prefix)
-    return _yajl2.items_async(file, buf_size, prefix, map_type, **kwargs)
+    fields, schema = common._items_options(fields, schema, map_type, raw)
+    return _yajl2.items_async(file, buf_size, batch, prefix, map_type, fields, schema, raw,
+                              **kwargs)
+
+def _items_multi_basecoro(target, prefixes, map_type, get_prefix):
+    results = []
+    coros = []
+    names = []
+    for prefix, method in common._multi_prefixes(prefixes):
+        coro = _yajl2.kvitems_basecoro if method == 'kvitems' else _yajl2.items_basecoro
+        coros.append(coro(results, get_prefix(prefix), map_type))
+        names.append(prefix)
+    return _yajl2.items_multi_basecoro(target.send, tuple(coros), tuple(names), results)
+
+def _items_multi_pipeline(prefixes, map_type, config):
+    return (
+        (_items_multi_basecoro, (prefixes, map_type, _get_prefix), {}),
+        (_yajl2.parse_basecoro, (False,), {}),
+        (_yajl2.basic_parse_basecoro, [], config)
+    )
+
+@utils.coroutine
+def items_multi_basecoro(target, prefixes, map_type=None, **kwargs):
+    return _items_multi_basecoro(target, prefixes, map_type, _get_pattern)
+
+def items_multi_coro(target, prefixes, map_type=None, **config):
+    return utils.chain(target,
+        *_items_multi_pipeline(prefixes, map_type, config)
+    )
+
+def items_multi_gen(file, prefixes, map_type=None, **kwargs):
+    buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
+    coros2gen = utils.coros2batches if batch else utils.coros2gen
+    return coros2gen(common._file_chunks(file, buf_size),
+        *_items_multi_pipeline(prefixes, map_type, kwargs)
+    )
+
+def items_multi_async(file, prefixes, map_type=None, **kwargs):
+    from ijson import utils35
+    buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
+    return utils35.async_iterable(file, buf_size,
+        *_items_multi_pipeline(prefixes, map_type, kwargs), batch=batch
+    )
+
+
+@utils.coroutine
+def arrays_basecoro(target, prefix, typecode='d', chunk_size=None, **kwargs):
+    return _yajl2.arrays_basecoro(target.send, _get_pattern(prefix), typecode, chunk_size,
+                                  **kwargs)
+
+def _arrays_basecoro(target, prefix, typecode, chunk_size):
+    return _yajl2.arrays_basecoro(target.send, prefix, typecode, chunk_size)
+
+def _arrays_pipeline(prefix, dtype, chunk_size, config):
+    typecode, convert, config = common._arrays_options(dtype, chunk_size, config)
+    pipeline = (
+        (_arrays_basecoro, (_get_prefix(prefix), typecode, chunk_size), {}),
+        (_yajl2.parse_basecoro, (False,), {}),
+        (_yajl2.basic_parse_basecoro, [], config)
+    )
+    if convert:
+        pipeline = ((common._converted_basecoro, (convert,), {}),) + pipeline
+    return pipeline
+
+def arrays_coro(target, prefix, dtype='d', chunk_size=None, **config):
+    return utils.chain(target,
+        *_arrays_pipeline(prefix, dtype, chunk_size, config)
+    )
+
+def arrays_gen(file, prefix, dtype='d', chunk_size=None, **kwargs):
+    buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
+    coros2gen = utils.coros2batches if batch else utils.coros2gen
+    return coros2gen(common._file_chunks(file, buf_size),
+        *_arrays_pipeline(prefix, dtype, chunk_size, kwargs)
+    )
+
+def arrays_async(file, prefix, dtype='d', chunk_size=None, **kwargs):
+    from ijson import utils35
+    buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
+    return utils35.async_iterable(file, buf_size,
+        *_arrays_pipeline(prefix, dtype, chunk_size, kwargs), batch=batch
+    )
+
+@utils.coroutine
+def columns_basecoro(target, prefix, fields, chunk_size=None, map_type=None, masks=False):
+    return _yajl2.columns_basecoro(target.send, _get_pattern(prefix), fields, chunk_size,
+                                   map_type, masks)
+
+def _columns_basecoro(target, prefix, fields, chunk_size, map_type, masks):
+    return _yajl2.columns_basecoro(target.send, prefix, fields, chunk_size, map_type, masks)
+
+def _columns_pipeline(prefix, fields, chunk_size, map_type, config):
+    typecodes, masks, convert, config = common._columns_options(fields, chunk_size, config)
+    pipeline = (
+        (_columns_basecoro, (_get_prefix(prefix), typecodes, chunk_size, map_type, masks), {}),
+        (_yajl2.parse_basecoro, (False,), {}),
+        (_yajl2.basic_parse_basecoro, [], config)
+    )
+    if convert:
+        pipeline = ((common._converted_basecoro, (convert,), {}),) + pipeline
+    return pipeline
+
+def columns_coro(target, prefix, fields, chunk_size=None, map_type=None, **config):
+    return utils.chain(target,
+        *_columns_pipeline(prefix, fields, chunk_size, map_type, config)
+    )
+
+def columns_gen(file, prefix, fields, chunk_size=None, map_type=None, **kwargs):
+    buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
+    coros2gen = utils.coros2batches if batch else utils.coros2gen
+    return coros2gen(common._file_chunks(file, buf_size),
+        *_columns_pipeline(prefix, fields, chunk_size, map_type, kwargs)
+    )
+
+def columns_async(file, prefix, fields, chunk_size=None, map_type=None, **kwargs):
+    from ijson import utils35
+    buf_size = _get_buf_size(kwargs)
+    batch = _get_batch(kwargs)
+    return utils35.async_iterable(file, buf_size,
+        *_columns_pipeline(prefix, fields, chunk_size, map_type, kwargs), batch=batch
+    )
+
+def writer_coro(fileobj, buf_size=64*1024):
+    return _yajl2.writer_coro(fileobj.write, buf_size)
 
 common.enrich_backend(globals())
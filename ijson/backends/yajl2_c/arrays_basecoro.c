@@ -0,0 +1,199 @@
+/*
+ * arrays_basecoro coroutine implementation for ijson's C backend
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#include "common.h"
+#include "arrays_basecoro.h"
+
+/*
+ * __init__, destructor, __iter__ and __next__
+ */
+static int arrays_basecoro_init(ArraysBasecoro *self, PyObject *args, PyObject *kwargs)
+{
+	self->target_send = NULL;
+	self->prefix = NULL;
+	self->array_type = NULL;
+	self->active = 0;
+	typed_buffer_create(&self->buffer);
+	prefix_matcher_create(&self->matcher);
+
+	char *typecode = "d";
+	PyObject *chunk_size = Py_None;
+	M1_Z(PyArg_ParseTuple(args, "OO|sO", &(self->target_send), &(self->prefix),
+	                      &typecode, &chunk_size));
+	Py_INCREF(self->target_send);
+	Py_INCREF(self->prefix);
+	if (prefix_matcher_is_pattern(self->prefix)) {
+		M1_M1(prefix_matcher_init(&self->matcher, self->prefix));
+	}
+
+	self->chunk_size = 0;
+	if (chunk_size != Py_None) {
+		self->chunk_size = PyNumber_AsSsize_t(chunk_size, PyExc_OverflowError);
+		if (self->chunk_size == -1 && PyErr_Occurred()) {
+			return -1;
+		}
+		if (self->chunk_size < 1) {
+			PyErr_SetString(PyExc_ValueError, "chunk_size must be a positive number");
+			return -1;
+		}
+	}
+	M1_M1(typed_buffer_init(&self->buffer, typecode, self->chunk_size));
+
+	PyObject *array_module;
+	M1_N(array_module = PyImport_ImportModule("array"));
+	self->array_type = PyObject_GetAttrString(array_module, "array");
+	Py_DECREF(array_module);
+	M1_N(self->array_type);
+	return 0;
+}
+
+static void arrays_basecoro_dealloc(ArraysBasecoro *self)
+{
+	Py_XDECREF(self->array_type);
+	Py_XDECREF(self->prefix);
+	Py_XDECREF(self->target_send);
+	typed_buffer_destroy(&self->buffer);
+	prefix_matcher_destroy(&self->matcher);
+	Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+/*
+ * Sends the collected numbers to the target as an array.array object
+ */
+static PyObject *arrays_basecoro_dispatch(ArraysBasecoro *coro)
+{
+	PyObject *array;
+	N_N(array = typed_buffer_to_array(&coro->buffer, coro->array_type));
+	CORO_SEND(coro->target_send, array);
+	Py_DECREF(array);
+	Py_RETURN_NONE;
+}
+
+/*
+ * Dispatches the numbers collected so far if they make up a full chunk.
+ * Returns -1 in case of error.
+ */
+static int arrays_basecoro_check_chunk(ArraysBasecoro *coro)
+{
+	if (coro->buffer.length == coro->chunk_size) {
+		PyObject *res;
+		M1_N(res = arrays_basecoro_dispatch(coro));
+		Py_DECREF(res);
+	}
+	return 0;
+}
+
+static PyObject *arrays_basecoro_not_numbers(PyObject *event)
+{
+	PyObject *msg;
+	N_N(msg = PyUnicode_FromFormat("Expected an array of numbers, found a %U event", event));
+	PyErr_SetObject(PyExc_ValueError, msg);
+	Py_DECREF(msg);
+	return NULL;
+}
+
+int arrays_basecoro_number(PyObject *self, const char *numberVal, size_t numberLen)
+{
+	ArraysBasecoro *coro = (ArraysBasecoro *)self;
+	if (!coro->active) {
+		return 0;
+	}
+	int stored = typed_buffer_store_number(&coro->buffer, numberVal, numberLen);
+	if (stored == 1) {
+		M1_M1(arrays_basecoro_check_chunk(coro));
+	}
+	return stored;
+}
+
+PyObject* arrays_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *event, PyObject *value)
+{
+	ArraysBasecoro *coro = (ArraysBasecoro *)self;
+
+	Py_ssize_t state = 0;
+	if (prefix_matcher_isactive(&coro->matcher) && PyList_Check(path)) {
+		N_M1(state = prefix_matcher_event(&coro->matcher, event, value));
+	}
+
+	if (coro->active) {
+		if (event == enames.number_ename) {
+			N_M1(typed_buffer_store(&coro->buffer, value));
+			N_M1(arrays_basecoro_check_chunk(coro));
+		}
+		else if (event == enames.end_array_ename) {
+			coro->active = 0;
+			if (coro->buffer.length || !coro->chunk_size) {
+				return arrays_basecoro_dispatch(coro);
+			}
+		}
+		else {
+			return arrays_basecoro_not_numbers(event);
+		}
+		Py_RETURN_NONE;
+	}
+
+	int cmp;
+	if (prefix_matcher_isactive(&coro->matcher)) {
+		cmp = prefix_matcher_matches(&coro->matcher, state, path);
+	}
+	else {
+		cmp = PyObject_RichCompareBool(path, coro->prefix, Py_EQ);
+	}
+	N_M1(cmp);
+	if (cmp) {
+		if (event != enames.start_array_ename) {
+			return arrays_basecoro_not_numbers(event);
+		}
+		coro->active = 1;
+	}
+	Py_RETURN_NONE;
+}
+
+int arrays_basecoro_prunable(PyObject *self, PyObject *path)
+{
+	ArraysBasecoro *coro = (ArraysBasecoro *)self;
+	if (coro->active) {
+		return 0;
+	}
+	if (prefix_matcher_isactive(&coro->matcher)) {
+		return prefix_matcher_isdead(&coro->matcher);
+	}
+	return prefix_diverges(path, coro->prefix);
+}
+
+static PyObject* arrays_basecoro_send(PyObject *self, PyObject *tuple)
+{
+	PyObject *path  = PyTuple_GetItem(tuple, 0);
+	PyObject *event = PyTuple_GetItem(tuple, 1);
+	PyObject *value = PyTuple_GetItem(tuple, 2);
+	return arrays_basecoro_send_impl(self, path, event, value);
+}
+
+static PyMethodDef arrays_basecoro_methods[] = {
+	{"send", arrays_basecoro_send, METH_O, "coroutine's send method"},
+	{NULL, NULL, 0, NULL}
+};
+
+/*
+ * arrays_basecoro coroutine object type
+ */
+PyTypeObject ArraysBasecoro_Type = {
+#if PY_MAJOR_VERSION >= 3
+	PyVarObject_HEAD_INIT(NULL, 0)
+#else
+	PyObject_HEAD_INIT(NULL)
+#endif
+	.tp_basicsize = sizeof(ArraysBasecoro),
+	.tp_name = "_yajl2.arrays_basecoro",
+	.tp_doc = "Coroutine dispatching typed arrays with the numbers of the arrays under the given prefix",
+	.tp_init = (initproc)arrays_basecoro_init,
+	.tp_dealloc = (destructor)arrays_basecoro_dealloc,
+	.tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_ITER,
+	.tp_iter = ijson_return_self,
+	.tp_iternext = ijson_return_none,
+	.tp_methods = arrays_basecoro_methods
+};
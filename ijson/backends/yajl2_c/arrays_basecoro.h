@@ -0,0 +1,78 @@
+/*
+ * arrays_basecoro coroutine for ijson's C backend
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#ifndef ARRAYS_BASECORO_H
+#define ARRAYS_BASECORO_H
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "prefix_matcher.h"
+#include "typed_buffer.h"
+
+/**
+ * arrays_basecoro coroutine object structure
+ *
+ * The numbers of the array being collected are stored in `buffer` as C values,
+ * and only turned into an array.array object when they are dispatched.
+ */
+typedef struct {
+    PyObject_HEAD
+    prefix_matcher_t matcher;
+    PyObject *target_send;
+    PyObject *prefix;
+    PyObject *array_type;
+    typed_buffer_t buffer;
+    Py_ssize_t chunk_size;
+    int active;
+} ArraysBasecoro;
+
+/**
+ * arrays_basecoro coroutine object type
+ */
+extern PyTypeObject ArraysBasecoro_Type;
+
+/**
+ * Utility function to check if an object is an arrays_basecoro coroutine or not
+ */
+#define ArraysBasecoro_Check(o) (Py_TYPE(o) == &ArraysBasecoro_Type)
+
+/**
+ * The implementation of the arrays_basecoro.send() method accepting an
+ * unpacked event
+ * @param self An arrays_basecoro coroutine
+ * @param path The path of this event
+ * @param event The event name
+ * @param value The value of this event
+ * @return None, or NULL in case of an error
+ */
+PyObject* arrays_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *event, PyObject *value);
+
+/**
+ * Stores a number straight out of its text if an array is being collected,
+ * skipping the creation of a Python object for it. Only the numbers that can
+ * be converted and stored without loss or errors are taken; the rest must be
+ * given as a normal number event.
+ * @param self An arrays_basecoro coroutine
+ * @param numberVal The text of the number, as given by yajl
+ * @param numberLen The length of numberVal
+ * @return 1 if the number was stored, 0 if not, -1 in case of an error
+ */
+int arrays_basecoro_number(PyObject *self, const char *numberVal, size_t numberLen);
+
+/**
+ * Returns whether the value starting at the given path can be skipped
+ * altogether because it can't contain any of the arrays this coroutine
+ * collects
+ * @param self An arrays_basecoro coroutine
+ * @param path The path of the value, as a list of components
+ * @return 1 if the value can be skipped, 0 if not, -1 in case of an error
+ */
+int arrays_basecoro_prunable(PyObject *self, PyObject *path);
+
+#endif /* ARRAYS_BASECORO_H */
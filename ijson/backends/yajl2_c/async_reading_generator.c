@@ -26,8 +26,9 @@ static int async_reading_generator_init(async_reading_generator *self, PyObject
 	self->events = NULL;
 	self->index = 0;
 	self->file_exhausted = 0;
+	self->batch = 0;
 
-	M1_Z(PyArg_ParseTuple(args, "OO", &self->file, &self->buf_size));
+	M1_Z(PyArg_ParseTuple(args, "OO|i", &self->file, &self->buf_size, &self->batch));
 	M1_Z(PyNumber_Check(self->buf_size));
 
 	Py_INCREF(self->file);
@@ -36,11 +37,12 @@ static int async_reading_generator_init(async_reading_generator *self, PyObject
 	return 0;
 }
 
-void async_reading_generator_add_coro(async_reading_generator *self, pipeline_node *coro_pipeline)
+int async_reading_generator_add_coro(async_reading_generator *self, pipeline_node *coro_pipeline)
 {
-	self->coro = chain(self->events, coro_pipeline);
+	M1_N(self->coro = chain(self->events, coro_pipeline));
 	assert(("async_reading_generator works only with basic_parse_basecoro",
 		        BasicParseBasecoro_Check(self->coro)));
+	return 0;
 }
 
 static void async_reading_generator_dealloc(async_reading_generator *self)
@@ -54,24 +56,48 @@ static void async_reading_generator_dealloc(async_reading_generator *self)
 	Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
-static PyObject *maybe_pop_event(async_reading_generator *self)
+/*
+ * Pops the next event (or, in batch mode, all of them), setting it as the
+ * value of a StopIteration error. Returns 1 if an event was popped, 0 if
+ * there are none, and -1 in case of an error.
+ */
+static int maybe_pop_event(async_reading_generator *self)
 {
 	PyObject *events = self->events;
 	Py_ssize_t nevents = PyList_Size(events);
 	if (nevents == 0) {
-		return NULL;
+		return 0;
+	}
+	if (self->batch) {
+		// All the events so far, as a list
+		PyObject *batch = PyList_GetSlice(events, 0, nevents);
+		M1_N(batch);
+		PyObject *res = NULL;
+		if (PySequence_DelSlice(events, 0, nevents) == -1 ||
+		    !(res = PyTuple_Pack(2, batch, Py_None))) {
+			Py_DECREF(batch);
+			return -1;
+		}
+		Py_DECREF(batch);
+		PyErr_SetObject(PyExc_StopIteration, res);
+		Py_DECREF(res);
+		return 1;
 	}
 	PyObject *event = PyList_GET_ITEM(events, self->index++);
 	PyObject *res = PyTuple_New(2);
+	M1_N(res);
 	Py_INCREF(event);
 	PyTuple_SET_ITEM(res, 0, event);
-	PyErr_SetObject(PyExc_StopIteration, res);
-	Py_DECREF(res);
 	if (self->index == nevents) {
-		PySequence_DelSlice(events, 0, self->index);
 		self->index = 0;
+		if (PySequence_DelSlice(events, 0, nevents) == -1) {
+			Py_DECREF(res);
+			return -1;
+		}
 	}
-	return event;
+	PyErr_SetObject(PyExc_StopIteration, res);
+	Py_DECREF(res);
+	return 1;
 }
 
 static int is_gen_coroutine(PyObject *o)
@@ -88,7 +114,9 @@ static PyObject *async_reading_generator_next(PyObject *self)
 	async_reading_generator *gen = (async_reading_generator *)self;
 
 	// values are returned via StopIteration exception values
-	if (maybe_pop_event(gen)) {
+	int popped = maybe_pop_event(gen);
+	N_M1(popped);
+	if (popped) {
 		return NULL;
 	}
 	// No events available and nothing else to read, we are done
@@ -157,16 +185,16 @@ static PyObject *async_reading_generator_next(PyObject *self)
 	Py_buffer view;
 	N_M1(PyObject_GetBuffer(buffer, &view, PyBUF_SIMPLE));
 	gen->file_exhausted = (view.len == 0);
-	BasicParseBasecoro *basic_parse_basecoro = (BasicParseBasecoro *)gen->coro;
-	PyObject *res = ijson_yajl_parse(basic_parse_basecoro->h, view.buf, view.len);
-	N_N(res);
-	Py_DECREF(res);
-
+	PyObject *res = basic_parse_basecoro_parse(gen->coro, view.buf, view.len, 0);
 	PyBuffer_Release(&view);
 	Py_DECREF(buffer);
+	N_N(res);
+	Py_DECREF(res);
 
 	// values are returned via StopIteration exception values
-	if (maybe_pop_event(gen)) {
+	popped = maybe_pop_event(gen);
+	N_M1(popped);
+	if (popped) {
 		return NULL;
 	}
 
@@ -31,9 +31,10 @@ typedef struct {
 	PyObject *events;
 	Py_ssize_t index;
 	int file_exhausted;
+	int batch;
 } async_reading_generator;
 
-void async_reading_generator_add_coro(async_reading_generator *self, pipeline_node *coro_pipeline);
+int async_reading_generator_add_coro(async_reading_generator *self, pipeline_node *coro_pipeline);
 
 extern PyTypeObject AsyncReadingGeneratorType;
 #endif // PY_VERSION_HEX >= 0x03050000
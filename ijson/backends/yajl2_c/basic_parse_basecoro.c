@@ -10,8 +10,11 @@
 
 #include <assert.h>
 
+#include "arrays_basecoro.h"
+#include "columns_basecoro.h"
 #include "basic_parse_basecoro.h"
 #include "common.h"
+#include "items_basecoro.h"
 #include "parse_basecoro.h"
 
 
@@ -20,7 +23,7 @@
  */
 static inline
 int add_event_and_value(void *ctx, PyObject *evt_name, PyObject *val) {
-	PyObject *target_send = (PyObject *)ctx;
+	PyObject *target_send = ((BasicParseBasecoro *)ctx)->target_send;
 	if (ParseBasecoro_Check(target_send)) {
 		Z_N(parse_basecoro_send_impl(target_send, evt_name, val));
 		Py_DECREF(val);
@@ -36,117 +39,414 @@ int add_event_and_value(void *ctx, PyObject *evt_name, PyObject *val) {
 	return 1;
 }
 
+/*
+ * Raw values: the values matched by an items_basecoro coroutine in raw mode
+ * are skipped like pruned ones (see below), and their text is sent to it
+ * instead. During callbacks yajl reports the chunk as consumed up to the end
+ * of the current token, so the text of a container goes from its opening
+ * bracket to the end of its closing one. Scalars can start in a previous
+ * chunk though, so their text is taken from the end of the previous token,
+ * minus any separators.
+ */
+static inline
+const char *raw_position(BasicParseBasecoro *coro)
+{
+	size_t consumed = yajl_get_bytes_consumed(coro->h);
+	return coro->chunk + Py_MIN(consumed, coro->chunk_len);
+}
+
+static int raw_keep(BasicParseBasecoro *coro, const char *text, size_t length)
+{
+	size_t needed = coro->raw_len + length;
+	if (needed > coro->raw_size) {
+		size_t size = Py_MAX(needed, coro->raw_size * 2);
+		char *raw_text = (char *)PyMem_Realloc(coro->raw_text, size);
+		if (!raw_text) {
+			PyErr_NoMemory();
+			return -1;
+		}
+		coro->raw_text = raw_text;
+		coro->raw_size = size;
+	}
+	memcpy(coro->raw_text + coro->raw_len, text, length);
+	coro->raw_len = needed;
+	return 0;
+}
+
+/* Skips the whitespace, commas, colons and comments before a value */
+static const char *raw_skip_separators(const char *text, const char *end)
+{
+	while (text != end) {
+		char c = *text;
+		if (c == ' ' || c == '\t' || c == '\n' || c == '\r' || c == '\f' || c == '\v' ||
+		    c == ',' || c == ':') {
+			text++;
+		}
+		else if (c == '/' && end - text > 1 && text[1] == '*') {
+			const char *close = text + 2;
+			while (end - close > 1 && (close[0] != '*' || close[1] != '/')) {
+				close++;
+			}
+			text = end - close > 1 ? close + 2 : end;
+		}
+		else if (c == '/' && end - text > 1 && text[1] == '/') {
+			for (text += 2; text != end && *text != '\n'; text++);
+		}
+		else {
+			break;
+		}
+	}
+	return text;
+}
+
+/* Sends the text of a raw value, which goes from raw_mark to end */
+static int raw_send(BasicParseBasecoro *coro, const char *end, int separators)
+{
+	const char *text = coro->raw_mark;
+	size_t length = end - text;
+	if (coro->raw_len) {
+		M1_M1(raw_keep(coro, text, length));
+		text = coro->raw_text;
+		length = coro->raw_len;
+		coro->raw_len = 0;
+	}
+	if (separators) {
+		const char *start = raw_skip_separators(text, text + length);
+		length -= start - text;
+		text = start;
+	}
+	return items_basecoro_send_raw(coro->raw_coro, text, length);
+}
+
+static int raw_scalar(BasicParseBasecoro *coro)
+{
+	M1_M1(raw_send(coro, raw_position(coro), 1));
+	return 1;
+}
+
+static int raw_container_start(BasicParseBasecoro *coro)
+{
+	// The opening bracket is the only character of its token
+	coro->raw_mark = raw_position(coro) - 1;
+	coro->raw_len = 0;
+	coro->raw_capturing = 1;
+	return 1;
+}
+
+static int raw_container_end(BasicParseBasecoro *coro)
+{
+	coro->raw_capturing = 0;
+	M1_M1(raw_send(coro, raw_position(coro), 0));
+	return 1;
+}
+
+/*
+ * Subtree pruning: when the target is an items-like pipeline and it reports
+ * that a new value can't contain anything of interest, the value is skipped
+ * altogether. Only the depth of skipped containers is tracked, and no Python
+ * objects (or events) are created for anything inside them.
+ */
+static inline
+int prune_value(BasicParseBasecoro *coro, int container)
+{
+	if (!coro->prune) {
+		return 0;
+	}
+	int skip = parse_basecoro_prunable(coro->target_send);
+	if (skip == ITEMS_RAW_VALUE) {
+		return container ? raw_container_start(coro) : raw_scalar(coro);
+	}
+	return skip;
+}
+
+static inline
+int skip_value(void *ctx) {
+	BasicParseBasecoro *coro = (BasicParseBasecoro *)ctx;
+	if (coro->skip_depth) {
+		return 1;
+	}
+	return prune_value(coro, 0);
+}
+
+static inline
+int skip_container_start(void *ctx) {
+	BasicParseBasecoro *coro = (BasicParseBasecoro *)ctx;
+	int skip = coro->skip_depth ? 1 : prune_value(coro, 1);
+	coro->skip_depth += (skip == 1);
+	return skip;
+}
+
+static inline
+int skip_container_end(void *ctx) {
+	BasicParseBasecoro *coro = (BasicParseBasecoro *)ctx;
+	if (coro->skip_depth) {
+		coro->skip_depth--;
+		if (!coro->skip_depth && coro->raw_capturing) {
+			return raw_container_end(coro);
+		}
+		return 1;
+	}
+	return 0;
+}
+
+#define SKIP_IF(stmt) \
+	{ \
+		int skip = (stmt); \
+		Z_M1(skip); \
+		if (skip) { \
+			return 1; \
+		} \
+	}
+
 static int null(void * ctx) {
+	SKIP_IF(skip_value(ctx));
 	Py_INCREF(Py_None);
 	return add_event_and_value(ctx, enames.null_ename, Py_None);
 }
 
 static int boolean(void * ctx, int val) {
+	SKIP_IF(skip_value(ctx));
 	PyObject *bval = val == 0 ? Py_False : Py_True;
 	Py_INCREF(bval);
 	return add_event_and_value(ctx, enames.boolean_ename, bval);
 }
 
-static int yajl_integer(void *ctx, long long val)
+/* Integers with up to this many digits always fit in a long long */
+#define FAST_INTEGER_MAX_DIGITS 18
+/* Numbers up to this long are copied into a buffer on the stack */
+#define NUMBER_BUFFER_SIZE 64
+
+static PyObject *integer_from_number(const char *numberVal, size_t numberLen)
 {
-	PyObject *ival;
-#if PY_MAJOR_VERSION < 3
-	if (val <= 0xFFFFFFFF) {
-		Z_N(ival = PyInt_FromLong((long)val));
+	const char *digits = numberVal, *end = numberVal + numberLen;
+	int negative = (*digits == '-');
+	if (negative) {
+		digits++;
 	}
-	else
+
+	// Most integers are parsed right here, with no copies
+	if (end - digits <= FAST_INTEGER_MAX_DIGITS) {
+		long long val = 0;
+		for (; digits != end; digits++) {
+			val = val * 10 + (*digits - '0');
+		}
+		if (negative) {
+			val = -val;
+		}
+#if PY_MAJOR_VERSION < 3
+		if (val >= LONG_MIN && val <= LONG_MAX) {
+			return PyInt_FromLong((long)val);
+		}
 #endif
-	{
-		Z_N(ival = PyLong_FromLongLong(val))
+		return PyLong_FromLongLong(val);
+	}
+
+	// PyLong_FromString needs a null-terminated string
+	PyObject *val;
+	char *nval = (char *)PyMem_Malloc(numberLen + 1);
+	if (!nval) {
+		return PyErr_NoMemory();
 	}
-	return add_event_and_value(ctx, enames.number_ename, ival);
+	memcpy(nval, numberVal, numberLen);
+	nval[numberLen] = 0;
+	val = PyLong_FromString(nval, NULL, 10);
+	PyMem_Free(nval);
+	return val;
 }
 
-static int yajl_double(void *ctx, double val)
+static PyObject *float_from_number(const char *numberVal, size_t numberLen)
 {
-	PyObject *dval;
-	Z_N(dval = PyFloat_FromDouble(val))
-	return add_event_and_value(ctx, enames.number_ename, dval);
+	// PyOS_string_to_double needs a null-terminated string
+	char buffer[NUMBER_BUFFER_SIZE];
+	char *nval = buffer;
+	if (numberLen >= NUMBER_BUFFER_SIZE) {
+		nval = (char *)PyMem_Malloc(numberLen + 1);
+		if (!nval) {
+			return PyErr_NoMemory();
+		}
+	}
+	memcpy(nval, numberVal, numberLen);
+	nval[numberLen] = 0;
+
+	PyObject *val = NULL;
+	double dval = PyOS_string_to_double(nval, NULL, NULL);
+	if (Py_IS_INFINITY(dval)) {
+		PyErr_Format(JSONError, "float overflow: %s", nval);
+	}
+	else if (dval != -1.0 || !PyErr_Occurred()) {
+		val = PyFloat_FromDouble(dval);
+	}
+	if (nval != buffer) {
+		PyMem_Free(nval);
+	}
+	return val;
+}
+
+static PyObject *decimal_from_number(const char *numberVal, size_t numberLen)
+{
+	PyObject *str, *val;
+	N_N(str = STRING_FROM_UTF8(numberVal, numberLen));
+	val = PyObject_CallFunctionObjArgs(Decimal, str, NULL);
+	Py_DECREF(str);
+	return val;
+}
+
+static PyObject *raw_from_number(const char *numberVal, size_t numberLen)
+{
+#if PY_MAJOR_VERSION >= 3
+	return PyBytes_FromStringAndSize(numberVal, numberLen);
+#else
+	return PyString_FromStringAndSize(numberVal, numberLen);
+#endif
 }
 
 static int number(void * ctx, const char *numberVal, size_t numberLen) {
 
-	// If original string has a dot or an "e/E" we return a Decimal
+	// The numbers of arrays collected by an arrays_basecoro coroutine, and of
+	// typed columns collected by a columns_basecoro one, are stored directly,
+	// with no Python objects in between. Such values are never skipped.
+	BasicParseBasecoro *coro = (BasicParseBasecoro *)ctx;
+	if (coro->numbers_coro) {
+		SKIP_IF(coro->store_number(coro->numbers_coro, numberVal, numberLen));
+	}
+
+	SKIP_IF(skip_value(ctx));
+
+	PyObject *val;
+	if (coro->number_type == NUMBER_TYPE_STR) {
+		Z_N(val = STRING_FROM_UTF8(numberVal, numberLen));
+		return add_event_and_value(ctx, enames.number_ename, val);
+	}
+	else if (coro->number_type == NUMBER_TYPE_RAW) {
+		Z_N(val = raw_from_number(numberVal, numberLen));
+		return add_event_and_value(ctx, enames.number_ename, val);
+	}
+
+	// If original string has a dot or an "e/E" we return a Decimal or a float
 	// just like in the common module
-	int is_decimal = 0;
+	int is_integer = 1;
 	const char *iter = numberVal;
 	size_t i;
 	for(i=0; i!=numberLen; i++) {
 		char c = *iter++;
 		if( c == '.' || c == 'e' || c == 'E' ) {
-			is_decimal = 1;
+			is_integer = 0;
 			break;
 		}
 	}
 
-	PyObject *val;
-	if( !is_decimal ) {
-		char *nval = (char *)malloc(numberLen + 1);
-		memcpy(nval, numberVal, numberLen);
-		nval[numberLen] = 0;
-		char *endptr;
-#if PY_MAJOR_VERSION >= 3
-		val = PyLong_FromString(nval, &endptr, 10);
-#else
-		// returns either PyLong or PyInt
-		val = PyInt_FromString(nval, &endptr, 10);
-#endif
-		free(nval);
-		assert(("string provided by yajl is not an integer",
-		        val != NULL && endptr != nval));
+	if (is_integer) {
+		Z_N(val = integer_from_number(numberVal, numberLen));
+	}
+	else if (coro->number_type == NUMBER_TYPE_FLOAT) {
+		Z_N(val = float_from_number(numberVal, numberLen));
 	}
 	else {
-		Z_N(val = PyObject_CallFunction(Decimal, "s#", numberVal, numberLen));
+		// Decimals are immutable, so repeated numbers can share them
+		Z_N(val = string_cache_get_or_create(&coro->decimals, numberVal, numberLen,
+		                                     decimal_from_number));
 	}
 
 	return add_event_and_value(ctx, enames.number_ename, val);
 }
 
 static int string_cb(void * ctx, const unsigned char *stringVal, size_t stringLen) {
+	SKIP_IF(skip_value(ctx));
 	PyObject *val;
-	Z_N(val = PyUnicode_FromStringAndSize((char *)stringVal, stringLen))
+	Z_N(val = string_cache_get(&((BasicParseBasecoro *)ctx)->strings, stringVal, stringLen))
 	return add_event_and_value(ctx, enames.string_ename, val);
 }
 
 static int start_map(void *ctx) {
+	SKIP_IF(skip_container_start(ctx));
 	Py_INCREF(Py_None);
 	return add_event_and_value(ctx, enames.start_map_ename, Py_None);
 }
 
 static int map_key(void *ctx, const unsigned char *key, size_t stringLen) {
+	SKIP_IF(((BasicParseBasecoro *)ctx)->skip_depth != 0);
 	PyObject *val;
-	Z_N(val = STRING_FROM_UTF8(key, stringLen))
+	Z_N(val = string_cache_get(&((BasicParseBasecoro *)ctx)->keys, key, stringLen))
 	return add_event_and_value(ctx, enames.map_key_ename, val);
 }
 
 static int end_map(void *ctx) {
+	SKIP_IF(skip_container_end(ctx));
 	Py_INCREF(Py_None);
 	return add_event_and_value(ctx, enames.end_map_ename, Py_None);
 }
 
 static int start_array(void *ctx) {
+	SKIP_IF(skip_container_start(ctx));
 	Py_INCREF(Py_None);
 	return add_event_and_value(ctx, enames.start_array_ename, Py_None);
 }
 
 static int end_array(void *ctx) {
+	SKIP_IF(skip_container_end(ctx));
 	Py_INCREF(Py_None);
 	return add_event_and_value(ctx, enames.end_array_ename, Py_None);
 }
 
-static yajl_callbacks decimal_callbacks = {
+static yajl_callbacks callbacks = {
 	null, boolean, NULL, NULL, number, string_cb,
 	start_map, map_key, end_map, start_array, end_array
 };
 
-static yajl_callbacks float_callbacks = {
-	null, boolean, yajl_integer, yajl_double, NULL, string_cb,
-	start_map, map_key, end_map, start_array, end_array
+/*
+ * The callbacks used when taking raw values, which also mark the end of each
+ * token as the start of the text of the next value, unless a value is being
+ * captured already
+ */
+static inline
+int raw_token(void *ctx, int res) {
+	BasicParseBasecoro *coro = (BasicParseBasecoro *)ctx;
+	if (!coro->raw_capturing) {
+		coro->raw_mark = raw_position(coro);
+		coro->raw_len = 0;
+	}
+	return res;
+}
+
+static int raw_null(void *ctx) {
+	return raw_token(ctx, null(ctx));
+}
+
+static int raw_boolean(void *ctx, int val) {
+	return raw_token(ctx, boolean(ctx, val));
+}
+
+static int raw_number(void *ctx, const char *numberVal, size_t numberLen) {
+	return raw_token(ctx, number(ctx, numberVal, numberLen));
+}
+
+static int raw_string(void *ctx, const unsigned char *stringVal, size_t stringLen) {
+	return raw_token(ctx, string_cb(ctx, stringVal, stringLen));
+}
+
+static int raw_start_map(void *ctx) {
+	return raw_token(ctx, start_map(ctx));
+}
+
+static int raw_map_key(void *ctx, const unsigned char *key, size_t stringLen) {
+	return raw_token(ctx, map_key(ctx, key, stringLen));
+}
+
+static int raw_end_map(void *ctx) {
+	return raw_token(ctx, end_map(ctx));
+}
+
+static int raw_start_array(void *ctx) {
+	return raw_token(ctx, start_array(ctx));
+}
+
+static int raw_end_array(void *ctx) {
+	return raw_token(ctx, end_array(ctx));
+}
+
+static yajl_callbacks raw_callbacks = {
+	raw_null, raw_boolean, NULL, NULL, raw_number, raw_string,
+	raw_start_map, raw_map_key, raw_end_map, raw_start_array, raw_end_array
 };
 
 
@@ -187,41 +487,132 @@ PyObject* ijson_yajl_parse(yajl_handle handle, char *buffer, size_t length)
 	Py_RETURN_NONE;
 }
 
+PyObject* basic_parse_basecoro_parse(PyObject *self, char *buffer, size_t length, int in_place)
+{
+	BasicParseBasecoro *coro = (BasicParseBasecoro *)self;
+	if (!coro->raw_coro) {
+		return ijson_yajl_parse(coro->h, buffer, length);
+	}
+
+	coro->chunk = buffer ? buffer : "";
+	coro->chunk_len = length;
+	if (!coro->raw_mark) {
+		coro->raw_mark = coro->chunk;
+	}
+	PyObject *res;
+	N_N(res = ijson_yajl_parse(coro->h, buffer, length));
+
+	// The rest of the chunk is part of the value being captured, or could be
+	// part of the next one, unless in the middle of a pruned container
+	if (coro->skip_depth && !coro->raw_capturing) {
+		coro->raw_mark = NULL;
+		coro->raw_len = 0;
+	}
+	else if (!in_place) {
+		if (raw_keep(coro, coro->raw_mark, coro->chunk + length - coro->raw_mark) == -1) {
+			Py_DECREF(res);
+			return NULL;
+		}
+		coro->raw_mark = NULL;
+	}
+	return res;
+}
+
 
 /*
  * __init__, destructor, __iter__ and __next__
  */
 static int basic_parse_basecoro_init(BasicParseBasecoro *self, PyObject *args, PyObject *kwargs)
 {
+	PyObject *target_send;
 	PyObject *allow_comments = Py_False;
 	PyObject *multiple_values = Py_False;
 	PyObject *use_float = Py_False;
+	PyObject *intern_strings = Py_False;
+	char *number_type = NULL;
 
 	self->h = NULL;
 	self->target_send = NULL;
+	self->prune = 0;
+	self->skip_depth = 0;
+	self->numbers_coro = NULL;
+	self->store_number = NULL;
+	self->raw_coro = NULL;
+	self->chunk = NULL;
+	self->chunk_len = 0;
+	self->raw_mark = NULL;
+	self->raw_capturing = 0;
+	self->raw_text = NULL;
+	self->raw_len = 0;
+	self->raw_size = 0;
+	string_cache_create(&self->keys);
+	string_cache_create(&self->strings);
+	string_cache_create(&self->decimals);
 
 	char *kwlist[] = {"target_send", "allow_comments", "multiple_values",
-	                  "use_float", NULL};
-	if( !PyArg_ParseTupleAndKeywords(args, kwargs, "O|OOO", kwlist,
-	                                 &self->target_send, &allow_comments,
-	                                 &multiple_values, &use_float) ) {
+	                  "use_float", "intern_strings", "number_type", NULL};
+	if( !PyArg_ParseTupleAndKeywords(args, kwargs, "O|OOOOz", kwlist,
+	                                 &target_send, &allow_comments,
+	                                 &multiple_values, &use_float,
+	                                 &intern_strings, &number_type) ) {
 		return -1;
 	}
-	Py_INCREF(self->target_send);
+	Py_INCREF(target_send);
+	self->target_send = target_send;
 
-	/*
-	 * Prepare yajl handle and configure it
-	 * The context given to yajl is the coroutine's target, so the callbacks
-	 * directly send values to the target
-	 */
-	yajl_callbacks *callbacks;
-	if (PyObject_IsTrue(use_float)) {
-		callbacks = &float_callbacks;
+	if (!number_type) {
+		self->number_type = PyObject_IsTrue(use_float) ? NUMBER_TYPE_FLOAT : NUMBER_TYPE_DECIMAL;
+	}
+	else if (!strcmp(number_type, "decimal")) {
+		self->number_type = NUMBER_TYPE_DECIMAL;
+	}
+	else if (!strcmp(number_type, "float")) {
+		self->number_type = NUMBER_TYPE_FLOAT;
+	}
+	else if (!strcmp(number_type, "str")) {
+		self->number_type = NUMBER_TYPE_STR;
+	}
+	else if (!strcmp(number_type, "raw")) {
+		self->number_type = NUMBER_TYPE_RAW;
 	}
 	else {
-		callbacks = &decimal_callbacks;
+		PyErr_Format(PyExc_ValueError,
+		             "Invalid number_type '%s', expected one of decimal, float, raw, str",
+		             number_type);
+		return -1;
+	}
+	if (self->number_type == NUMBER_TYPE_DECIMAL) {
+		M1_M1(string_cache_init(&self->decimals));
+	}
+
+	// Map keys are always shared, short string values only if requested
+	M1_M1(string_cache_init(&self->keys));
+	if (PyObject_IsTrue(intern_strings)) {
+		M1_M1(string_cache_init(&self->strings));
 	}
-	M1_N(self->h = yajl_alloc(callbacks, NULL, (void *)self->target_send));
+	self->prune = ParseBasecoro_Check(self->target_send) &&
+	              !((ParseBasecoro *)self->target_send)->join_path;
+	if (self->prune) {
+		PyObject *coro = ((ParseBasecoro *)self->target_send)->target_send;
+		if (ArraysBasecoro_Check(coro)) {
+			self->numbers_coro = coro;
+			self->store_number = arrays_basecoro_number;
+		}
+		else if (ColumnsBasecoro_Check(coro)) {
+			self->numbers_coro = coro;
+			self->store_number = columns_basecoro_number;
+		}
+		else if (ItemsBasecoro_Check(coro) && ((ItemsBasecoro *)coro)->raw) {
+			self->raw_coro = coro;
+		}
+	}
+
+	/*
+	 * Prepare yajl handle and configure it
+	 * The context given to yajl is the coroutine itself, so the callbacks
+	 * directly send values to its target
+	 */
+	M1_N(self->h = yajl_alloc(self->raw_coro ? &raw_callbacks : &callbacks, NULL, (void *)self));
 	if (PyObject_IsTrue(allow_comments)) {
 		yajl_config(self->h, yajl_allow_comments, 1);
 	}
@@ -237,6 +628,10 @@ static void basic_parse_basecoro_dealloc(BasicParseBasecoro *self)
 	if (self->h) {
 		yajl_free(self->h);
 	}
+	string_cache_destroy(&self->keys);
+	string_cache_destroy(&self->strings);
+	string_cache_destroy(&self->decimals);
+	PyMem_Free(self->raw_text);
 	Py_XDECREF(self->target_send);
 	Py_TYPE(self)->tp_free((PyObject*)self);
 }
@@ -248,8 +643,7 @@ static PyObject* basic_parse_basecoro_send(PyObject *self, PyObject *arg)
 
 	Py_buffer bufview;
 	N_M1(PyObject_GetBuffer(arg, &bufview, PyBUF_SIMPLE));
-	BasicParseBasecoro *gen = (BasicParseBasecoro *)self;
-	PyObject *ret = ijson_yajl_parse(gen->h, bufview.buf, bufview.len);
+	PyObject *ret = basic_parse_basecoro_parse(self, bufview.buf, bufview.len, 0);
 	if (ret != NULL && bufview.len == 0) {
 		// This was the last one, let's end now
 		PyErr_SetNone(PyExc_StopIteration);
@@ -261,9 +655,7 @@ static PyObject* basic_parse_basecoro_send(PyObject *self, PyObject *arg)
 
 static PyObject* basic_parse_basecoro_close(PyObject *self, PyObject *args)
 {
-	BasicParseBasecoro *gen = (BasicParseBasecoro *)self;
-	N_N(ijson_yajl_parse(gen->h, NULL, 0));
-	Py_RETURN_NONE;
+	return basic_parse_basecoro_parse(self, NULL, 0, 0);
 }
 
 static PyMethodDef basic_parse_basecoro_methods[] = {
@@ -16,14 +16,48 @@
 #include <yajl/yajl_common.h>
 #include <yajl/yajl_parse.h>
 
+#include "string_cache.h"
+
+
+/**
+ * The types of the values numbers are given to users as
+ */
+enum number_type {
+    NUMBER_TYPE_DECIMAL,
+    NUMBER_TYPE_FLOAT,
+    NUMBER_TYPE_STR,
+    NUMBER_TYPE_RAW
+};
 
 /**
  * basic_parse_basecoro coroutine object structure
+ *
+ * If the target is an items_basecoro coroutine in raw mode (`raw_coro`), the
+ * text of the values it matches is taken from the chunk being parsed (`chunk`
+ * and `chunk_len`). `raw_mark` is where the text of the value being captured
+ * starts (or, if none is, where the last token ends), and `raw_text` keeps the
+ * part of it found in previous chunks, if they were not parsed in place.
  */
 typedef struct {
     PyObject_HEAD
     yajl_handle h;
     PyObject *target_send;
+    int prune;
+    Py_ssize_t skip_depth;
+    string_cache_t keys;
+    string_cache_t strings;
+    enum number_type number_type;
+    string_cache_t decimals;
+    PyObject *numbers_coro;
+    int (*store_number)(PyObject *coro, const char *numberVal, size_t numberLen);
+    PyObject *raw_coro;
+    const char *chunk;
+    size_t chunk_len;
+    const char *raw_mark;
+    int raw_capturing;
+    char *raw_text;
+    size_t raw_len;
+    size_t raw_size;
 } BasicParseBasecoro;
 
 /**
@@ -41,4 +75,17 @@ extern PyTypeObject BasicParseBasecoro_Type;
  */
 PyObject* ijson_yajl_parse(yajl_handle handle, char *buffer, size_t length);
 
+/**
+ * Parses a chunk of data with the yajl handle of a basic_parse_basecoro
+ * coroutine, finishing the parsing if the chunk is empty.
+ * @param self A basic_parse_basecoro coroutine
+ * @param buffer The chunk of data
+ * @param length The length of the chunk
+ * @param in_place Whether the chunk comes right after the previous one in a
+ *  memory area that stays valid until parsing finishes (e.g., an mmap object),
+ *  so raw values spanning several chunks don't need to be copied
+ * @return None, or NULL in case of an error
+ */
+PyObject* basic_parse_basecoro_parse(PyObject *self, char *buffer, size_t length, int in_place);
+
 #endif // BASIC_PARSE_BASECORO_H
\ No newline at end of file
@@ -29,8 +29,28 @@ typedef struct _builder {
 	PyObject *key;
 	PyObject *value_stack;
 	PyObject *map_type;
+	PyObject *projection;
+	PyObject *node_stack;
+	PyObject *node;
+	int skipped;
+	PyObject *schema;
+	PyObject *schema_stack;
+	PyObject *key_stack;
+	Py_ssize_t slot;
+	int invalid;
 } builder_t;
 
+/*
+ * The fields of the compiled schemas of ijson.common._Schema
+ */
+enum schema_field {
+	SCHEMA_NAME,
+	SCHEMA_CONSTRUCT,
+	SCHEMA_SLOTS,
+	SCHEMA_NESTED,
+	SCHEMA_MISSING
+};
+
 /**
  * Initializes an empty builder which can be safely destroyed.
  *
@@ -42,6 +62,15 @@ void builder_create(builder_t *builder)
 	builder->value = NULL;
 	builder->map_type = NULL;
 	builder->value_stack = NULL;
+	builder->projection = NULL;
+	builder->node_stack = NULL;
+	builder->node = NULL;
+	builder->skipped = 0;
+	builder->schema = NULL;
+	builder->schema_stack = NULL;
+	builder->key_stack = NULL;
+	builder->slot = -1;
+	builder->invalid = 0;
 }
 
 /**
@@ -63,6 +92,62 @@ int builder_init(builder_t *builder, PyObject *map_type)
 	return 0;
 }
 
+/**
+ * Makes a builder build only some members of objects.
+ *
+ * @param builder the builder to set the projection for
+ * @param projection A tree of dictionaries with the members to build, where
+ *  True marks members built whole, as compiled by ijson.common._projection.
+ *  If None then all members are built.
+ */
+static inline
+int builder_set_projection(builder_t *builder, PyObject *projection)
+{
+	if (projection == Py_None) {
+		return 0;
+	}
+	if (!PyDict_Check(projection)) {
+		PyErr_SetString(PyExc_TypeError, "projection must be a dictionary");
+		return -1;
+	}
+	M1_N(builder->node_stack = PyList_New(0));
+	builder->projection = projection;
+	Py_INCREF(projection);
+	builder->node = projection;
+	return 0;
+}
+
+/**
+ * Makes a builder build objects as described by a schema.
+ *
+ * Objects with a schema are built into a tuple with a slot for each of their
+ * members, which is handed at once to the schema's constructor when the object
+ * ends, with the missing members filled in first. schema_stack keeps the
+ * schema of each open object, the schema of the elements of each open array
+ * (Py_None if they have none), and key_stack the key each open container has
+ * in its parent, since objects with a schema are added to it only once built.
+ *
+ * Like common._apply_schema, which only sees the last value of duplicate keys,
+ * the values of members not agreeing with their schema make the object fail
+ * only if they are not overwritten (see _builder_invalid).
+ *
+ * @param builder the builder to set the schema for
+ * @param schema A schema as compiled by ijson.common._compile_schema. If None
+ *  then objects are built as usual.
+ */
+static inline
+int builder_set_schema(builder_t *builder, PyObject *schema)
+{
+	if (schema == Py_None) {
+		return 0;
+	}
+	M1_N(builder->schema_stack = PyList_New(0));
+	M1_N(builder->key_stack = PyList_New(0));
+	builder->schema = schema;
+	Py_INCREF(schema);
+	return 0;
+}
+
 /**
  * Destroys a builder and all its associated contents
  * @param builder The builder to destroy
@@ -73,6 +158,11 @@ void builder_destroy(builder_t *builder)
 	Py_DECREF(builder->value_stack);
 	Py_XDECREF(builder->map_type);
 	Py_XDECREF(builder->value);
+	Py_XDECREF(builder->node_stack);
+	Py_XDECREF(builder->projection);
+	Py_XDECREF(builder->key_stack);
+	Py_XDECREF(builder->schema_stack);
+	Py_XDECREF(builder->schema);
 }
 
 /**
@@ -114,6 +204,206 @@ int builder_reset(builder_t *builder)
 	Py_ssize_t nvals = PyList_Size(builder->value_stack);
 	M1_M1(PyList_SetSlice(builder->value_stack, 0, nvals, NULL));
 
+	if (builder->projection) {
+		Py_ssize_t nnodes = PyList_Size(builder->node_stack);
+		M1_M1(PyList_SetSlice(builder->node_stack, 0, nnodes, NULL));
+		builder->node = builder->projection;
+		builder->skipped = 0;
+	}
+
+	if (builder->schema) {
+		Py_ssize_t nschemas = PyList_Size(builder->schema_stack);
+		M1_M1(PyList_SetSlice(builder->schema_stack, 0, nschemas, NULL));
+		Py_ssize_t nkeys = PyList_Size(builder->key_stack);
+		M1_M1(PyList_SetSlice(builder->key_stack, 0, nkeys, NULL));
+		builder->slot = -1;
+		builder->invalid = 0;
+	}
+
+	return 0;
+}
+
+/*
+ * Returns the projection node (a borrowed reference) of the `key` member of a
+ * value with projection node `node`, or Py_None if the member is not built
+ */
+static inline
+PyObject *_builder_projection_member(PyObject *node, PyObject *key)
+{
+	PyObject *member;
+	if (node == Py_True || node == Py_None) {
+		return node;
+	}
+	member = PyDict_GetItem(node, key);
+	return member ? member : Py_None;
+}
+
+/**
+ * Returns whether the next value given to the builder will be skipped because
+ * of its projection, in which case it doesn't need to be constructed at all.
+ * @param builder A builder
+ * @return whether the next value will be skipped (1) or not (0)
+ */
+static inline
+int builder_skips(builder_t *builder)
+{
+	return builder->projection && (builder->skipped || builder->node == Py_None);
+}
+
+/*
+ * Follows an event through the builder's projection, returning whether it
+ * should be skipped or not.
+ *
+ * node_stack keeps the projection node of each open object, and the node of
+ * the elements of each open array, while node is the projection node of the
+ * next value (Py_None if it's skipped). After a container ends node is reset to
+ * the node of its parent: for arrays that's the node of the next element,
+ * while for objects it's overwritten by the next map_key anyway.
+ */
+static inline
+int _builder_project(builder_t *builder, PyObject *ename, PyObject *value)
+{
+	int is_start = (ename == enames.start_map_ename || ename == enames.start_array_ename);
+	int is_end = (ename == enames.end_map_ename || ename == enames.end_array_ename);
+	Py_ssize_t nnodes;
+
+	if (builder->skipped) {
+		builder->skipped += is_start;
+		builder->skipped -= is_end;
+		return 1;
+	}
+
+	nnodes = PyList_Size(builder->node_stack);
+	if (ename == enames.map_key_ename) {
+		builder->node = _builder_projection_member(PyList_GET_ITEM(builder->node_stack, nnodes - 1), value);
+	}
+	else if (is_end) {
+		M1_M1(PyList_SetSlice(builder->node_stack, nnodes - 1, nnodes, NULL));
+		if (nnodes > 1) {
+			builder->node = PyList_GET_ITEM(builder->node_stack, nnodes - 2);
+		}
+	}
+	else if (builder->node == Py_None) {
+		builder->skipped = is_start;
+		return 1;
+	}
+	else if (ename == enames.start_map_ename) {
+		M1_M1(PyList_Append(builder->node_stack, builder->node));
+	}
+	else if (ename == enames.start_array_ename) {
+		builder->node = _builder_projection_member(builder->node, item);
+		M1_M1(PyList_Append(builder->node_stack, builder->node));
+	}
+	return 0;
+}
+
+/*
+ * Returns the schema (a borrowed reference) of the next value given to the
+ * builder, Py_None if it has none
+ */
+static inline
+PyObject *_builder_schema(builder_t *builder)
+{
+	Py_ssize_t nschemas = PyList_GET_SIZE(builder->schema_stack);
+	if (nschemas == 0) {
+		return builder->schema;
+	}
+	PyObject *container = PyList_GET_ITEM(builder->value_stack, nschemas - 1);
+	PyObject *schema = PyList_GET_ITEM(builder->schema_stack, nschemas - 1);
+	if (PyTuple_CheckExact(container)) {
+		if (builder->slot == -1) {
+			return Py_None;
+		}
+		return PyList_GET_ITEM(PyTuple_GET_ITEM(schema, SCHEMA_NESTED), builder->slot);
+	}
+	if (PyList_Check(container)) {
+		return schema;
+	}
+	return Py_None;
+}
+
+/*
+ * Finds the slot of the current key in the object with a schema at the top of
+ * the value stack, if any
+ */
+static inline
+int _builder_find_slot(builder_t *builder)
+{
+	Py_ssize_t nschemas = PyList_GET_SIZE(builder->schema_stack);
+	builder->slot = -1;
+	if (nschemas == 0 || !builder->key ||
+	    !PyTuple_CheckExact(PyList_GET_ITEM(builder->value_stack, nschemas - 1))) {
+		return 0;
+	}
+	PyObject *schema = PyList_GET_ITEM(builder->schema_stack, nschemas - 1);
+	PyObject *slot = PyDict_GetItem(PyTuple_GET_ITEM(schema, SCHEMA_SLOTS), builder->key);
+	if (slot) {
+		builder->slot = PyNumber_AsSsize_t(slot, NULL);
+		M1_M1(builder->slot);
+	}
+	return 0;
+}
+
+/*
+ * Raises an error about a value starting with `ename` given where a value with
+ * `schema` was expected, returns -1
+ */
+static inline
+int _builder_not_schema(PyObject *schema, PyObject *ename)
+{
+	PyObject *msg;
+	if (PyList_Check(schema)) {
+		msg = PyUnicode_FromFormat("Expected an array, found a %S event", ename);
+	}
+	else {
+		msg = PyUnicode_FromFormat("Expected a %S object, found a %S event",
+		                           PyTuple_GET_ITEM(schema, SCHEMA_NAME), ename);
+	}
+	M1_N(msg);
+	PyErr_SetObject(PyExc_ValueError, msg);
+	Py_DECREF(msg);
+	return -1;
+}
+
+/*
+ * Constructs the object with a schema whose member values are in `values`,
+ * filling the missing ones first. Returns a new reference, NULL on error,
+ * which is also the case if any member value is an invalid one (see
+ * _builder_invalid).
+ */
+static inline
+PyObject *_builder_construct(PyObject *schema, PyObject *values)
+{
+	PyObject *missing = PyTuple_GET_ITEM(schema, SCHEMA_MISSING);
+	Py_ssize_t i, nslots = PyTuple_GET_SIZE(values);
+	for (i = 0; i != nslots; i++) {
+		PyObject *value = PyTuple_GET_ITEM(values, i);
+		if (!value) {
+			N_N(value = PyObject_CallObject(PyTuple_GET_ITEM(missing, i), NULL));
+			PyTuple_SET_ITEM(values, i, value);
+		}
+		else if (PyTuple_CheckExact(value)) {
+			PyObject *error = PyTuple_GET_ITEM(value, 0);
+			PyErr_SetObject((PyObject *)Py_TYPE(error), error);
+			return NULL;
+		}
+	}
+	return PyObject_Call(PyTuple_GET_ITEM(schema, SCHEMA_CONSTRUCT), values, NULL);
+}
+
+/**
+ * Checks that a value given on its own (i.e., not as part of a container)
+ * agrees with the builder's schema, if any.
+ * @param builder A builder
+ * @param ename The name of the event of the value
+ * @return 0 if it does, -1 if not, with a ValueError set
+ */
+static inline
+int builder_check_value(builder_t *builder, PyObject *ename)
+{
+	if (builder->schema && ename != enames.null_ename) {
+		return _builder_not_schema(builder->schema, ename);
+	}
 	return 0;
 }
 
@@ -133,6 +423,13 @@ int _builder_add(builder_t *builder, PyObject *value)
 		if (PyList_Check(last)) {
 			M1_M1(PyList_Append(last, value));
 		}
+		else if (PyTuple_CheckExact(last)) { // an object with a schema
+			if (builder->slot != -1) {
+				Py_XDECREF(PyTuple_GET_ITEM(last, builder->slot));
+				Py_INCREF(value);
+				PyTuple_SET_ITEM(last, builder->slot, value);
+			}
+		}
 		else { // it's a dict-like object
 			M1_M1(PyObject_SetItem(last, builder->key, value));
 		}
@@ -141,6 +438,147 @@ int _builder_add(builder_t *builder, PyObject *value)
 	return 0;
 }
 
+/*
+ * Handles the error set while adding a value to the container at the top of
+ * the value stack (or, if `opened`, while opening a container for it).
+ *
+ * The error is only raised if the value is not inside an object with a schema,
+ * otherwise the member of the innermost such object that the value is part of
+ * is set to an invalid value holding the error: a one-element tuple, which
+ * can't be a value otherwise. Any containers opened for that member are
+ * dropped, and the rest of its events skipped. Returns 0 if the error is held
+ * by an invalid value, -1 if it is raised.
+ */
+static inline
+int _builder_invalid(builder_t *builder, int opened)
+{
+	Py_ssize_t nvals = PyList_GET_SIZE(builder->value_stack);
+	Py_ssize_t object = nvals - 1;
+	while (object >= 0 && !PyTuple_CheckExact(PyList_GET_ITEM(builder->value_stack, object))) {
+		object--;
+	}
+	if (object < 0 || PyErr_ExceptionMatches(PyExc_MemoryError)) {
+		return -1;
+	}
+
+	PyObject *type, *error, *traceback;
+	PyErr_Fetch(&type, &error, &traceback);
+	PyErr_NormalizeException(&type, &error, &traceback);
+	Py_XDECREF(type);
+	Py_XDECREF(traceback);
+	PyObject *invalid = PyTuple_Pack(1, error);
+	Py_XDECREF(error);
+	M1_N(invalid);
+
+	if (object < nvals - 1) {
+		Py_XDECREF(builder->key);
+		builder->key = PyList_GET_ITEM(builder->key_stack, object + 1);
+		Py_INCREF(builder->key);
+	}
+	int failed = PyList_SetSlice(builder->value_stack, object + 1, nvals, NULL) ||
+	             PyList_SetSlice(builder->schema_stack, object + 1, nvals, NULL) ||
+	             PyList_SetSlice(builder->key_stack, object + 1, nvals, NULL) ||
+	             _builder_find_slot(builder) ||
+	             _builder_add(builder, invalid);
+	Py_DECREF(invalid);
+	M1_M1(failed ? -1 : 0);
+	builder->invalid = (int)(nvals - 1 - object) + opened;
+	return 0;
+}
+
+/*
+ * builder_event for builders with a schema
+ */
+static inline
+int _builder_schema_event(builder_t *builder, PyObject *ename, PyObject *value)
+{
+	if (builder->invalid) {
+		builder->invalid += (ename == enames.start_map_ename || ename == enames.start_array_ename);
+		builder->invalid -= (ename == enames.end_map_ename || ename == enames.end_array_ename);
+		return 0;
+	}
+
+	if (ename == enames.map_key_ename) {
+		Py_XDECREF(builder->key);
+		builder->key = value;
+		Py_INCREF(builder->key);
+		return _builder_find_slot(builder);
+	}
+
+	if (ename == enames.end_array_ename || ename == enames.end_map_ename) {
+		Py_ssize_t nvals = PyList_Size(builder->value_stack);
+		PyObject *container = PyList_GET_ITEM(builder->value_stack, nvals - 1);
+		PyObject *schema = PyList_GET_ITEM(builder->schema_stack, nvals - 1);
+		PyObject *built = NULL, *type = NULL, *error = NULL, *traceback = NULL;
+		if (PyTuple_CheckExact(container) && !(built = _builder_construct(schema, container))) {
+			PyErr_Fetch(&type, &error, &traceback);
+		}
+		Py_XDECREF(builder->key);
+		builder->key = PyList_GET_ITEM(builder->key_stack, nvals - 1);
+		Py_INCREF(builder->key);
+		int failed = PyList_SetSlice(builder->value_stack, nvals - 1, nvals, NULL) ||
+		             PyList_SetSlice(builder->schema_stack, nvals - 1, nvals, NULL) ||
+		             PyList_SetSlice(builder->key_stack, nvals - 1, nvals, NULL) ||
+		             _builder_find_slot(builder);
+		if (!failed && built) {
+			failed = _builder_add(builder, built);
+		}
+		else if (type) {
+			PyErr_Restore(type, error, traceback);
+			failed = failed || _builder_invalid(builder, 0);
+		}
+		Py_XDECREF(built);
+		return failed ? -1 : 0;
+	}
+
+	PyObject *schema = _builder_schema(builder);
+	int is_start = (ename == enames.start_map_ename || ename == enames.start_array_ename);
+	if (!is_start) {
+		if (schema != Py_None && ename != enames.null_ename) {
+			_builder_not_schema(schema, ename);
+			return _builder_invalid(builder, 0);
+		}
+		return _builder_add(builder, value);
+	}
+
+	PyObject *container, *container_schema = Py_None;
+	if (ename == enames.start_map_ename) {
+		if (PyList_Check(schema)) {
+			_builder_not_schema(schema, ename);
+			return _builder_invalid(builder, 1);
+		}
+		if (schema != Py_None) {
+			Py_ssize_t nslots = PyDict_Size(PyTuple_GET_ITEM(schema, SCHEMA_SLOTS));
+			M1_N(container = PyTuple_New(nslots));
+			container_schema = schema;
+		}
+		else if (builder->map_type) {
+			M1_N(container = PyObject_CallFunctionObjArgs(builder->map_type, NULL));
+		}
+		else {
+			M1_N(container = PyDict_New());
+		}
+	}
+	else {
+		if (schema != Py_None && !PyList_Check(schema)) {
+			_builder_not_schema(schema, ename);
+			return _builder_invalid(builder, 1);
+		}
+		if (schema != Py_None) {
+			container_schema = PyList_GET_ITEM(schema, 0);
+		}
+		M1_N(container = PyList_New(0));
+	}
+	int failed = (!PyTuple_CheckExact(container) && _builder_add(builder, container)) ||
+	             PyList_Append(builder->value_stack, container) ||
+	             PyList_Append(builder->schema_stack, container_schema) ||
+	             PyList_Append(builder->key_stack, builder->key ? builder->key : Py_None);
+	Py_DECREF(container);
+	M1_M1(failed ? -1 : 0);
+	builder->slot = -1;
+	return 0;
+}
+
 /**
  * Feed an (event, value) pair to the builder for further constructing the
  * underlying value
@@ -154,6 +592,18 @@ int builder_event(builder_t *builder, PyObject *ename, PyObject *value)
 {
 	builder->active = 1;
 
+	if (builder->projection) {
+		int skip = _builder_project(builder, ename, value);
+		M1_M1(skip);
+		if (skip) {
+			return 0;
+		}
+	}
+
+	if (builder->schema) {
+		return _builder_schema_event(builder, ename, value);
+	}
+
 	if (ename == enames.map_key_ename) {
 		Py_XDECREF(builder->key);
 		builder->key = value;
@@ -0,0 +1,469 @@
+/*
+ * columns_basecoro coroutine implementation for ijson's C backend
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#include "common.h"
+#include "columns_basecoro.h"
+
+/*
+ * __init__, destructor, __iter__ and __next__
+ */
+static int columns_basecoro_init(ColumnsBasecoro *self, PyObject *args, PyObject *kwargs)
+{
+	self->target_send = NULL;
+	self->prefix = NULL;
+	self->names = NULL;
+	self->indexes = NULL;
+	self->array_type = NULL;
+	self->columns = NULL;
+	self->ncolumns = 0;
+	self->rows = 0;
+	self->state = COLUMNS_OUTSIDE;
+	self->column = -1;
+	self->depth = 0;
+	builder_create(&self->builder);
+	prefix_matcher_create(&self->matcher);
+
+	PyObject *fields, *chunk_size = Py_None, *map_type = Py_None, *masks = Py_False;
+	M1_Z(PyArg_ParseTuple(args, "OOO!|OOO", &(self->target_send), &(self->prefix),
+	                      &PyDict_Type, &fields, &chunk_size, &map_type, &masks));
+	Py_INCREF(self->target_send);
+	Py_INCREF(self->prefix);
+	if (prefix_matcher_is_pattern(self->prefix)) {
+		M1_M1(prefix_matcher_init(&self->matcher, self->prefix));
+	}
+	M1_M1(builder_init(&self->builder, map_type));
+	M1_M1(self->masks = PyObject_IsTrue(masks));
+
+	self->chunk_size = 0;
+	if (chunk_size != Py_None) {
+		self->chunk_size = PyNumber_AsSsize_t(chunk_size, PyExc_OverflowError);
+		if (self->chunk_size == -1 && PyErr_Occurred()) {
+			return -1;
+		}
+		if (self->chunk_size < 1) {
+			PyErr_SetString(PyExc_ValueError, "chunk_size must be a positive number");
+			return -1;
+		}
+	}
+
+	Py_ssize_t i, pos = 0, ncolumns = PyDict_Size(fields);
+	PyObject *name, *typecode;
+	M1_N(self->names = PyTuple_New(ncolumns));
+	M1_N(self->indexes = PyDict_New());
+	M1_N(self->columns = PyMem_New(column_t, ncolumns));
+	for (i = 0; i != ncolumns; i++) {
+		self->columns[i].values = NULL;
+		typed_buffer_create(&self->columns[i].numbers);
+		typed_buffer_create(&self->columns[i].nulls);
+	}
+	self->ncolumns = ncolumns;
+	for (i = 0; PyDict_Next(fields, &pos, &name, &typecode); i++) {
+		column_t *column = &self->columns[i];
+		PyObject *index;
+		Py_INCREF(name);
+		PyTuple_SET_ITEM(self->names, i, name);
+		M1_N(index = PyLong_FromSsize_t(i));
+		int res = PyDict_SetItem(self->indexes, name, index);
+		Py_DECREF(index);
+		M1_M1(res);
+		if (typecode == Py_None) {
+			M1_N(column->values = PyList_New(0));
+		}
+		else {
+			const char *typecode_str;
+#if PY_MAJOR_VERSION >= 3
+			M1_N(typecode_str = PyUnicode_AsUTF8(typecode));
+#else
+			M1_N(typecode_str = PyString_AsString(typecode));
+#endif
+			M1_M1(typed_buffer_init(&column->numbers, typecode_str, self->chunk_size));
+		}
+		if (self->masks) {
+			M1_M1(typed_buffer_init(&column->nulls, "B", self->chunk_size));
+		}
+	}
+
+	PyObject *array_module;
+	M1_N(array_module = PyImport_ImportModule("array"));
+	self->array_type = PyObject_GetAttrString(array_module, "array");
+	Py_DECREF(array_module);
+	M1_N(self->array_type);
+	return 0;
+}
+
+static void columns_basecoro_dealloc(ColumnsBasecoro *self)
+{
+	Py_ssize_t i;
+	for (i = 0; i != self->ncolumns; i++) {
+		Py_XDECREF(self->columns[i].values);
+		typed_buffer_destroy(&self->columns[i].numbers);
+		typed_buffer_destroy(&self->columns[i].nulls);
+	}
+	PyMem_Free(self->columns);
+	Py_XDECREF(self->array_type);
+	Py_XDECREF(self->indexes);
+	Py_XDECREF(self->names);
+	Py_XDECREF(self->prefix);
+	Py_XDECREF(self->target_send);
+	if (self->builder.value_stack) {
+		builder_destroy(&self->builder);
+	}
+	prefix_matcher_destroy(&self->matcher);
+	Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+static Py_ssize_t column_length(column_t *column)
+{
+	if (column->values) {
+		return PyList_GET_SIZE(column->values);
+	}
+	return column->numbers.length;
+}
+
+static PyObject *columns_basecoro_error(const char *format, ...)
+{
+	PyObject *msg;
+	va_list vargs;
+	va_start(vargs, format);
+	msg = PyUnicode_FromFormatV(format, vargs);
+	va_end(vargs);
+	N_N(msg);
+	PyErr_SetObject(PyExc_ValueError, msg);
+	Py_DECREF(msg);
+	return NULL;
+}
+
+#define NOT_OBJECTS "Expected an array of objects, found a %U event"
+#define NOT_NULLABLE "Missing or null %R value, which can't be stored in an array of type '%s'"
+#define NOT_SCALAR "Found a %U event for %R, which can't be stored in an array of type '%s'"
+
+/*
+ * Sends the collected columns to the target: a dictionary of lists and
+ * array.array objects, or a (columns, masks) tuple if masks are collected
+ */
+static PyObject *columns_basecoro_dispatch(ColumnsBasecoro *coro)
+{
+	PyObject *columns = NULL, *masks = NULL, *res = NULL;
+	Py_ssize_t i;
+
+	coro->rows = 0;
+	if (!(columns = PyDict_New()) || (coro->masks && !(masks = PyDict_New()))) {
+		goto end;
+	}
+	for (i = 0; i != coro->ncolumns; i++) {
+		column_t *column = &coro->columns[i];
+		PyObject *name = PyTuple_GET_ITEM(coro->names, i), *values;
+		if (column->values) {
+			values = column->values;
+			if (!(column->values = PyList_New(0))) {
+				column->values = values;
+				goto end;
+			}
+		}
+		else if (!(values = typed_buffer_to_array(&column->numbers, coro->array_type))) {
+			goto end;
+		}
+		int failed = PyDict_SetItem(columns, name, values);
+		Py_DECREF(values);
+		if (failed) {
+			goto end;
+		}
+		if (masks) {
+			if (!(values = typed_buffer_to_array(&column->nulls, coro->array_type))) {
+				goto end;
+			}
+			failed = PyDict_SetItem(masks, name, values);
+			Py_DECREF(values);
+			if (failed) {
+				goto end;
+			}
+		}
+	}
+
+	if (masks) {
+		if (!(res = PyTuple_Pack(2, columns, masks))) {
+			goto end;
+		}
+		Py_DECREF(columns);
+		columns = res;
+	}
+	if (PyList_Check(coro->target_send)) {
+		res = PyList_Append(coro->target_send, columns) ? NULL : Py_None;
+		Py_XINCREF(res);
+	}
+	else {
+		res = PyObject_CallFunctionObjArgs(coro->target_send, columns, NULL);
+	}
+
+end:
+	Py_XDECREF(masks);
+	Py_XDECREF(columns);
+	return res;
+}
+
+/*
+ * Removes the value stored for the current member in the current object, if
+ * any, as repeated members replace previous ones, like in dictionaries.
+ * Returns -1 in case of error.
+ */
+static int columns_basecoro_unstore(ColumnsBasecoro *coro, column_t *column)
+{
+	if (column_length(column) == coro->rows) {
+		return 0;
+	}
+	if (column->values) {
+		Py_ssize_t length = PyList_GET_SIZE(column->values);
+		M1_M1(PyList_SetSlice(column->values, length - 1, length, NULL));
+	}
+	else {
+		column->numbers.length--;
+	}
+	if (coro->masks) {
+		column->nulls.length--;
+	}
+	return 0;
+}
+
+/*
+ * Stores a missing or null value, returns -1 in case of error
+ */
+static int columns_basecoro_store_null(ColumnsBasecoro *coro, column_t *column, PyObject *name)
+{
+	if (column->values) {
+		M1_M1(PyList_Append(column->values, Py_None));
+	}
+	else if (!coro->masks) {
+		columns_basecoro_error(NOT_NULLABLE, name, column->numbers.typecode);
+		return -1;
+	}
+	else {
+		M1_M1(typed_buffer_store_integer(&column->numbers, 0));
+	}
+	if (coro->masks) {
+		M1_M1(typed_buffer_store_integer(&column->nulls, 1));
+	}
+	return 0;
+}
+
+/*
+ * Stores the value of the current member, returns -1 in case of error
+ */
+static int columns_basecoro_store(ColumnsBasecoro *coro, PyObject *event, PyObject *value)
+{
+	column_t *column = &coro->columns[coro->column];
+	M1_M1(columns_basecoro_unstore(coro, column));
+	/* Nulls are stored like missing values, at the end of the object */
+	if (event == enames.null_ename) {
+		return 0;
+	}
+	if (column->values) {
+		M1_M1(PyList_Append(column->values, value));
+	}
+	else {
+		M1_M1(typed_buffer_store(&column->numbers, value));
+	}
+	if (coro->masks) {
+		M1_M1(typed_buffer_store_integer(&column->nulls, 0));
+	}
+	return 0;
+}
+
+/*
+ * Fills the columns of the members missing in the object that just ended,
+ * and dispatches the columns if they make up a full chunk
+ */
+static PyObject *columns_basecoro_end_object(ColumnsBasecoro *coro)
+{
+	Py_ssize_t i;
+	for (i = 0; i != coro->ncolumns; i++) {
+		column_t *column = &coro->columns[i];
+		if (column_length(column) == coro->rows) {
+			N_M1(columns_basecoro_store_null(coro, column, PyTuple_GET_ITEM(coro->names, i)));
+		}
+	}
+	coro->rows++;
+	if (coro->rows == coro->chunk_size) {
+		return columns_basecoro_dispatch(coro);
+	}
+	Py_RETURN_NONE;
+}
+
+int columns_basecoro_number(PyObject *self, const char *numberVal, size_t numberLen)
+{
+	ColumnsBasecoro *coro = (ColumnsBasecoro *)self;
+	if (coro->state != COLUMNS_IN_VALUE || coro->column == -1) {
+		return 0;
+	}
+	column_t *column = &coro->columns[coro->column];
+	if (column->values) {
+		return 0;
+	}
+	M1_M1(columns_basecoro_unstore(coro, column));
+	int stored = typed_buffer_store_number(&column->numbers, numberVal, numberLen);
+	if (stored == 1) {
+		if (coro->masks) {
+			M1_M1(typed_buffer_store_integer(&column->nulls, 0));
+		}
+		coro->state = COLUMNS_IN_OBJECT;
+	}
+	return stored;
+}
+
+PyObject* columns_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *event, PyObject *value)
+{
+	ColumnsBasecoro *coro = (ColumnsBasecoro *)self;
+
+	Py_ssize_t state = 0;
+	if (prefix_matcher_isactive(&coro->matcher) && PyList_Check(path)) {
+		N_M1(state = prefix_matcher_event(&coro->matcher, event, value));
+	}
+
+	int is_start = (event == enames.start_map_ename || event == enames.start_array_ename);
+	int is_end = (event == enames.end_map_ename || event == enames.end_array_ename);
+	switch (coro->state) {
+
+	case COLUMNS_OUTSIDE: {
+		int cmp;
+		if (prefix_matcher_isactive(&coro->matcher)) {
+			cmp = prefix_matcher_matches(&coro->matcher, state, path);
+		}
+		else {
+			cmp = PyObject_RichCompareBool(path, coro->prefix, Py_EQ);
+		}
+		N_M1(cmp);
+		if (cmp) {
+			if (event != enames.start_array_ename) {
+				return columns_basecoro_error(NOT_OBJECTS, event);
+			}
+			coro->state = COLUMNS_IN_ARRAY;
+		}
+		break;
+	}
+
+	case COLUMNS_IN_ARRAY:
+		if (event == enames.start_map_ename) {
+			coro->state = COLUMNS_IN_OBJECT;
+		}
+		else if (event == enames.end_array_ename) {
+			coro->state = COLUMNS_OUTSIDE;
+			if (coro->rows || !coro->chunk_size) {
+				return columns_basecoro_dispatch(coro);
+			}
+		}
+		else {
+			return columns_basecoro_error(NOT_OBJECTS, event);
+		}
+		break;
+
+	case COLUMNS_IN_VALUE:
+		// A member that goes into no column might have been pruned already
+		if (event != enames.map_key_ename && event != enames.end_map_ename) {
+			coro->state = COLUMNS_IN_OBJECT;
+			if (is_start) {
+				coro->state = COLUMNS_IN_CONTAINER;
+				coro->depth = 1;
+				if (coro->column != -1) {
+					column_t *column = &coro->columns[coro->column];
+					if (!column->values) {
+						PyObject *name = PyTuple_GET_ITEM(coro->names, coro->column);
+						return columns_basecoro_error(NOT_SCALAR, event, name,
+						                              column->numbers.typecode);
+					}
+					N_M1(builder_event(&coro->builder, event, value));
+				}
+			}
+			else if (coro->column != -1) {
+				N_M1(columns_basecoro_store(coro, event, value));
+			}
+			break;
+		}
+		// fallthrough
+
+	case COLUMNS_IN_OBJECT:
+		if (event == enames.map_key_ename) {
+			PyObject *index = PyDict_GetItem(coro->indexes, value);
+			coro->column = index ? PyLong_AsSsize_t(index) : -1;
+			coro->state = COLUMNS_IN_VALUE;
+		}
+		else {
+			coro->state = COLUMNS_IN_ARRAY;
+			return columns_basecoro_end_object(coro);
+		}
+		break;
+
+	case COLUMNS_IN_CONTAINER:
+		coro->depth += is_start - is_end;
+		if (coro->column == -1) {
+			coro->state = coro->depth ? COLUMNS_IN_CONTAINER : COLUMNS_IN_OBJECT;
+		}
+		else if (coro->depth) {
+			N_M1(builder_event(&coro->builder, event, value));
+		}
+		else {
+			PyObject *built = builder_value(&coro->builder);
+			int res = columns_basecoro_store(coro, event, built);
+			Py_DECREF(built);
+			N_M1(res);
+			N_M1(builder_reset(&coro->builder));
+			coro->state = COLUMNS_IN_OBJECT;
+		}
+		break;
+	}
+
+	Py_RETURN_NONE;
+}
+
+int columns_basecoro_prunable(PyObject *self, PyObject *path)
+{
+	ColumnsBasecoro *coro = (ColumnsBasecoro *)self;
+	switch (coro->state) {
+	case COLUMNS_OUTSIDE:
+		if (prefix_matcher_isactive(&coro->matcher)) {
+			return prefix_matcher_isdead(&coro->matcher);
+		}
+		return prefix_diverges(path, coro->prefix);
+	case COLUMNS_IN_VALUE:
+	case COLUMNS_IN_CONTAINER:
+		return coro->column == -1;
+	default:
+		return 0;
+	}
+}
+
+static PyObject* columns_basecoro_send(PyObject *self, PyObject *tuple)
+{
+	PyObject *path  = PyTuple_GetItem(tuple, 0);
+	PyObject *event = PyTuple_GetItem(tuple, 1);
+	PyObject *value = PyTuple_GetItem(tuple, 2);
+	return columns_basecoro_send_impl(self, path, event, value);
+}
+
+static PyMethodDef columns_basecoro_methods[] = {
+	{"send", columns_basecoro_send, METH_O, "coroutine's send method"},
+	{NULL, NULL, 0, NULL}
+};
+
+/*
+ * columns_basecoro coroutine object type
+ */
+PyTypeObject ColumnsBasecoro_Type = {
+#if PY_MAJOR_VERSION >= 3
+	PyVarObject_HEAD_INIT(NULL, 0)
+#else
+	PyObject_HEAD_INIT(NULL)
+#endif
+	.tp_basicsize = sizeof(ColumnsBasecoro),
+	.tp_name = "_yajl2.columns_basecoro",
+	.tp_doc = "Coroutine dispatching the members of the objects of the arrays under the given prefix as columns",
+	.tp_init = (initproc)columns_basecoro_init,
+	.tp_dealloc = (destructor)columns_basecoro_dealloc,
+	.tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_ITER,
+	.tp_iter = ijson_return_self,
+	.tp_iternext = ijson_return_none,
+	.tp_methods = columns_basecoro_methods
+};
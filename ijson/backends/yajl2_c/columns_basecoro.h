@@ -0,0 +1,109 @@
+/*
+ * columns_basecoro coroutine for ijson's C backend
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#ifndef COLUMNS_BASECORO_H
+#define COLUMNS_BASECORO_H
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "builder.h"
+#include "prefix_matcher.h"
+#include "typed_buffer.h"
+
+/**
+ * A column: the values of one member across the objects of an array. Typed
+ * columns store them in `numbers`, the rest in the `values` list. If masks are
+ * collected, `nulls` flags which values are missing or null.
+ */
+typedef struct _column {
+    PyObject *values;
+    typed_buffer_t numbers;
+    typed_buffer_t nulls;
+} column_t;
+
+/**
+ * Where in the arrays of objects a columns_basecoro coroutine is
+ */
+enum columns_state {
+    COLUMNS_OUTSIDE,
+    COLUMNS_IN_ARRAY,
+    COLUMNS_IN_OBJECT,
+    COLUMNS_IN_VALUE,
+    COLUMNS_IN_CONTAINER
+};
+
+/**
+ * columns_basecoro coroutine object structure
+ *
+ * `column` is the index of the column the current member goes to (-1 if it's
+ * skipped), and `depth` the nesting level of the container it holds, if any,
+ * which is built with `builder`.
+ */
+typedef struct {
+    PyObject_HEAD
+    prefix_matcher_t matcher;
+    PyObject *target_send;
+    PyObject *prefix;
+    PyObject *names;
+    PyObject *indexes;
+    PyObject *array_type;
+    column_t *columns;
+    Py_ssize_t ncolumns;
+    Py_ssize_t chunk_size;
+    Py_ssize_t rows;
+    int masks;
+    enum columns_state state;
+    Py_ssize_t column;
+    Py_ssize_t depth;
+    builder_t builder;
+} ColumnsBasecoro;
+
+/**
+ * columns_basecoro coroutine object type
+ */
+extern PyTypeObject ColumnsBasecoro_Type;
+
+/**
+ * Utility function to check if an object is a columns_basecoro coroutine or not
+ */
+#define ColumnsBasecoro_Check(o) (Py_TYPE(o) == &ColumnsBasecoro_Type)
+
+/**
+ * The implementation of the columns_basecoro.send() method accepting an
+ * unpacked event
+ * @param self A columns_basecoro coroutine
+ * @param path The path of this event
+ * @param event The event name
+ * @param value The value of this event
+ * @return None, or NULL in case of an error
+ */
+PyObject* columns_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *event, PyObject *value);
+
+/**
+ * Stores a number straight out of its text if it's the value of a member with
+ * a typed column, skipping the creation of a Python object for it. Only the
+ * numbers that can be converted and stored without loss or errors are taken;
+ * the rest must be given as a normal number event.
+ * @param self A columns_basecoro coroutine
+ * @param numberVal The text of the number, as given by yajl
+ * @param numberLen The length of numberVal
+ * @return 1 if the number was stored, 0 if not, -1 in case of an error
+ */
+int columns_basecoro_number(PyObject *self, const char *numberVal, size_t numberLen);
+
+/**
+ * Returns whether the value starting at the given path can be skipped
+ * altogether because it doesn't go into any column
+ * @param self A columns_basecoro coroutine
+ * @param path The path of the value, as a list of components
+ * @return 1 if the value can be skipped, 0 if not, -1 in case of an error
+ */
+int columns_basecoro_prunable(PyObject *self, PyObject *path);
+
+#endif /* COLUMNS_BASECORO_H */
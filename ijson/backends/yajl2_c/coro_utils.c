@@ -13,7 +13,9 @@
 
 PyObject *chain(PyObject *sink, pipeline_node *coro_pipeline)
 {
+	// Each coroutine's reference is passed on to the arguments of the next one
 	PyObject *coro = sink;
+	Py_INCREF(coro);
 	int element = 0;
 	while (1) {
 		pipeline_node node = coro_pipeline[element++];
@@ -23,7 +25,11 @@ PyObject *chain(PyObject *sink, pipeline_node *coro_pipeline)
 		PyObject *coro_args;
 		if (node.args) {
 			int nargs = PyTuple_Size(node.args);
-			N_N(coro_args = PyTuple_New(nargs + 1));
+			coro_args = PyTuple_New(nargs + 1);
+			if (!coro_args) {
+				Py_DECREF(coro);
+				return NULL;
+			}
 			PyTuple_SET_ITEM(coro_args, 0, coro);
 			int i;
 			for (i = 0; i != nargs; i++) {
@@ -31,11 +37,13 @@ PyObject *chain(PyObject *sink, pipeline_node *coro_pipeline)
 			}
 		}
 		else {
-			N_N(coro_args = PyTuple_Pack(1, coro));
+			coro_args = PyTuple_Pack(1, coro);
 			Py_DECREF(coro);
+			N_N(coro_args);
 		}
-		N_N(coro = PyObject_Call((PyObject *)node.type, coro_args, node.kwargs));
+		coro = PyObject_Call((PyObject *)node.type, coro_args, node.kwargs);
 		Py_DECREF(coro_args);
+		N_N(coro);
 	}
 	return coro;
 }
\ No newline at end of file
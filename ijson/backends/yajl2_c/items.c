@@ -19,8 +19,8 @@
  */
 static int itemsgen_init(ItemsGen *self, PyObject *args, PyObject *kwargs)
 {
-	PyObject *reading_args = PySequence_GetSlice(args, 0, 2);
-	PyObject *items_args = PySequence_GetSlice(args, 2, 4);
+	PyObject *reading_args = PySequence_GetSlice(args, 0, 3);
+	PyObject *items_args = PySequence_GetSlice(args, 3, 8);
 	PyObject *parse_args = PyTuple_Pack(1, Py_False);
 	pipeline_node coro_pipeline[] = {
 		{&ItemsBasecoro_Type, items_args, NULL},
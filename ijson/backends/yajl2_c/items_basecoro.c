@@ -10,6 +10,7 @@
 
 #include "common.h"
 #include "items_basecoro.h"
+#include "kvitems_basecoro.h"
 
 /*
  * __init__, destructor, __iter__ and __next__
@@ -20,12 +21,20 @@ static int items_basecoro_init(ItemsBasecoro *self, PyObject *args, PyObject *kw
 	self->prefix = NULL;
 	self->object_depth = 0;
 	builder_create(&self->builder);
+	prefix_matcher_create(&self->matcher);
 
-	PyObject *map_type;
-	M1_Z(PyArg_ParseTuple(args, "OOO", &(self->target_send), &(self->prefix), &map_type));
+	PyObject *map_type, *projection = Py_None, *schema = Py_None, *raw = Py_False;
+	M1_Z(PyArg_ParseTuple(args, "OOO|OOO", &(self->target_send), &(self->prefix), &map_type,
+	                      &projection, &schema, &raw));
 	Py_INCREF(self->target_send);
 	Py_INCREF(self->prefix);
+	M1_M1(self->raw = PyObject_IsTrue(raw));
 	M1_M1(builder_init(&self->builder, map_type));
+	M1_M1(builder_set_projection(&self->builder, projection));
+	M1_M1(builder_set_schema(&self->builder, schema));
+	if (prefix_matcher_is_pattern(self->prefix)) {
+		M1_M1(prefix_matcher_init(&self->matcher, self->prefix));
+	}
 
 	return 0;
 }
@@ -35,6 +44,7 @@ static void items_basecoro_dealloc(ItemsBasecoro *self)
 	Py_XDECREF(self->prefix);
 	Py_XDECREF(self->target_send);
 	builder_destroy(&self->builder);
+	prefix_matcher_destroy(&self->matcher);
 	Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
@@ -42,13 +52,16 @@ PyObject* items_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *eve
 {
 	ItemsBasecoro *coro = (ItemsBasecoro *)self;
 
+	Py_ssize_t state = 0;
+	if (prefix_matcher_isactive(&coro->matcher) && PyList_Check(path)) {
+		N_M1(state = prefix_matcher_event(&coro->matcher, event, value));
+	}
+
 	if (builder_isactive(&coro->builder)) {
 		coro->object_depth += (event == enames.start_map_ename || event == enames.start_array_ename);
 		coro->object_depth -= (event == enames.end_map_ename || event == enames.end_array_ename);
-		if (coro->object_depth > 0) {
-			N_M1( builder_event(&coro->builder, event, value) );
-		}
-		else {
+		N_M1( builder_event(&coro->builder, event, value) );
+		if (coro->object_depth == 0) {
 			PyObject *retval = builder_value(&coro->builder);
 			CORO_SEND(coro->target_send, retval);
 			Py_DECREF(retval);
@@ -56,14 +69,27 @@ PyObject* items_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *eve
 		}
 	}
 	else {
-		int cmp = PyObject_RichCompareBool(path, coro->prefix, Py_EQ);
+		int cmp;
+		if (prefix_matcher_isactive(&coro->matcher)) {
+			cmp = prefix_matcher_matches(&coro->matcher, state, path);
+		}
+		else {
+			cmp = PyObject_RichCompareBool(path, coro->prefix, Py_EQ);
+		}
 		N_M1(cmp);
+		if (cmp && coro->raw) {
+			// Raw values are taken by basic_parse_basecoro straight from the
+			// text, so these events come from somewhere else
+			PyErr_SetString(PyExc_ValueError, "Raw items can only be taken out of JSON text, not events");
+			return NULL;
+		}
 		if (cmp) {
 			if (event == enames.start_map_ename || event == enames.start_array_ename) {
 				coro->object_depth = 1;
 				N_M1(builder_event(&coro->builder, event, value));
 			}
 			else {
+				N_M1(builder_check_value(&coro->builder, event));
 				CORO_SEND(coro->target_send, value);
 			}
 		}
@@ -72,6 +98,52 @@ PyObject* items_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *eve
 	Py_RETURN_NONE;
 }
 
+int items_basecoro_prunable(PyObject *self, PyObject *path)
+{
+	ItemsBasecoro *coro = (ItemsBasecoro *)self;
+	if (builder_isactive(&coro->builder)) {
+		return builder_skips(&coro->builder);
+	}
+	if (coro->raw) {
+		int cmp;
+		if (prefix_matcher_isactive(&coro->matcher)) {
+			cmp = prefix_matcher_next_matches(&coro->matcher);
+		}
+		else {
+			cmp = PyObject_RichCompareBool(path, coro->prefix, Py_EQ);
+		}
+		X_LZ(cmp, -1);
+		if (cmp) {
+			return ITEMS_RAW_VALUE;
+		}
+	}
+	if (prefix_matcher_isactive(&coro->matcher)) {
+		return prefix_matcher_isdead(&coro->matcher);
+	}
+	return prefix_diverges(path, coro->prefix);
+}
+
+int items_basecoro_send_raw(PyObject *self, const char *text, size_t length)
+{
+	ItemsBasecoro *coro = (ItemsBasecoro *)self;
+	PyObject *value;
+#if PY_MAJOR_VERSION >= 3
+	M1_N(value = PyBytes_FromStringAndSize(text, length));
+#else
+	M1_N(value = PyString_FromStringAndSize(text, length));
+#endif
+	if (PyList_Check(coro->target_send)) {
+		int res = PyList_Append(coro->target_send, value);
+		Py_DECREF(value);
+		return res;
+	}
+	PyObject *res = PyObject_CallFunctionObjArgs(coro->target_send, value, NULL);
+	Py_DECREF(value);
+	M1_N(res);
+	Py_DECREF(res);
+	return 0;
+}
+
 static PyObject* items_basecoro_send(PyObject *self, PyObject *tuple)
 {
 	PyObject *path  = PyTuple_GetItem(tuple, 0);
@@ -104,3 +176,137 @@ PyTypeObject ItemsBasecoro_Type = {
 	.tp_iternext = ijson_return_none,
 	.tp_methods = items_basecoro_methods
 };
+
+
+/*
+ * items_multi_basecoro: feeds the same events to several items_basecoro and
+ * kvitems_basecoro coroutines, all of which dispatch their results into the
+ * same list. Results are then sent to the target together with the prefix of
+ * the coroutine that produced them.
+ */
+static int items_multi_basecoro_init(ItemsMultiBasecoro *self, PyObject *args, PyObject *kwargs)
+{
+	self->target_send = NULL;
+	self->coros = NULL;
+	self->prefixes = NULL;
+	self->results = NULL;
+
+	M1_Z(PyArg_ParseTuple(args, "OO!O!O!", &(self->target_send),
+	                      &PyTuple_Type, &(self->coros),
+	                      &PyTuple_Type, &(self->prefixes),
+	                      &PyList_Type, &(self->results)));
+	Py_INCREF(self->target_send);
+	Py_INCREF(self->coros);
+	Py_INCREF(self->prefixes);
+	Py_INCREF(self->results);
+
+	Py_ssize_t i, ncoros = PyTuple_GET_SIZE(self->coros);
+	if (ncoros != PyTuple_GET_SIZE(self->prefixes)) {
+		PyErr_SetString(PyExc_ValueError, "coros and prefixes must have the same length");
+		return -1;
+	}
+	for (i = 0; i != ncoros; i++) {
+		PyObject *coro = PyTuple_GET_ITEM(self->coros, i);
+		if (!ItemsBasecoro_Check(coro) && !KVItemsBasecoro_Check(coro)) {
+			PyErr_SetString(PyExc_TypeError, "coros must be items_basecoro or kvitems_basecoro objects");
+			return -1;
+		}
+	}
+	return 0;
+}
+
+static void items_multi_basecoro_dealloc(ItemsMultiBasecoro *self)
+{
+	Py_XDECREF(self->results);
+	Py_XDECREF(self->prefixes);
+	Py_XDECREF(self->coros);
+	Py_XDECREF(self->target_send);
+	Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+PyObject* items_multi_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *event, PyObject *value)
+{
+	ItemsMultiBasecoro *coro = (ItemsMultiBasecoro *)self;
+	Py_ssize_t i, j, ncoros = PyTuple_GET_SIZE(coro->coros);
+
+	for (i = 0; i != ncoros; i++) {
+		PyObject *res, *target = PyTuple_GET_ITEM(coro->coros, i);
+		if (KVItemsBasecoro_Check(target)) {
+			res = kvitems_basecoro_send_impl(target, path, event, value);
+		}
+		else {
+			res = items_basecoro_send_impl(target, path, event, value);
+		}
+		N_N(res);
+		Py_DECREF(res);
+
+		Py_ssize_t nresults = PyList_GET_SIZE(coro->results);
+		if (!nresults) {
+			continue;
+		}
+		PyObject *prefix = PyTuple_GET_ITEM(coro->prefixes, i);
+		for (j = 0; j != nresults; j++) {
+			PyObject *result = PyTuple_Pack(2, prefix, PyList_GET_ITEM(coro->results, j));
+			N_N(result);
+			CORO_SEND(coro->target_send, result);
+			Py_DECREF(result);
+		}
+		N_M1(PyList_SetSlice(coro->results, 0, nresults, NULL));
+	}
+
+	Py_RETURN_NONE;
+}
+
+int items_multi_basecoro_prunable(PyObject *self, PyObject *path)
+{
+	ItemsMultiBasecoro *coro = (ItemsMultiBasecoro *)self;
+	Py_ssize_t i, ncoros = PyTuple_GET_SIZE(coro->coros);
+
+	for (i = 0; i != ncoros; i++) {
+		int prunable;
+		PyObject *target = PyTuple_GET_ITEM(coro->coros, i);
+		if (KVItemsBasecoro_Check(target)) {
+			prunable = kvitems_basecoro_prunable(target, path);
+		}
+		else {
+			prunable = items_basecoro_prunable(target, path);
+		}
+		if (prunable != 1) {
+			return prunable;
+		}
+	}
+	return 1;
+}
+
+static PyObject* items_multi_basecoro_send(PyObject *self, PyObject *tuple)
+{
+	PyObject *path  = PyTuple_GetItem(tuple, 0);
+	PyObject *event = PyTuple_GetItem(tuple, 1);
+	PyObject *value = PyTuple_GetItem(tuple, 2);
+	return items_multi_basecoro_send_impl(self, path, event, value);
+}
+
+static PyMethodDef items_multi_basecoro_methods[] = {
+	{"send", items_multi_basecoro_send, METH_O, "coroutine's send method"},
+	{NULL, NULL, 0, NULL}
+};
+
+/*
+ * items_multi coroutine object type
+ */
+PyTypeObject ItemsMultiBasecoro_Type = {
+#if PY_MAJOR_VERSION >= 3
+	PyVarObject_HEAD_INIT(NULL, 0)
+#else
+	PyObject_HEAD_INIT(NULL)
+#endif
+	.tp_basicsize = sizeof(ItemsMultiBasecoro),
+	.tp_name = "_yajl2.items_multi_basecoro",
+	.tp_doc = "Coroutine dispatching (prefix, object) tuples for several prefixes",
+	.tp_init = (initproc)items_multi_basecoro_init,
+	.tp_dealloc = (destructor)items_multi_basecoro_dealloc,
+	.tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_ITER,
+	.tp_iter = ijson_return_self,
+	.tp_iternext = ijson_return_none,
+	.tp_methods = items_multi_basecoro_methods
+};
@@ -12,6 +12,7 @@
 #define ITEMS_BASECORO_H
 
 #include "builder.h"
+#include "prefix_matcher.h"
 
 /**
  * items_basecoro coroutine object structure
@@ -19,11 +20,20 @@
 typedef struct {
     PyObject_HEAD
     builder_t builder;
+    prefix_matcher_t matcher;
     PyObject *target_send;
     PyObject *prefix;
     int object_depth;
+    int raw;
 } ItemsBasecoro;
 
+/**
+ * Returned by items_basecoro_prunable when the value starting at the given
+ * path is matched by an items_basecoro coroutine in raw mode, which wants its
+ * text rather than its events
+ */
+#define ITEMS_RAW_VALUE 2
+
 /**
  * items_basecoro coroutine object type
  */
@@ -45,4 +55,66 @@ extern PyTypeObject ItemsBasecoro_Type;
  */
 PyObject* items_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *event, PyObject *value);
 
+/**
+ * Returns whether the value starting at the given path can be skipped
+ * altogether because it can't contain any of the objects this coroutine
+ * returns
+ * @param self An items_basecoro coroutine
+ * @param path The path of the value, as a list of components
+ * @return 1 if the value can be skipped, ITEMS_RAW_VALUE if its text should be
+ *  given to items_basecoro_send_raw instead, 0 if not, -1 in case of an error
+ */
+int items_basecoro_prunable(PyObject *self, PyObject *path);
+
+/**
+ * Sends the text of a value matched by an items_basecoro coroutine in raw mode
+ * @param self An items_basecoro coroutine
+ * @param text The text of the value
+ * @param length The length of text
+ * @return 0 if successful, -1 in case of an error
+ */
+int items_basecoro_send_raw(PyObject *self, const char *text, size_t length);
+
+/**
+ * items_multi_basecoro coroutine object structure
+ */
+typedef struct {
+    PyObject_HEAD
+    PyObject *target_send;
+    PyObject *coros;
+    PyObject *prefixes;
+    PyObject *results;
+} ItemsMultiBasecoro;
+
+/**
+ * items_multi_basecoro coroutine object type
+ */
+extern PyTypeObject ItemsMultiBasecoro_Type;
+
+/**
+ * Utility function to check if an object is an items_multi_basecoro coroutine
+ * or not
+ */
+#define ItemsMultiBasecoro_Check(o) (Py_TYPE(o) == &ItemsMultiBasecoro_Type)
+
+/**
+ * The implementation of the items_multi_basecoro.send() method accepting an
+ * unpacked event
+ * @param self An items_multi_basecoro coroutine
+ * @param path The path of this event
+ * @param event The event name
+ * @param value The value of this event
+ * @return None, or NULL in case of an error
+ */
+PyObject* items_multi_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *event, PyObject *value);
+
+/**
+ * Returns whether the value starting at the given path can be skipped
+ * altogether because none of the underlying coroutines are interested in it
+ * @param self An items_multi_basecoro coroutine
+ * @param path The path of the value, as a list of components
+ * @return 1 if the value can be skipped, 0 if not, -1 in case of an error
+ */
+int items_multi_basecoro_prunable(PyObject *self, PyObject *path);
+
 #endif // ITEMS_BASECORO_H
\ No newline at end of file
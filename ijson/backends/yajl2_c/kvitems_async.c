@@ -30,8 +30,8 @@ typedef struct {
  */
 static int kvitemsasync_init(KVItemsAsync *self, PyObject *args, PyObject *kwargs)
 {
-	PyObject *reading_args = PySequence_GetSlice(args, 0, 2);
-	PyObject *kvitems_args = PySequence_GetSlice(args, 2, 4);
+	PyObject *reading_args = PySequence_GetSlice(args, 0, 3);
+	PyObject *kvitems_args = PySequence_GetSlice(args, 3, 5);
 	PyObject *parse_args = PyTuple_Pack(1, Py_False);
 	pipeline_node coro_pipeline[] = {
 		{&KVItemsBasecoro_Type, kvitems_args, NULL},
@@ -40,7 +40,7 @@ static int kvitemsasync_init(KVItemsAsync *self, PyObject *args, PyObject *kwarg
 		{NULL}
 	};
 	M1_N(self->reading_generator = (async_reading_generator *)PyObject_CallObject((PyObject *)&AsyncReadingGeneratorType, reading_args));
-	async_reading_generator_add_coro(self->reading_generator, coro_pipeline);
+	M1_M1(async_reading_generator_add_coro(self->reading_generator, coro_pipeline));
 	Py_DECREF(parse_args);
 	Py_DECREF(kvitems_args);
 	Py_DECREF(reading_args);
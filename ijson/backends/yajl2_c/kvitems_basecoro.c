@@ -20,12 +20,16 @@ static int kvitems_basecoro_init(KVItemsBasecoro *self, PyObject *args, PyObject
 	self->prefix = NULL;
 	self->key = NULL;
 	builder_create(&self->builder);
+	prefix_matcher_create(&self->matcher);
 
 	PyObject *map_type;
 	M1_Z(PyArg_ParseTuple(args, "OOO", &(self->target_send), &(self->prefix), &map_type));
 	Py_INCREF(self->target_send);
 	Py_INCREF(self->prefix);
 	M1_M1(builder_init(&self->builder, map_type));
+	if (prefix_matcher_is_pattern(self->prefix)) {
+		M1_M1(prefix_matcher_init(&self->matcher, self->prefix));
+	}
 
 	return 0;
 }
@@ -36,6 +40,7 @@ static void kvitems_basecoro_dealloc(KVItemsBasecoro *self)
 	Py_XDECREF(self->key);
 	Py_XDECREF(self->target_send);
 	builder_destroy(&self->builder);
+	prefix_matcher_destroy(&self->matcher);
 	Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
@@ -54,47 +59,58 @@ PyObject* kvitems_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *e
 {
 	KVItemsBasecoro *coro = (KVItemsBasecoro *)self;
 
-	PyObject *retval = NULL;
-	PyObject *retkey = NULL;
+	Py_ssize_t state = 0;
+	if (prefix_matcher_isactive(&coro->matcher) && PyList_Check(path)) {
+		N_M1(state = prefix_matcher_event(&coro->matcher, event, value));
+	}
+
 	if (builder_isactive(&coro->builder)) {
-		coro->object_depth += (event == enames.start_map_ename);
-		coro->object_depth -= (event == enames.end_map_ename);
-		if ((event != enames.map_key_ename || coro->object_depth != 0) &&
-		    (event != enames.end_map_ename || coro->object_depth != -1)) {
-			N_M1(builder_event(&coro->builder, event, value));
+		// Members are sent as soon as their value is complete, like
+		// items_basecoro does, so items_multi sees them in document order
+		coro->object_depth += (event == enames.start_map_ename || event == enames.start_array_ename);
+		coro->object_depth -= (event == enames.end_map_ename || event == enames.end_array_ename);
+		N_M1(builder_event(&coro->builder, event, value));
+		if (coro->object_depth == 0) {
+			PyObject *retval = builder_value(&coro->builder);
+			PyObject *tuple = PyTuple_Pack(2, coro->key, retval);
+			Py_DECREF(retval);
+			N_N(tuple);
+			Py_CLEAR(coro->key);
+			coro->builder.active = 0;
+			CORO_SEND(coro->target_send, tuple);
+			Py_DECREF(tuple);
+		}
+	}
+	else if (event == enames.map_key_ename) {
+		int cmp;
+		if (prefix_matcher_isactive(&coro->matcher)) {
+			cmp = prefix_matcher_matches(&coro->matcher, state, path);
 		}
 		else {
-			retval = builder_value(&coro->builder);
-			retkey = coro->key;
-			Py_INCREF(retkey);
-			if (event == enames.map_key_ename) {
-				N_M1(kvitems_basecoro_start_new_member(coro, value));
-			}
-			else {
-				Py_CLEAR(coro->key);
-				coro->builder.active = 0;
-			}
+			cmp = PyObject_RichCompareBool(path, coro->prefix, Py_EQ);
 		}
-	}
-	else {
-		int cmp = PyObject_RichCompareBool(path, coro->prefix, Py_EQ);
 		N_M1(cmp);
-		if (cmp == 1 && event == enames.map_key_ename) {
+		if (cmp == 1) {
 			N_M1(kvitems_basecoro_start_new_member(coro, value));
 		}
 	}
 
-	if (retval) {
-		PyObject *tuple = PyTuple_Pack(2, retkey, retval);
-		Py_XDECREF(retkey);
-		Py_XDECREF(retval);
-		CORO_SEND(coro->target_send, tuple);
-		Py_DECREF(tuple);
-	}
-
 	Py_RETURN_NONE;
 }
 
+int kvitems_basecoro_prunable(PyObject *self, PyObject *path)
+{
+	KVItemsBasecoro *coro = (KVItemsBasecoro *)self;
+	if (builder_isactive(&coro->builder)) {
+		return 0;
+	}
+	if (prefix_matcher_isactive(&coro->matcher)) {
+		return prefix_matcher_isdead(&coro->matcher) &&
+		       !prefix_matcher_parent_matches(&coro->matcher);
+	}
+	return prefix_diverges(path, coro->prefix);
+}
+
 static PyObject* kvitems_basecoro_send(PyObject *self, PyObject *tuple)
 {
 	PyObject *path  = PyTuple_GetItem(tuple, 0);
@@ -15,6 +15,7 @@
 #include <Python.h>
 
 #include "builder.h"
+#include "prefix_matcher.h"
 
 /**
  * kvitems_basecoro coroutine object structure
@@ -22,6 +23,7 @@
 typedef struct {
     PyObject_HEAD
     builder_t builder;
+    prefix_matcher_t matcher;
     PyObject *target_send;
     PyObject *prefix;
     PyObject *key;
@@ -49,4 +51,14 @@ extern PyTypeObject KVItemsBasecoro_Type;
  */
 PyObject* kvitems_basecoro_send_impl(PyObject *self, PyObject *path, PyObject *event, PyObject *value);
 
+/**
+ * Returns whether the value starting at the given path can be skipped
+ * altogether because it can't contain any of the members this coroutine
+ * returns
+ * @param self A kvitems_basecoro coroutine
+ * @param path The path of the value, as a list of components
+ * @return 1 if the value can be skipped, 0 if not, -1 in case of an error
+ */
+int kvitems_basecoro_prunable(PyObject *self, PyObject *path);
+
 #endif /* KVITEMS_BASECORO_H */
\ No newline at end of file
@@ -9,6 +9,8 @@
  */
 
 #include "common.h"
+#include "arrays_basecoro.h"
+#include "columns_basecoro.h"
 #include "async_reading_generator.h"
 #include "basic_parse.h"
 #include "basic_parse_async.h"
@@ -22,6 +24,7 @@
 #include "kvitems.h"
 #include "kvitems_async.h"
 #include "kvitems_basecoro.h"
+#include "writer.h"
 
 enames_t enames;
 PyObject *dot, *item, *dotitem;
@@ -82,6 +85,10 @@ MOD_INIT(_yajl2)
 	ADD_TYPE("kvitems", KVItemsGen_Type);
 	ADD_TYPE("items_basecoro", ItemsBasecoro_Type);
 	ADD_TYPE("items", ItemsGen_Type);
+	ADD_TYPE("items_multi_basecoro", ItemsMultiBasecoro_Type);
+	ADD_TYPE("arrays_basecoro", ArraysBasecoro_Type);
+	ADD_TYPE("columns_basecoro", ColumnsBasecoro_Type);
+	ADD_TYPE("writer_coro", WriterCoro_Type);
 #if PY_VERSION_HEX >= 0x03050000
 	ADD_TYPE("_async_reading_iterator", AsyncReadingGeneratorType);
 	ADD_TYPE("basic_parse_async", BasicParseAsync_Type);
@@ -35,7 +35,7 @@ static int parseasync_init(ParseAsync *self, PyObject *args, PyObject *kwargs)
 		{NULL}
 	};
 	M1_N(self->reading_generator = (async_reading_generator *)PyObject_CallObject((PyObject *)&AsyncReadingGeneratorType, args));
-	async_reading_generator_add_coro(self->reading_generator, coro_pipeline);
+	M1_M1(async_reading_generator_add_coro(self->reading_generator, coro_pipeline));
 	return 0;
 }
 
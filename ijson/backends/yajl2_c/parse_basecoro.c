@@ -9,6 +9,8 @@
  */
 
 #include "common.h"
+#include "arrays_basecoro.h"
+#include "columns_basecoro.h"
 #include "items_basecoro.h"
 #include "kvitems_basecoro.h"
 #include "parse_basecoro.h"
@@ -25,7 +27,9 @@ static int parse_basecoro_init(ParseBasecoro *self, PyObject *args, PyObject *kw
 	M1_N(self->path = PyList_New(0));
 	self->join_path = PyObject_IsTrue(join_path);
 	assert(self->join_path ||
-	       (KVItemsBasecoro_Check(self->target_send) || ItemsBasecoro_Check(self->target_send)));
+	       (KVItemsBasecoro_Check(self->target_send) || ItemsBasecoro_Check(self->target_send) ||
+	        ItemsMultiBasecoro_Check(self->target_send) || ArraysBasecoro_Check(self->target_send) ||
+	        ColumnsBasecoro_Check(self->target_send)));
 
 	if (self->join_path) {
 		PyObject *empty;
@@ -33,6 +37,8 @@ static int parse_basecoro_init(ParseBasecoro *self, PyObject *args, PyObject *kw
 		int res = PyList_Append(self->path, empty);
 		Py_DECREF(empty);
 		M1_M1(res);
+		M1_N(self->prefix_cache = PyDict_New());
+		self->prefix_cache_size = 0;
 	}
 	return 0;
 }
@@ -40,16 +46,61 @@ static int parse_basecoro_init(ParseBasecoro *self, PyObject *args, PyObject *kw
 static void parse_basecoro_dealloc(ParseBasecoro *self)
 {
 	Py_XDECREF(self->path);
+	Py_XDECREF(self->prefix_cache);
 	Py_XDECREF(self->target_send);
 	Py_TYPE(self)->tp_free((PyObject*)self);
 }
 
-#define CONCAT(tgt, first, second) \
-	do { \
-		tgt = PyUnicode_Concat(first, second); \
-		Py_DECREF(first); \
-		N_N(tgt); \
-	} while(0);
+/*
+ * Returns a new reference to the prefix of `key` under the `parent` prefix,
+ * or under the root if `parent` is None (the root prefix can't be told apart
+ * from the prefix of a member with an empty key).
+ * Joined prefixes are cached in a {parent: {key: prefix}} dictionary so
+ * members seen before under the same parent reuse the same prefix object.
+ */
+static PyObject *_join_prefix(ParseBasecoro *gen, PyObject *parent, PyObject *key)
+{
+	PyObject *prefix, *children;
+	if (gen->prefix_cache_size >= PREFIX_CACHE_SIZE) {
+		PyDict_Clear(gen->prefix_cache);
+		gen->prefix_cache_size = 0;
+	}
+
+	children = PyDict_GetItem(gen->prefix_cache, parent);
+	if (children) {
+		prefix = PyDict_GetItem(children, key);
+		if (prefix) {
+			Py_INCREF(prefix);
+			return prefix;
+		}
+	}
+	else {
+		N_N(children = PyDict_New());
+		int res = PyDict_SetItem(gen->prefix_cache, parent, children);
+		Py_DECREF(children);
+		N_M1(res);
+	}
+
+	// prefix = key if parent is None else parent + '.' + key
+	if (parent != Py_None) {
+		PyObject *parent_dot;
+		N_N(parent_dot = PyUnicode_Concat(parent, dot));
+		prefix = PyUnicode_Concat(parent_dot, key);
+		Py_DECREF(parent_dot);
+		N_N(prefix);
+	}
+	else {
+		Py_INCREF(key);
+		prefix = key;
+	}
+
+	if (PyDict_SetItem(children, key, prefix) == -1) {
+		Py_DECREF(prefix);
+		return NULL;
+	}
+	gen->prefix_cache_size++;
+	return prefix;
+}
 
 static PyObject *_send_impl_joint_path(ParseBasecoro *gen, PyObject *event, PyObject *value)
 {
@@ -65,18 +116,12 @@ static PyObject *_send_impl_joint_path(ParseBasecoro *gen, PyObject *event, PyOb
 	}
 	else if (event == enames.map_key_ename) {
 
-		// last_path = path_stack[-2]
-		// to_append = '.' + value if len(path_stack) > 1 else value
-		// new_path = path_stack[-2] + to_append
-		PyObject *last_path;
+		// path_stack[-1] = join(path_stack[-2], value)
+		PyObject *last_path, *new_path;
 		N_N(last_path = PySequence_GetItem(gen->path, npaths - 2));
-		if (npaths > 2) {
-			PyObject *last_path_dot;
-			CONCAT(last_path_dot, last_path, dot);
-			last_path = last_path_dot;
-		}
-		PyObject *new_path;
-		CONCAT(new_path, last_path, value);
+		new_path = _join_prefix(gen, npaths > 2 ? last_path : Py_None, value);
+		Py_DECREF(last_path);
+		N_N(new_path);
 		PyList_SetItem(gen->path, npaths - 1, new_path);
 
 		prefix = PySequence_GetItem(gen->path, npaths - 2);
@@ -89,21 +134,12 @@ static PyObject *_send_impl_joint_path(ParseBasecoro *gen, PyObject *event, PyOb
 	// If entering a map/array, append name to path
 	if (event == enames.start_array_ename) {
 
-		// to_append = '.item' if path_stack[-1] else 'item'
-		// path_stack.append(path_stack[-1] + to_append)
-		PyObject *last_path;
-		N_N(last_path = PySequence_GetItem(gen->path, npaths - 1));
-
-		if (PyUnicode_GET_SIZE(last_path) > 0) {
-			PyObject *new_path;
-			CONCAT(new_path, last_path, dotitem);
-			N_M1(PyList_Append(gen->path, new_path));
-			Py_DECREF(new_path);
-		}
-		else {
-			N_M1(PyList_Append(gen->path, item));
-			Py_DECREF(last_path);
-		}
+		// path_stack.append(join(path_stack[-1], 'item'))
+		PyObject *new_path;
+		N_N(new_path = _join_prefix(gen, npaths > 1 ? prefix : Py_None, item));
+		int res = PyList_Append(gen->path, new_path);
+		Py_DECREF(new_path);
+		N_M1(res);
 	}
 	else if (event == enames.start_map_ename) {
 		Py_INCREF(Py_None);
@@ -122,6 +158,15 @@ static PyObject *_to_next_coro(ParseBasecoro *gen, PyObject *path, PyObject *eve
 	if (KVItemsBasecoro_Check(gen->target_send)) {
 		return kvitems_basecoro_send_impl(gen->target_send, path, event, value);
 	}
+	if (ItemsMultiBasecoro_Check(gen->target_send)) {
+		return items_multi_basecoro_send_impl(gen->target_send, path, event, value);
+	}
+	if (ArraysBasecoro_Check(gen->target_send)) {
+		return arrays_basecoro_send_impl(gen->target_send, path, event, value);
+	}
+	if (ColumnsBasecoro_Check(gen->target_send)) {
+		return columns_basecoro_send_impl(gen->target_send, path, event, value);
+	}
 	return items_basecoro_send_impl(gen->target_send, path, event, value);
 }
 
@@ -164,6 +209,27 @@ PyObject* parse_basecoro_send_impl(PyObject *self, PyObject *event, PyObject *va
 	return _send_impl(gen, event, value);
 }
 
+int parse_basecoro_prunable(PyObject *self)
+{
+	ParseBasecoro *gen = (ParseBasecoro *)self;
+	if (gen->join_path) {
+		return 0;
+	}
+	if (KVItemsBasecoro_Check(gen->target_send)) {
+		return kvitems_basecoro_prunable(gen->target_send, gen->path);
+	}
+	if (ItemsMultiBasecoro_Check(gen->target_send)) {
+		return items_multi_basecoro_prunable(gen->target_send, gen->path);
+	}
+	if (ArraysBasecoro_Check(gen->target_send)) {
+		return arrays_basecoro_prunable(gen->target_send, gen->path);
+	}
+	if (ColumnsBasecoro_Check(gen->target_send)) {
+		return columns_basecoro_prunable(gen->target_send, gen->path);
+	}
+	return items_basecoro_prunable(gen->target_send, gen->path);
+}
+
 static PyObject* parse_basecoro_send(PyObject *self, PyObject *tuple)
 {
 	PyObject *event = PyTuple_GetItem(tuple, 0);
@@ -14,6 +14,11 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
 
+/**
+ * Maximum number of joined prefixes cached by a parse_basecoro coroutine
+ */
+#define PREFIX_CACHE_SIZE 1024
+
 /**
  * parse_basecoro coroutine object structure
  */
@@ -21,6 +26,8 @@ typedef struct {
     PyObject_HEAD
     PyObject *target_send;
     PyObject *path;
+    PyObject *prefix_cache;
+    Py_ssize_t prefix_cache_size;
     int join_path;
 } ParseBasecoro;
 
@@ -45,4 +52,15 @@ extern PyTypeObject ParseBasecoro_Type;
  */
 PyObject* parse_basecoro_send_impl(PyObject *self, PyObject *event, PyObject *value);
 
+/**
+ * Returns whether the value about to start can be skipped altogether because
+ * the target coroutine is not interested in anything at or under its path.
+ * This is only possible when paths are not joined, i.e., when the target is an
+ * items_basecoro, kvitems_basecoro, items_multi_basecoro, arrays_basecoro or
+ * columns_basecoro coroutine.
+ * @param self A parse_basecoro coroutine
+ * @return 1 if the value can be skipped, 0 if not, -1 in case of an error
+ */
+int parse_basecoro_prunable(PyObject *self);
+
 #endif // PARSE_BASECORO_H
\ No newline at end of file
@@ -0,0 +1,304 @@
+/*
+ * prefix_matcher_t type and associated methods
+ *
+ * Contributed by Rodrigo Tobar <rtobar@icrar.org>
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#ifndef PREFIX_MATCHER_H
+#define PREFIX_MATCHER_H
+
+#include "common.h"
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/**
+ * prefix_matcher_t structure.
+ *
+ * Follows the location of events in the document using the automaton of an
+ * ijson.common.PrefixMatcher object, which matches prefix patterns. Instead of
+ * looking at whole paths, a stack of automaton states is advanced as
+ * containers are entered and left.
+ */
+typedef struct _prefix_matcher {
+	PyObject *matcher;
+	PyObject *transitions;
+	Py_ssize_t *defaults;
+	char *accepting;
+	Py_ssize_t *states;
+	Py_ssize_t nstates;
+	Py_ssize_t states_size;
+	Py_ssize_t dead;
+} prefix_matcher_t;
+
+/**
+ * Initializes an empty prefix matcher which can be safely destroyed, and that
+ * is not active.
+ *
+ * @param pm the prefix matcher to empty-initialize
+ */
+static inline
+void prefix_matcher_create(prefix_matcher_t *pm)
+{
+	pm->matcher = NULL;
+	pm->transitions = NULL;
+	pm->defaults = NULL;
+	pm->accepting = NULL;
+	pm->states = NULL;
+	pm->nstates = 0;
+	pm->states_size = 0;
+	pm->dead = -1;
+}
+
+/**
+ * Returns whether the given prefix is a prefix pattern (i.e., it is not a list
+ * or a string), in which case a prefix matcher should be used for it.
+ */
+static inline
+int prefix_matcher_is_pattern(PyObject *prefix)
+{
+	return !PyList_Check(prefix) && !PyUnicode_Check(prefix)
+#if PY_MAJOR_VERSION < 3
+	       && !PyString_Check(prefix)
+#endif
+	       ;
+}
+
+/**
+ * Initializes a prefix matcher out of an ijson.common.PrefixMatcher object.
+ *
+ * @param pm the prefix matcher to initialize
+ * @param matcher the ijson.common.PrefixMatcher object
+ * @return 0 if successful, -1 otherwise
+ */
+static inline
+int prefix_matcher_init(prefix_matcher_t *pm, PyObject *matcher)
+{
+	PyObject *defaults, *accepting, *start, *dead;
+	Py_ssize_t i, size;
+
+	pm->matcher = matcher;
+	Py_INCREF(matcher);
+	M1_N(pm->transitions = PyObject_GetAttrString(matcher, "transitions"));
+	M1_N(defaults = PyObject_GetAttrString(matcher, "defaults"));
+	accepting = PyObject_GetAttrString(matcher, "accepting");
+	start = PyObject_GetAttrString(matcher, "start");
+	dead = PyObject_GetAttrString(matcher, "dead");
+	if (!accepting || !start || !dead) {
+		Py_DECREF(defaults);
+		Py_XDECREF(accepting);
+		Py_XDECREF(start);
+		Py_XDECREF(dead);
+		return -1;
+	}
+
+	size = PyList_Size(pm->transitions);
+	pm->defaults = PyMem_New(Py_ssize_t, size);
+	pm->accepting = PyMem_New(char, size);
+	pm->states_size = 16;
+	pm->states = PyMem_New(Py_ssize_t, pm->states_size);
+	if (!pm->defaults || !pm->accepting || !pm->states) {
+		Py_DECREF(defaults);
+		Py_DECREF(accepting);
+		Py_DECREF(start);
+		Py_DECREF(dead);
+		PyErr_NoMemory();
+		return -1;
+	}
+	for (i = 0; i < size; i++) {
+		pm->defaults[i] = PyNumber_AsSsize_t(PyList_GetItem(defaults, i), NULL);
+		pm->accepting[i] = (char)PyObject_IsTrue(PyList_GetItem(accepting, i));
+	}
+	pm->states[0] = PyNumber_AsSsize_t(start, NULL);
+	pm->nstates = 1;
+	pm->dead = PyNumber_AsSsize_t(dead, NULL);
+	Py_DECREF(defaults);
+	Py_DECREF(accepting);
+	Py_DECREF(start);
+	Py_DECREF(dead);
+	if (PyErr_Occurred()) {
+		return -1;
+	}
+	return 0;
+}
+
+/**
+ * Destroys a prefix matcher and all its associated contents
+ * @param pm The prefix matcher to destroy
+ */
+static inline
+void prefix_matcher_destroy(prefix_matcher_t *pm)
+{
+	Py_XDECREF(pm->matcher);
+	Py_XDECREF(pm->transitions);
+	PyMem_Free(pm->defaults);
+	PyMem_Free(pm->accepting);
+	PyMem_Free(pm->states);
+}
+
+/**
+ * Returns whether the prefix matcher is active (i.e., it has been initialized)
+ * @param pm A prefix matcher
+ */
+static inline
+int prefix_matcher_isactive(prefix_matcher_t *pm)
+{
+	return pm->matcher != NULL;
+}
+
+/**
+ * Returns the state reached by adding a component to a prefix in a given state
+ */
+static inline
+Py_ssize_t prefix_matcher_step(prefix_matcher_t *pm, Py_ssize_t state, PyObject *component)
+{
+	PyObject *next = PyDict_GetItem(PyList_GET_ITEM(pm->transitions, state), component);
+	if (next) {
+		return PyNumber_AsSsize_t(next, NULL);
+	}
+	return pm->defaults[state];
+}
+
+/**
+ * Advances the prefix matcher with a new event.
+ *
+ * @param pm A prefix matcher
+ * @param event The event name
+ * @param value The value of this event
+ * @return The automaton state of the event's prefix, or -1 in case of error
+ */
+static inline
+Py_ssize_t prefix_matcher_event(prefix_matcher_t *pm, PyObject *event, PyObject *value)
+{
+	Py_ssize_t state;
+	if (event == enames.map_key_ename) {
+		state = pm->states[pm->nstates - 2];
+		pm->states[pm->nstates - 1] = prefix_matcher_step(pm, state, value);
+		return state;
+	}
+	if (event == enames.end_map_ename || event == enames.end_array_ename) {
+		if (pm->nstates > 1) {
+			pm->nstates--;
+		}
+		return pm->states[pm->nstates - 1];
+	}
+
+	state = pm->states[pm->nstates - 1];
+	if (event == enames.start_map_ename || event == enames.start_array_ename) {
+		if (pm->nstates == pm->states_size) {
+			Py_ssize_t states_size = pm->states_size * 2;
+			Py_ssize_t *states = PyMem_Realloc(pm->states, states_size * sizeof(Py_ssize_t));
+			if (!states) {
+				PyErr_NoMemory();
+				return -1;
+			}
+			pm->states = states;
+			pm->states_size = states_size;
+		}
+		pm->states[pm->nstates++] = (event == enames.start_map_ename) ?
+		    -1 : prefix_matcher_step(pm, state, item);
+	}
+	return state;
+}
+
+/**
+ * Returns whether an event's prefix matches the pattern.
+ *
+ * @param pm A prefix matcher
+ * @param state The automaton state of the event's prefix, as given by
+ *  prefix_matcher_event
+ * @param path The path of the event; if it's a joined string (i.e., events are
+ *  not coming from this backend's parse_basecoro) it's matched as a whole
+ * @return 1 if the prefix matches, 0 if not, -1 in case of error
+ */
+static inline
+int prefix_matcher_matches(prefix_matcher_t *pm, Py_ssize_t state, PyObject *path)
+{
+	if (PyList_Check(path)) {
+		return pm->accepting[state];
+	}
+	PyObject *matches = PyObject_CallMethod(pm->matcher, "matches", "O", path);
+	X_N(matches, -1);
+	int res = PyObject_IsTrue(matches);
+	Py_DECREF(matches);
+	return res;
+}
+
+/**
+ * Returns whether nothing at or under the location of the last event can
+ * match the pattern anymore (i.e., the automaton reached its dead state).
+ *
+ * @param pm A prefix matcher
+ */
+static inline
+int prefix_matcher_isdead(prefix_matcher_t *pm)
+{
+	return pm->dead >= 0 && pm->states[pm->nstates - 1] == pm->dead;
+}
+
+/**
+ * Returns whether the value about to start at the location of the last event
+ * matches the pattern, before its own event is given.
+ *
+ * @param pm A prefix matcher
+ */
+static inline
+int prefix_matcher_next_matches(prefix_matcher_t *pm)
+{
+	Py_ssize_t state = pm->states[pm->nstates - 1];
+	return state >= 0 && pm->accepting[state];
+}
+
+/**
+ * Returns whether the container enclosing the location of the last event
+ * matches the pattern.
+ *
+ * @param pm A prefix matcher
+ */
+static inline
+int prefix_matcher_parent_matches(prefix_matcher_t *pm)
+{
+	Py_ssize_t state;
+	if (pm->nstates < 2) {
+		return 0;
+	}
+	state = pm->states[pm->nstates - 2];
+	return state >= 0 && pm->accepting[state];
+}
+
+/**
+ * Returns whether a path, given as a list of components, diverges from a
+ * prefix, also given as a list of components, meaning that nothing at or under
+ * path can match prefix.
+ *
+ * Only the last component of path is compared: this is checked for every new
+ * value in the document, and values under diverging paths are never checked,
+ * so all previous components are known to match already.
+ *
+ * @param path The path of a value
+ * @param prefix The prefix to compare to
+ * @return 1 if path diverges from prefix, 0 if not, -1 in case of error
+ */
+static inline
+int prefix_diverges(PyObject *path, PyObject *prefix)
+{
+	Py_ssize_t depth;
+	int cmp;
+	if (!PyList_Check(path) || !PyList_Check(prefix)) {
+		return 0;
+	}
+	depth = PyList_GET_SIZE(path);
+	if (depth == 0 || depth > PyList_GET_SIZE(prefix)) {
+		return 0;
+	}
+	cmp = PyObject_RichCompareBool(PyList_GET_ITEM(path, depth - 1),
+	                               PyList_GET_ITEM(prefix, depth - 1), Py_EQ);
+	X_LZ(cmp, -1);
+	return !cmp;
+}
+
+#endif /* PREFIX_MATCHER_H */
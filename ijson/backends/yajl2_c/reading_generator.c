@@ -19,12 +19,29 @@ int reading_generator_init(reading_generator_t *self, PyObject *args, pipeline_n
 {
 	PyObject *file;
 	Py_ssize_t buf_size = 64 * 1024;
-	M1_Z(PyArg_ParseTuple(args, "On", &file, &buf_size));
+	self->batch = 0;
+	M1_Z(PyArg_ParseTuple(args, "On|i", &file, &buf_size, &self->batch));
 
-	// Handle both "read" and "readinto" functions.
+	// Objects exposing their memory (e.g., mmap objects) are parsed in place;
+	// otherwise handle both "read" and "readinto" functions.
 	// The latter allocates a bytearray, which is how we distinguish between
 	// the two cases later
-	if (PyObject_HasAttrString(file, "readinto")) {
+	if (PyObject_CheckBuffer(file)) {
+		M1_M1(PyObject_GetBuffer(file, &self->view, PyBUF_SIMPLE));
+		self->view_chunk = buf_size;
+		self->view_pos = 0;
+		if (PyObject_HasAttrString(file, "tell")) {
+			PyObject *ppos = PyObject_CallMethod(file, "tell", NULL);
+			M1_N(ppos);
+			self->view_pos = PyNumber_AsSsize_t(ppos, NULL);
+			Py_DECREF(ppos);
+			if (self->view_pos == -1 && PyErr_Occurred()) {
+				return -1;
+			}
+			self->view_pos = Py_MAX(0, Py_MIN(self->view_pos, self->view.len));
+		}
+	}
+	else if (PyObject_HasAttrString(file, "readinto")) {
 		M1_N(self->read_func = PyObject_GetAttrString(file, "readinto"));
 		PyObject *pbuf_size = Py_BuildValue("n", buf_size);
 		self->buffer = PyObject_CallFunctionObjArgs((PyObject *)&PyByteArray_Type, pbuf_size, NULL);
@@ -53,6 +70,9 @@ void reading_generator_dealloc(reading_generator_t *self)
 	Py_XDECREF(self->events);
 	Py_XDECREF(self->buffer);
 	Py_XDECREF(self->buf_size);
+	if (self->view.obj) {
+		PyBuffer_Release(&self->view);
+	}
 	Py_XDECREF(self->coro);
 }
 
@@ -60,19 +80,30 @@ PyObject *reading_generator_next(reading_generator_t *self)
 {
 	PyObject *events = self->events;
 	Py_ssize_t nevents = PyList_Size(events);
-	BasicParseBasecoro *basic_parse_basecoro = (BasicParseBasecoro *)self->coro;
 	while (nevents == 0) {
 
 		/* Read data and pass it down to the co-routine */
 		Py_buffer view;
 		Py_ssize_t length;
-		if (self->buffer == NULL) {
+		if (self->view.obj) {
+			// Parse the next chunk of memory in place
+			length = Py_MIN(self->view_chunk, self->view.len - self->view_pos);
+			N_N(basic_parse_basecoro_parse(self->coro, (char *)self->view.buf + self->view_pos, length, 1));
+			self->view_pos += length;
+			nevents = PyList_Size(events);
+			if (length == 0) {
+				break;
+			}
+			continue;
+		}
+		else if (self->buffer == NULL) {
 			// read_func is "read"
 			PyObject *pbuffer = PyObject_CallFunctionObjArgs(self->read_func, self->buf_size, NULL);
 			N_N(pbuffer);
 			N_M1(PyObject_GetBuffer(pbuffer, &view, PyBUF_SIMPLE));
 			length = view.len;
-			PyObject *send_res = ijson_yajl_parse(basic_parse_basecoro->h, view.buf, view.len);
+			PyObject *send_res = basic_parse_basecoro_parse(self->coro, view.buf, view.len, 0);
+			PyBuffer_Release(&view);
 			Py_DECREF(pbuffer);
 			N_N(send_res);
 		}
@@ -84,9 +115,10 @@ PyObject *reading_generator_next(reading_generator_t *self)
 			N_M1(length);
 			Py_DECREF(plength);
 			N_M1(PyObject_GetBuffer(self->buffer, &view, PyBUF_SIMPLE));
-			N_N(ijson_yajl_parse(basic_parse_basecoro->h, view.buf, length));
+			PyObject *send_res = basic_parse_basecoro_parse(self->coro, view.buf, length, 0);
+			PyBuffer_Release(&view);
+			N_N(send_res);
 		}
-		PyBuffer_Release(&view);
 		nevents = PyList_Size(events);
 
 		if (length == 0) {
@@ -95,6 +127,12 @@ PyObject *reading_generator_next(reading_generator_t *self)
 	}
 
 	// events are now probably available
+	if (nevents > 0 && self->batch) {
+		PyObject *batch;
+		N_N(batch = PyList_GetSlice(events, 0, nevents));
+		N_M1(PySequence_DelSlice(events, 0, nevents));
+		return batch;
+	}
 	if (nevents > 0) {
 		PyObject *val = PyList_GetItem(events, self->pos++);
 		Py_INCREF(val);
@@ -24,17 +24,27 @@ typedef struct _reading_generator {
     PyObject *read_func;
     PyObject *buf_size;
     PyObject *buffer;
+    Py_buffer view;
+    Py_ssize_t view_pos;
+    Py_ssize_t view_chunk;
     PyObject *events;
     Py_ssize_t pos;
     int finished;
+    int batch;
 } reading_generator_t;
 
 /**
  * Initialises a reading_generator_t object from the given arguments, which
- * should contain a file-like object and a buffer size (optional).
+ * should contain a file-like object, a buffer size (optional) and whether
+ * events are returned in batches (optional).
+ *
+ * File-like objects exposing their contents through the buffer protocol
+ * (e.g., mmap objects) are not read; instead their memory is parsed in place,
+ * in chunks of the given buffer size, starting at their current position.
  *
  * @param self A reading_generator_t object
- * @param args A tuple containing a file-like object and a buffer size (optional)
+ * @param args A tuple containing a file-like object, a buffer size (optional)
+ *  and a batch flag (optional)
  * @param coro_pipeline A description of the coroutine pipeline to create internally
  *  in this reading generator, where data will be pushed to, and which will send
  *  events to the events list
@@ -51,9 +61,10 @@ void reading_generator_dealloc(reading_generator_t *self);
 /**
  * Advances the reading_generator_t object by reading data off the underlying
  * file-like object, feeding it into its coro, with results ending
- * up in self->events, from which they are returned.
+ * up in self->events, from which they are returned. In batch mode all the
+ * events generated out of a chunk of data are returned together in a list.
  * @param self A reading_generator_t object
- * @return The next event generated from this iterative process
+ * @return The next event (or batch of events) generated from this iterative process
  */
 PyObject *reading_generator_next(reading_generator_t *self);
 
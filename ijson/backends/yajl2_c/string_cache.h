@@ -0,0 +1,171 @@
+/*
+ * string_cache_t type and associated methods
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#ifndef STRING_CACHE_H
+#define STRING_CACHE_H
+
+#include <string.h>
+#include "common.h"
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/* Number of entries in a cache, must be a power of two */
+#define STRING_CACHE_SIZE 512
+/* Longest UTF-8 string (in bytes) that is cached */
+#define STRING_CACHE_MAX_LENGTH 40
+/* Number of lookups after which a cache with few hits is given up */
+#define STRING_CACHE_PROBATION 4096
+
+/**
+ * An entry of a string cache: an object, and the UTF-8 bytes it was made of
+ */
+typedef struct _string_cache_entry {
+	PyObject *value;
+	size_t length;
+	char utf8[STRING_CACHE_MAX_LENGTH];
+} string_cache_entry;
+
+/**
+ * string_cache_t structure.
+ *
+ * A bounded cache of string objects keyed on their raw UTF-8 bytes, so
+ * repeated strings (like the keys of many objects with the same shape) are
+ * created only once and shared. It is a direct-mapped table: each string can
+ * only live in the entry its hash points to, replacing whichever string was
+ * there before.
+ *
+ * Caches that see less than one hit every four lookups after a probation
+ * period are deactivated, as then they only add overhead.
+ */
+typedef struct _string_cache {
+	string_cache_entry *entries;
+	size_t lookups;
+	size_t hits;
+} string_cache_t;
+
+/**
+ * Initializes an empty string cache which can be safely destroyed, and that
+ * is not active.
+ */
+static inline
+void string_cache_create(string_cache_t *cache)
+{
+	cache->entries = NULL;
+	cache->lookups = 0;
+	cache->hits = 0;
+}
+
+/**
+ * Allocates the entries of a string cache, making it active.
+ *
+ * @return 0 if successful, -1 otherwise
+ */
+static inline
+int string_cache_init(string_cache_t *cache)
+{
+	cache->entries = PyMem_New(string_cache_entry, STRING_CACHE_SIZE);
+	if (!cache->entries) {
+		PyErr_NoMemory();
+		return -1;
+	}
+	memset(cache->entries, 0, sizeof(string_cache_entry) * STRING_CACHE_SIZE);
+	return 0;
+}
+
+/**
+ * Destroys a string cache, releasing all the strings it holds.
+ */
+static inline
+void string_cache_destroy(string_cache_t *cache)
+{
+	size_t i;
+	if (!cache->entries) {
+		return;
+	}
+	for (i = 0; i < STRING_CACHE_SIZE; i++) {
+		Py_XDECREF(cache->entries[i].value);
+	}
+	PyMem_Free(cache->entries);
+	cache->entries = NULL;
+}
+
+/**
+ * A function creating a new object out of some UTF-8 bytes
+ */
+typedef PyObject *(*string_cache_factory)(const char *utf8, size_t length);
+
+/**
+ * Returns a new reference to the object created by `factory` for the given
+ * UTF-8 contents, taken from the cache if possible. Objects stored in a cache
+ * are shared, so they must be immutable.
+ *
+ * @param cache A string cache, which simply creates objects if not active
+ * @param utf8 The UTF-8 bytes of the object
+ * @param length The number of bytes in utf8
+ * @param factory The function creating the object if it isn't cached
+ * @return A new reference to the object, or NULL in case of error
+ */
+static inline
+PyObject *string_cache_get_or_create(string_cache_t *cache, const char *utf8, size_t length,
+                                     string_cache_factory factory)
+{
+	size_t i, hash = 2166136261u;
+	string_cache_entry *entry;
+	PyObject *value;
+
+	if (!cache->entries || length > STRING_CACHE_MAX_LENGTH) {
+		return factory(utf8, length);
+	}
+	if (++cache->lookups == STRING_CACHE_PROBATION && cache->hits < STRING_CACHE_PROBATION / 4) {
+		string_cache_destroy(cache);
+		return factory(utf8, length);
+	}
+
+	/* FNV-1a */
+	for (i = 0; i < length; i++) {
+		hash = (hash ^ (unsigned char)utf8[i]) * 16777619u;
+	}
+	entry = &cache->entries[hash & (STRING_CACHE_SIZE - 1)];
+	if (entry->value && entry->length == length && memcmp(entry->utf8, utf8, length) == 0) {
+		cache->hits++;
+		Py_INCREF(entry->value);
+		return entry->value;
+	}
+
+	X_N(value = factory(utf8, length), NULL);
+	Py_XDECREF(entry->value);
+	Py_INCREF(value);
+	entry->value = value;
+	entry->length = length;
+	memcpy(entry->utf8, utf8, length);
+	return value;
+}
+
+static inline
+PyObject *string_from_utf8(const char *utf8, size_t length)
+{
+	return STRING_FROM_UTF8(utf8, length);
+}
+
+/**
+ * Returns a new reference to a string object with the given UTF-8 contents,
+ * taken from the cache if possible.
+ *
+ * @param cache A string cache, which simply creates strings if not active
+ * @param utf8 The UTF-8 bytes of the string
+ * @param length The number of bytes in utf8
+ * @return A new reference to the string, or NULL in case of error
+ */
+static inline
+PyObject *string_cache_get(string_cache_t *cache, const unsigned char *utf8, size_t length)
+{
+	return string_cache_get_or_create(cache, (const char *)utf8, length, string_from_utf8);
+}
+
+#endif /* STRING_CACHE_H */
@@ -0,0 +1,357 @@
+/*
+ * typed_buffer_t type and associated methods
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#ifndef TYPED_BUFFER_H
+#define TYPED_BUFFER_H
+
+#include <limits.h>
+#include <string.h>
+#include "common.h"
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/* Integers with up to this many digits always fit in a long long */
+#define TYPED_BUFFER_MAX_DIGITS 18
+/* Numbers up to this long are copied into a buffer on the stack */
+#define TYPED_BUFFER_NUMBER_SIZE 64
+/* Initial number of elements of a buffer */
+#define TYPED_BUFFER_INITIAL_CAPACITY 1024
+
+/**
+ * typed_buffer_t structure.
+ *
+ * A growing buffer of C numbers of one of the types of array.array, given by
+ * its typecode, which is turned into an array.array object once complete.
+ * Numbers are checked to fit in the buffer's type before being stored.
+ */
+typedef struct _typed_buffer {
+	char typecode[2];
+	Py_ssize_t itemsize;
+	char *data;
+	Py_ssize_t length;
+	Py_ssize_t capacity;
+	Py_ssize_t max_capacity;
+} typed_buffer_t;
+
+/**
+ * Initializes an empty typed buffer which can be safely destroyed.
+ */
+static inline
+void typed_buffer_create(typed_buffer_t *buffer)
+{
+	buffer->typecode[0] = 0;
+	buffer->itemsize = 0;
+	buffer->data = NULL;
+	buffer->length = 0;
+	buffer->capacity = 0;
+	buffer->max_capacity = 0;
+}
+
+/**
+ * Initializes a typed buffer for numbers of the given array.array typecode.
+ *
+ * @param buffer The buffer to initialize
+ * @param typecode One of bBhHiIlLqQfd
+ * @param max_capacity The number of elements the buffer never grows beyond,
+ *  or 0 for no limit
+ * @return 0 if successful, -1 otherwise
+ */
+static inline
+int typed_buffer_init(typed_buffer_t *buffer, const char *typecode, Py_ssize_t max_capacity)
+{
+	switch (strlen(typecode) == 1 ? typecode[0] : 0) {
+	case 'b': case 'B': buffer->itemsize = sizeof(char); break;
+	case 'h': case 'H': buffer->itemsize = sizeof(short); break;
+	case 'i': case 'I': buffer->itemsize = sizeof(int); break;
+	case 'l': case 'L': buffer->itemsize = sizeof(long); break;
+	case 'q': case 'Q': buffer->itemsize = sizeof(long long); break;
+	case 'f': buffer->itemsize = sizeof(float); break;
+	case 'd': buffer->itemsize = sizeof(double); break;
+	default:
+		PyErr_Format(PyExc_ValueError, "Invalid typecode '%s', expected one of bBhHiIlLqQfd",
+		             typecode);
+		return -1;
+	}
+	buffer->typecode[0] = typecode[0];
+	buffer->typecode[1] = 0;
+	buffer->max_capacity = max_capacity;
+	return 0;
+}
+
+/**
+ * Destroys a typed buffer, releasing its memory.
+ */
+static inline
+void typed_buffer_destroy(typed_buffer_t *buffer)
+{
+	PyMem_Free(buffer->data);
+	buffer->data = NULL;
+}
+
+/**
+ * Returns a new array.array object with the contents of a typed buffer, which
+ * is emptied.
+ *
+ * @param buffer A typed buffer
+ * @param array_type The array.array type
+ * @return A new array.array object, or NULL in case of error
+ */
+static inline
+PyObject *typed_buffer_to_array(typed_buffer_t *buffer, PyObject *array_type)
+{
+	PyObject *array, *res;
+	N_N(array = PyObject_CallFunction(array_type, "s", buffer->typecode));
+	if (buffer->length) {
+#if PY_MAJOR_VERSION >= 3
+		PyObject *view = PyMemoryView_FromMemory(buffer->data, buffer->length * buffer->itemsize,
+		                                         PyBUF_READ);
+		if (!view) {
+			Py_DECREF(array);
+			return NULL;
+		}
+		res = PyObject_CallMethod(array, "frombytes", "O", view);
+		Py_DECREF(view);
+#else
+		res = PyObject_CallMethod(array, "fromstring", "s#", buffer->data,
+		                          buffer->length * buffer->itemsize);
+#endif
+		if (!res) {
+			Py_DECREF(array);
+			return NULL;
+		}
+		Py_DECREF(res);
+	}
+	buffer->length = 0;
+	return array;
+}
+
+/*
+ * Makes room for a new number, returns -1 in case of error
+ */
+static inline
+int _typed_buffer_reserve(typed_buffer_t *buffer)
+{
+	if (buffer->length < buffer->capacity) {
+		return 0;
+	}
+	Py_ssize_t capacity = buffer->capacity ? buffer->capacity * 2 : TYPED_BUFFER_INITIAL_CAPACITY;
+	if (buffer->max_capacity && capacity > buffer->max_capacity) {
+		capacity = buffer->max_capacity;
+	}
+	char *data = PyMem_Realloc(buffer->data, capacity * buffer->itemsize);
+	if (!data) {
+		PyErr_NoMemory();
+		return -1;
+	}
+	buffer->data = data;
+	buffer->capacity = capacity;
+	return 0;
+}
+
+#define _TYPED_BUFFER_STORE(buffer, type, value) \
+	{ \
+		type typed_value = (type)(value); \
+		memcpy((buffer)->data + (buffer)->length * (buffer)->itemsize, &typed_value, sizeof(type)); \
+	}
+
+/**
+ * Stores a floating point number, converted to the buffer's type.
+ *
+ * @return 0 if successful, -1 in case of error
+ */
+static inline
+int typed_buffer_store_double(typed_buffer_t *buffer, double value)
+{
+	M1_M1(_typed_buffer_reserve(buffer));
+	if (buffer->typecode[0] == 'f') {
+		_TYPED_BUFFER_STORE(buffer, float, value);
+	}
+	else {
+		_TYPED_BUFFER_STORE(buffer, double, value);
+	}
+	buffer->length++;
+	return 0;
+}
+
+/**
+ * Stores an integer, converted to the buffer's type.
+ *
+ * @return 1 if stored, 0 if it doesn't fit in the buffer's type, -1 in case
+ *  of error
+ */
+static inline
+int typed_buffer_store_integer(typed_buffer_t *buffer, long long value)
+{
+	char typecode = buffer->typecode[0];
+	if ((typecode == 'b' && (value < SCHAR_MIN || value > SCHAR_MAX)) ||
+	    (typecode == 'B' && (value < 0 || value > UCHAR_MAX)) ||
+	    (typecode == 'h' && (value < SHRT_MIN || value > SHRT_MAX)) ||
+	    (typecode == 'H' && (value < 0 || value > USHRT_MAX)) ||
+	    (typecode == 'i' && (value < INT_MIN || value > INT_MAX)) ||
+	    (typecode == 'I' && (value < 0 || (unsigned long long)value > UINT_MAX)) ||
+	    (typecode == 'l' && (value < LONG_MIN || value > LONG_MAX)) ||
+	    (typecode == 'L' && (value < 0 || (unsigned long long)value > ULONG_MAX)) ||
+	    (typecode == 'Q' && value < 0)) {
+		return 0;
+	}
+	M1_M1(_typed_buffer_reserve(buffer));
+	switch (typecode) {
+	case 'b': _TYPED_BUFFER_STORE(buffer, signed char, value); break;
+	case 'B': _TYPED_BUFFER_STORE(buffer, unsigned char, value); break;
+	case 'h': _TYPED_BUFFER_STORE(buffer, short, value); break;
+	case 'H': _TYPED_BUFFER_STORE(buffer, unsigned short, value); break;
+	case 'i': _TYPED_BUFFER_STORE(buffer, int, value); break;
+	case 'I': _TYPED_BUFFER_STORE(buffer, unsigned int, value); break;
+	case 'l': _TYPED_BUFFER_STORE(buffer, long, value); break;
+	case 'L': _TYPED_BUFFER_STORE(buffer, unsigned long, value); break;
+	case 'q': _TYPED_BUFFER_STORE(buffer, long long, value); break;
+	case 'Q': _TYPED_BUFFER_STORE(buffer, unsigned long long, value); break;
+	case 'f': _TYPED_BUFFER_STORE(buffer, float, value); break;
+	case 'd': _TYPED_BUFFER_STORE(buffer, double, value); break;
+	}
+	buffer->length++;
+	return 1;
+}
+
+/**
+ * Stores an integer too big for a long long, which only fits in the widest
+ * unsigned types.
+ *
+ * @return 1 if stored, 0 if not, -1 in case of error
+ */
+static inline
+int typed_buffer_store_unsigned(typed_buffer_t *buffer, unsigned long long value)
+{
+	char typecode = buffer->typecode[0];
+	if (typecode != 'Q' && (typecode != 'L' || value > ULONG_MAX)) {
+		return 0;
+	}
+	M1_M1(_typed_buffer_reserve(buffer));
+	if (typecode == 'L') {
+		_TYPED_BUFFER_STORE(buffer, unsigned long, value);
+	}
+	else {
+		_TYPED_BUFFER_STORE(buffer, unsigned long long, value);
+	}
+	buffer->length++;
+	return 1;
+}
+
+/**
+ * Stores a Python number, raising a ValueError if it can't be stored in the
+ * buffer's type.
+ *
+ * @return 0 if successful, -1 in case of error
+ */
+static inline
+int typed_buffer_store(typed_buffer_t *buffer, PyObject *value)
+{
+	int stored = 0;
+	char typecode = buffer->typecode[0];
+	if (typecode == 'f' || typecode == 'd') {
+		double dval = PyFloat_AsDouble(value);
+		if (Py_IS_INFINITY(dval)) {
+			PyErr_Format(JSONError, "float overflow: %S", value);
+			return -1;
+		}
+		if (dval != -1.0 || !PyErr_Occurred()) {
+			M1_M1(typed_buffer_store_double(buffer, dval));
+			stored = 1;
+		}
+	}
+#if PY_MAJOR_VERSION >= 3
+	else if (PyLong_Check(value)) {
+#else
+	else if (PyLong_Check(value) || PyInt_Check(value)) {
+#endif
+		long long lval = PyLong_AsLongLong(value);
+		if (lval != -1 || !PyErr_Occurred()) {
+			M1_M1(stored = typed_buffer_store_integer(buffer, lval));
+		}
+		else if (PyErr_ExceptionMatches(PyExc_OverflowError)) {
+			PyErr_Clear();
+			unsigned long long ulval = PyLong_AsUnsignedLongLong(value);
+			if (ulval != (unsigned long long)-1 || !PyErr_Occurred()) {
+				M1_M1(stored = typed_buffer_store_unsigned(buffer, ulval));
+			}
+		}
+	}
+	if (stored) {
+		return 0;
+	}
+
+	if (PyErr_Occurred()) {
+		if (!PyErr_ExceptionMatches(PyExc_OverflowError) &&
+		    !PyErr_ExceptionMatches(PyExc_TypeError)) {
+			return -1;
+		}
+		PyErr_Clear();
+	}
+	PyObject *msg;
+	M1_N(msg = PyUnicode_FromFormat("%R can't be stored in an array of type '%s'",
+	                                value, buffer->typecode));
+	PyErr_SetObject(PyExc_ValueError, msg);
+	Py_DECREF(msg);
+	return -1;
+}
+
+/**
+ * Stores a number straight out of its JSON text, if that can be done
+ * without loss or errors.
+ *
+ * @param buffer A typed buffer
+ * @param numberVal The text of the number, as given by yajl
+ * @param numberLen The length of numberVal
+ * @return 1 if the number was stored, 0 if not, -1 in case of an error
+ */
+static inline
+int typed_buffer_store_number(typed_buffer_t *buffer, const char *numberVal, size_t numberLen)
+{
+	char typecode = buffer->typecode[0];
+	if (typecode == 'f' || typecode == 'd') {
+		// PyOS_string_to_double needs a null-terminated string
+		char text[TYPED_BUFFER_NUMBER_SIZE];
+		if (numberLen >= TYPED_BUFFER_NUMBER_SIZE) {
+			return 0;
+		}
+		memcpy(text, numberVal, numberLen);
+		text[numberLen] = 0;
+		double value = PyOS_string_to_double(text, NULL, NULL);
+		if (value == -1.0 && PyErr_Occurred()) {
+			return -1;
+		}
+		if (Py_IS_INFINITY(value)) {
+			PyErr_Format(JSONError, "float overflow: %s", text);
+			return -1;
+		}
+		M1_M1(typed_buffer_store_double(buffer, value));
+		return 1;
+	}
+
+	// Non-integers, or integers that might not fit in a long long, are
+	// left to the caller, which produces the relevant errors
+	const char *digits = numberVal, *end = numberVal + numberLen;
+	int negative = (*digits == '-');
+	if (negative) {
+		digits++;
+	}
+	if (end - digits > TYPED_BUFFER_MAX_DIGITS) {
+		return 0;
+	}
+	long long value = 0;
+	for (; digits != end; digits++) {
+		if (*digits < '0' || *digits > '9') {
+			return 0;
+		}
+		value = value * 10 + (*digits - '0');
+	}
+	return typed_buffer_store_integer(buffer, negative ? -value : value);
+}
+
+#endif /* TYPED_BUFFER_H */
@@ -0,0 +1,462 @@
+/*
+ * writer_coro coroutine implementation for ijson's C backend
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#include <math.h>
+
+#include "common.h"
+#include "writer.h"
+
+/*
+ * __init__, destructor, __iter__ and __next__
+ */
+static int writer_init(WriterCoro *self, PyObject *args, PyObject *kwargs)
+{
+	self->write = NULL;
+	self->buffer = NULL;
+	self->stack = NULL;
+	self->length = 0;
+	self->depth = 0;
+	self->stack_size = 0;
+	self->state = WRITER_VALUE;
+	self->closed = 0;
+
+	self->size = 64 * 1024;
+	M1_Z(PyArg_ParseTuple(args, "O|n", &(self->write), &(self->size)));
+	Py_INCREF(self->write);
+	if (self->size < 0) {
+		self->size = 0;
+	}
+	self->buffer = PyMem_Malloc(self->size ? self->size : 1);
+	if (!self->buffer) {
+		PyErr_NoMemory();
+		return -1;
+	}
+	return 0;
+}
+
+/*
+ * Hands the text written so far to the write function
+ */
+static int writer_flush(WriterCoro *self)
+{
+	if (!self->length) {
+		return 0;
+	}
+	PyObject *data, *res;
+#if PY_MAJOR_VERSION >= 3
+	M1_N(data = PyBytes_FromStringAndSize(self->buffer, self->length));
+#else
+	M1_N(data = PyString_FromStringAndSize(self->buffer, self->length));
+#endif
+	self->length = 0;
+	res = PyObject_CallFunctionObjArgs(self->write, data, NULL);
+	Py_DECREF(data);
+	M1_N(res);
+	Py_DECREF(res);
+	return 0;
+}
+
+static void writer_dealloc(WriterCoro *self)
+{
+	if (!self->closed && self->length && self->write) {
+		PyObject *type, *value, *traceback;
+		PyErr_Fetch(&type, &value, &traceback);
+		if (writer_flush(self) == -1) {
+			PyErr_WriteUnraisable((PyObject *)self);
+		}
+		PyErr_Restore(type, value, traceback);
+	}
+	Py_XDECREF(self->write);
+	PyMem_Free(self->buffer);
+	PyMem_Free(self->stack);
+	Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+/*
+ * Appends text to the buffer, writing it out first if there's no room left.
+ * Text that doesn't fit in the buffer at all is written out directly.
+ */
+static int writer_append(WriterCoro *self, const char *text, Py_ssize_t length)
+{
+	if (self->length + length > self->size) {
+		M1_M1(writer_flush(self));
+		if (length > self->size) {
+			PyObject *data, *res;
+#if PY_MAJOR_VERSION >= 3
+			M1_N(data = PyBytes_FromStringAndSize(text, length));
+#else
+			M1_N(data = PyString_FromStringAndSize(text, length));
+#endif
+			res = PyObject_CallFunctionObjArgs(self->write, data, NULL);
+			Py_DECREF(data);
+			M1_N(res);
+			Py_DECREF(res);
+			return 0;
+		}
+	}
+	memcpy(self->buffer + self->length, text, length);
+	self->length += length;
+	return 0;
+}
+
+static int writer_push(WriterCoro *self, enum writer_state state)
+{
+	if (self->depth == self->stack_size) {
+		Py_ssize_t stack_size = self->stack_size ? self->stack_size * 2 : 16;
+		enum writer_state *stack = PyMem_Realloc(self->stack, stack_size * sizeof(enum writer_state));
+		if (!stack) {
+			PyErr_NoMemory();
+			return -1;
+		}
+		self->stack = stack;
+		self->stack_size = stack_size;
+	}
+	self->stack[self->depth++] = state;
+	return 0;
+}
+
+/*
+ * Writes a string as a quoted JSON string, escaping only quotes, backslashes
+ * and control characters, like the json module does with ensure_ascii=False
+ */
+static int writer_string(WriterCoro *self, PyObject *value)
+{
+	const char *text;
+	Py_ssize_t length;
+	PyObject *utf8 = NULL;
+#if PY_MAJOR_VERSION >= 3
+	if (!PyUnicode_Check(value)) {
+		PyErr_Format(PyExc_TypeError, "Expected a string, found %R", value);
+		return -1;
+	}
+	M1_N(text = PyUnicode_AsUTF8AndSize(value, &length));
+#else
+	if (PyUnicode_Check(value)) {
+		M1_N(utf8 = PyUnicode_AsUTF8String(value));
+		value = utf8;
+	}
+	if (PyString_AsStringAndSize(value, (char **)&text, &length) == -1) {
+		Py_XDECREF(utf8);
+		return -1;
+	}
+#endif
+
+	static const char hex[] = "0123456789abcdef";
+	char escape[6] = {'\\', 'u', '0', '0', 0, 0};
+	int ret = writer_append(self, "\"", 1);
+	Py_ssize_t start = 0, i;
+	for (i = 0; ret == 0 && i < length; i++) {
+		unsigned char c = (unsigned char)text[i];
+		if (c >= 0x20 && c != '"' && c != '\\') {
+			continue;
+		}
+		ret = writer_append(self, text + start, i - start);
+		start = i + 1;
+		if (ret == -1) {
+			break;
+		}
+		switch (c) {
+			case '"': ret = writer_append(self, "\\\"", 2); break;
+			case '\\': ret = writer_append(self, "\\\\", 2); break;
+			case '\n': ret = writer_append(self, "\\n", 2); break;
+			case '\r': ret = writer_append(self, "\\r", 2); break;
+			case '\t': ret = writer_append(self, "\\t", 2); break;
+			case '\b': ret = writer_append(self, "\\b", 2); break;
+			case '\f': ret = writer_append(self, "\\f", 2); break;
+			default:
+				escape[4] = hex[c >> 4];
+				escape[5] = hex[c & 0xf];
+				ret = writer_append(self, escape, 6);
+		}
+	}
+	if (ret == 0) {
+		ret = writer_append(self, text + start, length - start);
+	}
+	if (ret == 0) {
+		ret = writer_append(self, "\"", 1);
+	}
+	Py_XDECREF(utf8);
+	return ret;
+}
+
+/*
+ * Whether text is a number as defined by JSON
+ */
+static int is_json_number(const char *text, Py_ssize_t length)
+{
+	const char *end = text + length;
+	if (text < end && *text == '-') {
+		text++;
+	}
+	if (text < end && *text == '0') {
+		text++;
+	}
+	else if (text < end && *text >= '1' && *text <= '9') {
+		while (++text < end && *text >= '0' && *text <= '9');
+	}
+	else {
+		return 0;
+	}
+	if (text < end && *text == '.') {
+		if (++text == end || *text < '0' || *text > '9') {
+			return 0;
+		}
+		while (++text < end && *text >= '0' && *text <= '9');
+	}
+	if (text < end && (*text == 'e' || *text == 'E')) {
+		if (++text < end && (*text == '-' || *text == '+')) {
+			text++;
+		}
+		if (text == end || *text < '0' || *text > '9') {
+			return 0;
+		}
+		while (++text < end && *text >= '0' && *text <= '9');
+	}
+	return text == end;
+}
+
+/*
+ * Writes a number, which can be an int, a float, a Decimal, or its text (as
+ * given by the "str" and "raw" number types)
+ */
+static int writer_number(WriterCoro *self, PyObject *value)
+{
+	char digits[32];
+	if (PyLong_CheckExact(value)) {
+		int overflow;
+		long long number = PyLong_AsLongLongAndOverflow(value, &overflow);
+		if (!overflow) {
+			if (number == -1 && PyErr_Occurred()) {
+				return -1;
+			}
+			int length = snprintf(digits, sizeof(digits), "%lld", number);
+			return writer_append(self, digits, length);
+		}
+	}
+	else if (PyFloat_CheckExact(value)) {
+		double number = PyFloat_AS_DOUBLE(value);
+		if (!isfinite(number)) {
+			PyErr_Format(PyExc_ValueError, "Invalid number: %R", value);
+			return -1;
+		}
+		char *repr;
+		M1_N(repr = PyOS_double_to_string(number, 'r', 0, Py_DTSF_ADD_DOT_0, NULL));
+		int ret = writer_append(self, repr, strlen(repr));
+		PyMem_Free(repr);
+		return ret;
+	}
+
+	PyObject *text;
+	if (PyBytes_Check(value)) {
+		Py_INCREF(value);
+		text = value;
+	}
+	else if (PyUnicode_Check(value)) {
+		M1_N(text = PyUnicode_AsUTF8String(value));
+	}
+	else {
+		PyObject *str;
+		M1_N(str = PyObject_Str(value));
+#if PY_MAJOR_VERSION >= 3
+		text = PyUnicode_AsUTF8String(str);
+		Py_DECREF(str);
+		M1_N(text);
+#else
+		text = str;
+#endif
+	}
+	const char *number = PyBytes_AS_STRING(text);
+	Py_ssize_t length = PyBytes_GET_SIZE(text);
+	int ret;
+	if (is_json_number(number, length)) {
+		ret = writer_append(self, number, length);
+	}
+	else {
+		PyErr_Format(PyExc_ValueError, "Invalid number: %R", value);
+		ret = -1;
+	}
+	Py_DECREF(text);
+	return ret;
+}
+
+static PyObject *writer_unexpected(PyObject *event)
+{
+	PyObject *msg;
+	N_N(msg = PyUnicode_FromFormat("Unexpected %S event", event));
+	PyErr_SetObject(PyExc_ValueError, msg);
+	Py_DECREF(msg);
+	return NULL;
+}
+
+/*
+ * Returns the event name in enames equal to the given one, so it can be
+ * compared by identity, or NULL if it's unknown. Events coming from this
+ * backend are found by identity too.
+ */
+static PyObject *writer_event_name(PyObject *event)
+{
+	PyObject **names = (PyObject **)&enames;
+	int n = sizeof(enames_t) / sizeof(PyObject *), i;
+	for (i = 0; i < n; i++) {
+		if (names[i] == event) {
+			return event;
+		}
+	}
+	for (i = 0; i < n; i++) {
+		int cmp = PyObject_RichCompareBool(names[i], event, Py_EQ);
+		N_M1(cmp);
+		if (cmp) {
+			return names[i];
+		}
+	}
+	PyErr_Format(PyExc_ValueError, "Unknown event: %R", event);
+	return NULL;
+}
+
+static PyObject *writer_send_impl(WriterCoro *self, PyObject *event, PyObject *value)
+{
+	N_N(event = writer_event_name(event));
+
+	if (event == enames.map_key_ename) {
+		if (self->state == WRITER_NEXT_MEMBER) {
+			N_M1(writer_append(self, ",", 1));
+		}
+		else if (self->state != WRITER_MAP) {
+			return writer_unexpected(event);
+		}
+		N_M1(writer_string(self, value));
+		N_M1(writer_append(self, ":", 1));
+		self->state = WRITER_MEMBER_VALUE;
+		Py_RETURN_NONE;
+	}
+	if (event == enames.end_map_ename || event == enames.end_array_ename) {
+		int is_map = event == enames.end_map_ename;
+		if ((is_map && self->state != WRITER_MAP && self->state != WRITER_NEXT_MEMBER) ||
+		    (!is_map && self->state != WRITER_ARRAY && self->state != WRITER_NEXT_ITEM)) {
+			return writer_unexpected(event);
+		}
+		N_M1(writer_append(self, is_map ? "}" : "]", 1));
+		self->state = self->stack[--self->depth];
+		Py_RETURN_NONE;
+	}
+
+	enum writer_state next_state;
+	switch (self->state) {
+		case WRITER_VALUE:
+			next_state = WRITER_NEXT_VALUE;
+			break;
+		case WRITER_NEXT_VALUE:
+			N_M1(writer_append(self, "\n", 1));
+			next_state = WRITER_NEXT_VALUE;
+			break;
+		case WRITER_ARRAY:
+			next_state = WRITER_NEXT_ITEM;
+			break;
+		case WRITER_NEXT_ITEM:
+			N_M1(writer_append(self, ",", 1));
+			next_state = WRITER_NEXT_ITEM;
+			break;
+		case WRITER_MEMBER_VALUE:
+			next_state = WRITER_NEXT_MEMBER;
+			break;
+		default:
+			return writer_unexpected(event);
+	}
+
+	if (event == enames.start_map_ename || event == enames.start_array_ename) {
+		int is_map = event == enames.start_map_ename;
+		N_M1(writer_append(self, is_map ? "{" : "[", 1));
+		N_M1(writer_push(self, next_state));
+		self->state = is_map ? WRITER_MAP : WRITER_ARRAY;
+		Py_RETURN_NONE;
+	}
+	if (event == enames.string_ename) {
+		N_M1(writer_string(self, value));
+	}
+	else if (event == enames.null_ename) {
+		N_M1(writer_append(self, "null", 4));
+	}
+	else if (event == enames.boolean_ename) {
+		int truth;
+		N_M1(truth = PyObject_IsTrue(value));
+		N_M1(writer_append(self, truth ? "true" : "false", truth ? 4 : 5));
+	}
+	else {
+		N_M1(writer_number(self, value));
+	}
+	self->state = next_state;
+	Py_RETURN_NONE;
+}
+
+static PyObject* writer_send(PyObject *self, PyObject *tuple)
+{
+	WriterCoro *writer = (WriterCoro *)self;
+	if (writer->closed) {
+		PyErr_SetNone(PyExc_StopIteration);
+		return NULL;
+	}
+	PyObject *items;
+	N_N(items = PySequence_Fast(tuple, "Expected (event, value) or (prefix, event, value) tuples"));
+	PyObject *ret;
+	Py_ssize_t size = PySequence_Fast_GET_SIZE(items);
+	if (size == 2 || size == 3) {
+		PyObject **values = PySequence_Fast_ITEMS(items);
+		ret = writer_send_impl(writer, values[size - 2], values[size - 1]);
+	}
+	else {
+		PyErr_SetString(PyExc_ValueError, "Expected (event, value) or (prefix, event, value) tuples");
+		ret = NULL;
+	}
+	Py_DECREF(items);
+	if (!ret) {
+		/* Like a generator, a writer raising an error is done */
+		writer->closed = 1;
+	}
+	return ret;
+}
+
+static PyObject* writer_close(PyObject *self, PyObject *args)
+{
+	WriterCoro *writer = (WriterCoro *)self;
+	if (writer->closed) {
+		Py_RETURN_NONE;
+	}
+	writer->closed = 1;
+	N_M1(writer_flush(writer));
+	if (writer->depth) {
+		PyErr_SetString(IncompleteJSONError, "Incomplete JSON content");
+		return NULL;
+	}
+	Py_RETURN_NONE;
+}
+
+static PyMethodDef writer_methods[] = {
+	{"send", writer_send, METH_O, "coroutine's send method"},
+	{"close", writer_close, METH_NOARGS, "coroutine's close method"},
+	{NULL, NULL, 0, NULL}
+};
+
+/*
+ * writer_coro coroutine object type
+ */
+PyTypeObject WriterCoro_Type = {
+#if PY_MAJOR_VERSION >= 3
+	PyVarObject_HEAD_INIT(NULL, 0)
+#else
+	PyObject_HEAD_INIT(NULL)
+#endif
+	.tp_basicsize = sizeof(WriterCoro),
+	.tp_name = "_yajl2.writer_coro",
+	.tp_doc = "Coroutine writing the (evt,value) pairs it receives as compact JSON text",
+	.tp_init = (initproc)writer_init,
+	.tp_dealloc = (destructor)writer_dealloc,
+	.tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_ITER,
+	.tp_iter = ijson_return_self,
+	.tp_iternext = ijson_return_none,
+	.tp_methods = writer_methods
+};
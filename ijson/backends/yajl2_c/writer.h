@@ -0,0 +1,55 @@
+/*
+ * writer_coro coroutine for ijson's C backend
+ *
+ * ICRAR - International Centre for Radio Astronomy Research
+ * (c) UWA - The University of Western Australia, 2020
+ * Copyright by UWA (in the framework of the ICRAR)
+ */
+
+#ifndef WRITER_H
+#define WRITER_H
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/**
+ * Where the next event a writer_coro coroutine receives goes: a top-level
+ * value (or another one), the first value of an array (or another one), the
+ * first member of an object (or another one), or the value of a member
+ */
+enum writer_state {
+    WRITER_VALUE,
+    WRITER_NEXT_VALUE,
+    WRITER_ARRAY,
+    WRITER_NEXT_ITEM,
+    WRITER_MAP,
+    WRITER_NEXT_MEMBER,
+    WRITER_MEMBER_VALUE
+};
+
+/**
+ * writer_coro coroutine object structure
+ *
+ * The JSON text is accumulated in `buffer`, which holds up to `size` bytes and
+ * is handed to `write` each time it fills up. `stack` holds the states that
+ * follow each of the containers being written.
+ */
+typedef struct {
+    PyObject_HEAD
+    PyObject *write;
+    char *buffer;
+    Py_ssize_t length;
+    Py_ssize_t size;
+    enum writer_state state;
+    enum writer_state *stack;
+    Py_ssize_t depth;
+    Py_ssize_t stack_size;
+    int closed;
+} WriterCoro;
+
+/**
+ * writer_coro coroutine object type
+ */
+extern PyTypeObject WriterCoro_Type;
+
+#endif /* WRITER_H */
@@ -109,10 +109,12 @@ def double(val):
     return val
 
 
-@ffi.callback('int(void *ctx, const char *numberVal, size_t numberLen)')
-@append_event_to_ctx('number')
-def number(val, length):
-    return common.integer_or_decimal(b2s(ffi.string(val, maxlen=length)))
+def _number_callback(to_number):
+    @ffi.callback('int(void *ctx, const char *numberVal, size_t numberLen)')
+    @append_event_to_ctx('number')
+    def number(val, length):
+        return to_number(b2s(ffi.string(val, maxlen=length)))
+    return number
 
 
 @ffi.callback('int(void *ctx, const unsigned char *stringVal, size_t stringLen)')
@@ -151,23 +153,25 @@ def end_array():
     return None
 
 
-_decimal_callback_data = (
-    null, boolean, ffi.NULL, ffi.NULL, number, string,
-    start_map, map_key, end_map, start_array, end_array
-)
-
-_float_callback_data = (
+# yajl parses integers and doubles itself if there is no number callback
+_callback_data = {
+    to_number: (
+        null, boolean, ffi.NULL, ffi.NULL, _number_callback(to_number), string,
+        start_map, map_key, end_map, start_array, end_array
+    )
+    for to_number in set(common._NUMBER_CONVERTERS.values()) - {common.integer_or_float}
+}
+_callback_data[common.integer_or_float] = (
     null, boolean, integer, double, ffi.NULL, string,
     start_map, map_key, end_map, start_array, end_array
 )
 
 
-def yajl_init(scope, send, allow_comments=False, multiple_values=False, use_float=False):
+def yajl_init(scope, send, allow_comments=False, multiple_values=False, use_float=False,
+              intern_strings=False, number_type=None):
     scope.ctx = ffi.new_handle(send)
-    if use_float:
-        scope.callbacks = ffi.new('yajl_callbacks*', _float_callback_data)
-    else:
-        scope.callbacks = ffi.new('yajl_callbacks*', _decimal_callback_data)
+    to_number = common.number_converter(use_float, number_type)
+    scope.callbacks = ffi.new('yajl_callbacks*', _callback_data[to_number])
     handle = yajl.yajl_alloc(scope.callbacks, ffi.NULL, scope.ctx)
 
     if allow_comments:
@@ -179,7 +183,8 @@ def yajl_init(scope, send, allow_comments=False, multiple_values=False, use_floa
 
 
 def yajl_parse(handle, buffer):
-    if buffer:
+    buffer = ffi.from_buffer(buffer)
+    if len(buffer):
         result = yajl.yajl_parse(handle, buffer, len(buffer))
     else:
         result = yajl.yajl_complete_parse(handle)
@@ -1,8 +1,15 @@
 '''
 Backend independent higher level interfaces, common exceptions.
 '''
+import array
+import collections
 import decimal
+import functools
 import inspect
+from json.encoder import encode_basestring
+import mmap
+import operator
+import re
 import warnings
 
 from ijson import compat, utils
@@ -67,27 +74,50 @@ def parse_basecoro(target):
       ('', 'end_map', None)
 
     '''
-    path = []
+    # The prefixes of all open containers are kept already joined, and joined
+    # prefixes are remembered by (parent prefix, key), so documents with
+    # repeated shapes reuse the same prefix objects. The root's children are
+    # remembered under a None parent instead, as the root prefix is the same
+    # string as that of a member with an empty key
+    path = ['']
+    joined = {}
+    send = target.send
     while True:
         event, value = yield
         if event == 'map_key':
-            prefix = '.'.join(path[:-1])
-            path[-1] = value
+            prefix = path[-2]
+            parent = prefix if len(path) > 2 else None
+            try:
+                path[-1] = joined[parent, value]
+            except KeyError:
+                path[-1] = _join_prefix(joined, parent, value)
         elif event == 'start_map':
-            prefix = '.'.join(path)
+            prefix = path[-1]
             path.append(None)
-        elif event == 'end_map':
+        elif event == 'end_map' or event == 'end_array':
             path.pop()
-            prefix = '.'.join(path)
+            prefix = path[-1]
         elif event == 'start_array':
-            prefix = '.'.join(path)
-            path.append('item')
-        elif event == 'end_array':
-            path.pop()
-            prefix = '.'.join(path)
+            prefix = path[-1]
+            parent = prefix if len(path) > 1 else None
+            try:
+                path.append(joined[parent, 'item'])
+            except KeyError:
+                path.append(_join_prefix(joined, parent, 'item'))
         else: # any scalar value
-            prefix = '.'.join(path)
-        target.send((prefix, event, value))
+            prefix = path[-1]
+        send((prefix, event, value))
+
+
+# Maximum number of joined prefixes remembered by parse_basecoro
+_PREFIX_CACHE_SIZE = 1024
+
+def _join_prefix(joined, parent, key):
+    if len(joined) >= _PREFIX_CACHE_SIZE:
+        joined.clear()
+    prefix = key if parent is None else parent + '.' + key
+    joined[parent, key] = prefix
+    return prefix
 
 
 class ObjectBuilder(object):
@@ -95,7 +125,10 @@ class ObjectBuilder(object):
     Incrementally builds an object from JSON parser events. Events are passed
     into the `event` function that accepts two parameters: event type and
     value. The object being built is available at any time from the `value`
-    attribute.
+    attribute, and `reset` gets the builder ready to build another one.
+
+    If `fields` is given only the members with those (dotted) names are built,
+    everything else is skipped (see _projection).
 
     Example::
 
@@ -110,84 +143,956 @@ class ObjectBuilder(object):
         >>> builder.value == {'key': 'value'}
         True
 
+        >>> builder = ObjectBuilder(fields=['a.b'])
+        >>> f = BytesIO(b'{"a": {"b": 1, "c": 2}, "d": 3}')
+        >>> for event, value in basic_parse(f):
+        ...     builder.event(event, value)
+        >>> builder.value == {'a': {'b': 1}}
+        True
+
     '''
-    def __init__(self, map_type=None):
-        def initial_set(value):
-            self.value = value
-        self.containers = [initial_set]
+    # `containers` is the stack of open containers, and `key` the pending key
+    # of the innermost one if it's a map. Containers are added to their parent
+    # as soon as they start, so the parent's key is not needed anymore by then
+    __slots__ = ('map_type', 'containers', 'key', 'value')
+
+    def __new__(cls, map_type=None, fields=None):
+        if cls is ObjectBuilder and fields is not None:
+            cls = _ProjectedObjectBuilder
+        return object.__new__(cls)
+
+    def __init__(self, map_type=None, fields=None):
         self.map_type = map_type or dict
+        self.containers = []
+        self.key = None
+        self.value = None
+
+    def reset(self):
+        '''Discards the value being built (if any)'''
+        del self.containers[:]
+        self.key = None
+        self.value = None
 
     def event(self, event, value):
+        _builder_handlers[event](self, value)
+
+
+def _builder_value(builder, value):
+    containers = builder.containers
+    if not containers:
+        builder.value = value
+        return
+    top = containers[-1]
+    if top.__class__ is list:
+        top.append(value)
+    else:
+        top[builder.key] = value
+
+
+def _builder_map_key(builder, key):
+    builder.key = key
+
+
+def _builder_start_map(builder, _):
+    mappable = builder.map_type()
+    _builder_value(builder, mappable)
+    builder.containers.append(mappable)
+
+
+def _builder_start_array(builder, _):
+    array = []
+    _builder_value(builder, array)
+    builder.containers.append(array)
+
+
+def _builder_end(builder, _):
+    builder.containers.pop()
+
+
+_builder_handlers = {
+    'null': _builder_value,
+    'boolean': _builder_value,
+    'integer': _builder_value,
+    'double': _builder_value,
+    'number': _builder_value,
+    'string': _builder_value,
+    'map_key': _builder_map_key,
+    'start_map': _builder_start_map,
+    'start_array': _builder_start_array,
+    'end_map': _builder_end,
+    'end_array': _builder_end,
+}
+
+
+class _ProjectedObjectBuilder(ObjectBuilder):
+    '''
+    An ObjectBuilder skipping the members that are not in a projection. Made
+    by ObjectBuilder when given `fields`.
+    '''
+    # `nodes` keeps the projection node of each open object, and the node of
+    # the elements of each open array, while `node` is the node of the next
+    # value (None if it's skipped). After a container ends `node` is reset to
+    # the node of its parent: for arrays that's the node of the next element,
+    # while for objects it's overwritten by the next map_key anyway. `skipped`
+    # is the nesting level inside a skipped container
+    __slots__ = ('projection', 'node', 'nodes', 'skipped')
+
+    def __init__(self, map_type=None, fields=None):
+        ObjectBuilder.__init__(self, map_type)
+        self.projection = self.node = _projection(fields)
+        self.nodes = []
+        self.skipped = 0
+
+    def reset(self):
+        ObjectBuilder.reset(self)
+        del self.nodes[:]
+        self.node = self.projection
+        self.skipped = 0
+
+    def event(self, event, value):
+        if self.skipped:
+            if event == 'start_map' or event == 'start_array':
+                self.skipped += 1
+            elif event == 'end_map' or event == 'end_array':
+                self.skipped -= 1
+            return
         if event == 'map_key':
-            self.key = value
+            self.node = _projection_member(self.nodes[-1], value)
+        elif event == 'end_map' or event == 'end_array':
+            self.nodes.pop()
+            if self.nodes:
+                self.node = self.nodes[-1]
+        elif self.node is None:
+            if event == 'start_map' or event == 'start_array':
+                self.skipped = 1
+            return
         elif event == 'start_map':
-            mappable = self.map_type()
-            self.containers[-1](mappable)
-            def setter(value):
-                mappable[self.key] = value
-            self.containers.append(setter)
+            self.nodes.append(self.node)
         elif event == 'start_array':
-            array = []
-            self.containers[-1](array)
-            self.containers.append(array.append)
-        elif event == 'end_array' or event == 'end_map':
-            self.containers.pop()
+            self.node = _projection_member(self.node, 'item')
+            self.nodes.append(self.node)
+        _builder_handlers[event](self, value)
+
+
+def _projection(fields):
+    '''
+    Compiles the dotted names of the members to keep in built objects into a
+    tree of dictionaries, where True marks members that are kept whole. Like
+    prefixes, names use "item" to refer to the elements of arrays.
+
+        >>> projection = _projection(['id', 'user.name', 'tags.item.name'])
+        >>> projection == {'id': True, 'user': {'name': True}, 'tags': {'item': {'name': True}}}
+        True
+
+    Already compiled projections are returned as they are.
+    '''
+    if fields is None or isinstance(fields, dict):
+        return fields
+    if isinstance(fields, (compat.bytetype, compat.texttype)):
+        fields = [fields]
+    projection = {}
+    for field in fields:
+        parts = field.split('.')
+        node = projection
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if node is True:
+                break
+        else:
+            node[parts[-1]] = True
+    return projection
+
+
+def _projection_member(node, key):
+    '''The projection node of the `key` member of a value with `node`'''
+    if node is True:
+        return node
+    return node.get(key)
+
+
+def _project(value, projection):
+    '''Returns a copy of an already built value with only the members in `projection`'''
+    if projection is True:
+        return value
+    if value.__class__ is list:
+        item = projection.get('item')
+        if item is None:
+            return []
+        return [_project(element, item) for element in value]
+    if hasattr(value, 'items'):
+        projected = value.__class__()
+        for key, member in value.items():
+            node = projection.get(key)
+            if node is not None:
+                projected[key] = _project(member, node)
+        return projected
+    return value
+
+
+
+# Compiled schemas (see _compile_schema): `construct` is called with the
+# values of the members in `slots` (a dictionary of member names and their
+# positions), in order. `nested` has the compiled schemas of their values
+# (None for values built as usual), and `missing` the functions giving the
+# values of missing members.
+_Schema = collections.namedtuple('_Schema', 'name construct slots nested missing')
+
+# Values of missing members left unset in the built objects
+_UNSET = object()
+
+_NOT_SCHEMA = "Expected %s, found a %s event"
+_MISSING_MEMBER = "Missing %r member, which %s objects require"
+
+
+def _unset():
+    return _UNSET
+
+
+def _constant(value):
+    return lambda: value
+
+
+def _required(name, type_name):
+    def missing():
+        raise ValueError(_MISSING_MEMBER % (name, type_name))
+    return missing
+
+
+def _construct_kwargs(cls, names, *values):
+    return cls(**dict(zip(names, values)))
+
+
+def _slots_constructor(cls, names, descriptors):
+    setters = [descriptor.__set__ for descriptor in descriptors]
+    def construct(*values):
+        obj = cls.__new__(cls)
+        for setter, value in zip(setters, values):
+            if value is not _UNSET:
+                setter(obj, value)
+        return obj
+    return construct
+
+
+def _mapping_constructor(map_type, names):
+    def construct(*values):
+        mapping = map_type()
+        for name, value in zip(names, values):
+            if value is not _UNSET:
+                mapping[name] = value
+        return mapping
+    return construct
+
+
+def _type_hints(cls):
+    try:
+        import typing
+        return typing.get_type_hints(cls)
+    except Exception:
+        return {}
+
+
+def _class_schema(cls):
+    '''
+    Returns the member names of a schema class, their functions for missing
+    values, the function constructing its objects and its type hints
+    '''
+    try:
+        import dataclasses
+    except ImportError:
+        dataclasses = None
+    if dataclasses and dataclasses.is_dataclass(cls):
+        fields = [field for field in dataclasses.fields(cls) if field.init]
+        names = [field.name for field in fields]
+        missing = []
+        for field in fields:
+            if field.default is not dataclasses.MISSING:
+                missing.append(_constant(field.default))
+            elif field.default_factory is not dataclasses.MISSING:
+                missing.append(field.default_factory)
+            else:
+                missing.append(_required(field.name, cls.__name__))
+        construct = cls
+        if any(getattr(field, 'kw_only', False) is True for field in fields):
+            construct = functools.partial(_construct_kwargs, cls, names)
+        return names, missing, construct, _type_hints(cls)
+    if issubclass(cls, tuple) and hasattr(cls, '_fields'):
+        names = list(cls._fields)
+        defaults = getattr(cls, '_field_defaults', {})
+        missing = [
+            _constant(defaults[name]) if name in defaults else _required(name, cls.__name__)
+            for name in names
+        ]
+        return names, missing, cls, _type_hints(cls)
+    names, descriptors = [], []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, (compat.bytetype, compat.texttype)):
+            slots = [slots]
+        for name in slots:
+            if name in ('__dict__', '__weakref__') or name in names:
+                continue
+            attribute = name
+            if name.startswith('__') and not name.endswith('__'):
+                attribute = '_%s%s' % (klass.__name__.lstrip('_'), name)
+            names.append(name)
+            descriptors.append(klass.__dict__[attribute])
+    if not names:
+        raise ValueError("Unsupported schema %r, only dataclasses, named tuples and classes "
+                         "with __slots__ are" % (cls,))
+    construct = _slots_constructor(cls, names, descriptors)
+    return names, [_unset] * len(names), construct, _type_hints(cls)
+
+
+def _hint_schema(hint, map_type, memo):
+    '''The compiled schema of the values of a member with a type hint, if any'''
+    if hint is None:
+        return None
+    import typing
+    origin = getattr(hint, '__origin__', None)
+    args = getattr(hint, '__args__', None) or ()
+    if origin in (list, typing.List) and len(args) == 1:
+        element = _hint_schema(args[0], map_type, memo)
+        return None if element is None else [element]
+    if origin is typing.Union or type(hint).__name__ == 'UnionType':
+        args = [arg for arg in args if arg is not type(None)]
+        return _hint_schema(args[0], map_type, memo) if len(args) == 1 else None
+    if isinstance(hint, type) and _is_schema_class(hint):
+        return _compile_schema(hint, map_type, memo)
+    return None
+
+
+def _is_schema_class(cls):
+    if hasattr(cls, '__dataclass_fields__'):
+        return True
+    if issubclass(cls, tuple):
+        return hasattr(cls, '_fields')
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        if isinstance(slots, (compat.bytetype, compat.texttype)):
+            slots = [slots]
+        if any(name not in ('__dict__', '__weakref__') for name in slots):
+            return True
+    return False
+
+
+def _compile_schema(schema, map_type=None, memo=None):
+    '''
+    Compiles the schema of the values built by items into a _Schema, or a
+    one-element list with the compiled schema of the elements of arrays.
+
+    Schemas are dataclasses, named tuples and classes with __slots__, whose
+    objects are built out of the object members with the same names as their
+    fields, the schemas of which are taken from their type hints; dictionaries
+    mapping member names to their schemas (or None), which are built into
+    `map_type` objects with only those members; and one-element lists with the
+    schema of the elements of arrays.
+
+        >>> schema = _compile_schema({'id': None, 'tags': [{'name': None}]})
+        >>> schema.slots == {'id': 0, 'tags': 1}
+        True
+        >>> schema.nested[1][0].slots == {'name': 0}
+        True
+
+    Already compiled schemas are returned as they are.
+    '''
+    if schema is None or isinstance(schema, _Schema):
+        return schema
+    if isinstance(schema, list):
+        if len(schema) != 1:
+            raise ValueError("Array schemas must have a single element, not %r" % (schema,))
+        return [_compile_schema(schema[0], map_type, memo)]
+    if memo is None:
+        memo = {}
+    if id(schema) in memo:
+        return memo[id(schema)]
+    if isinstance(schema, dict):
+        names = list(schema)
+        name = (map_type or dict).__name__
+        missing = [_unset] * len(names)
+        construct = _mapping_constructor(map_type or dict, names)
+        nested_schema = lambda name: _compile_schema(schema[name], map_type, memo)
+    elif isinstance(schema, type):
+        names, missing, construct, hints = _class_schema(schema)
+        name = schema.__name__
+        nested_schema = lambda name: _hint_schema(hints.get(name), map_type, memo)
+    else:
+        raise ValueError("Unsupported schema: %r" % (schema,))
+    nested = []
+    compiled = _Schema(name, construct, {name: i for i, name in enumerate(names)},
+                       nested, tuple(missing))
+    memo[id(schema)] = compiled
+    nested.extend(nested_schema(name) for name in names)
+    return compiled
+
+
+def _schema_projection(schema, open_schemas=()):
+    '''
+    The projection (see _projection) of the members that go into objects of a
+    compiled schema. Recursive schemas are built whole from their recursion on.
+    '''
+    if schema is None or id(schema) in open_schemas:
+        return True
+    if schema.__class__ is list:
+        return {'item': _schema_projection(schema[0], open_schemas)}
+    open_schemas += (id(schema),)
+    return {
+        name: _schema_projection(schema.nested[slot], open_schemas)
+        for name, slot in schema.slots.items()
+    }
+
+
+def _items_options(fields, schema, map_type, raw=False):
+    '''The projection and compiled schema of the values built by items'''
+    if raw and (fields is not None or schema is not None):
+        raise ValueError("fields and schema can't be used with raw items")
+    if schema is None:
+        return _projection(fields), None
+    if fields is not None:
+        raise ValueError("fields and schema can't be used together")
+    schema = _compile_schema(schema, map_type)
+    return _schema_projection(schema), schema
+
+
+def _value_event(value):
+    '''The name of the event a built value starts with'''
+    if value.__class__ is list:
+        return 'start_array'
+    if hasattr(value, 'keys'):
+        return 'start_map'
+    if isinstance(value, (compat.bytetype, compat.texttype)):
+        return 'string'
+    if isinstance(value, bool):
+        return 'boolean'
+    return 'number'
+
+
+def _apply_schema(value, schema):
+    '''Builds the objects of a compiled schema out of an already built value'''
+    if schema is None or value is None:
+        return value
+    if schema.__class__ is list:
+        if value.__class__ is not list:
+            raise ValueError(_NOT_SCHEMA % ('an array', _value_event(value)))
+        element = schema[0]
+        return [_apply_schema(item, element) for item in value]
+    if not hasattr(value, 'keys'):
+        raise ValueError(_NOT_SCHEMA % ('a %s object' % schema.name, _value_event(value)))
+    nested = schema.nested
+    missing = schema.missing
+    values = [None] * len(missing)
+    for name, slot in schema.slots.items():
+        if name in value:
+            values[slot] = _apply_schema(value[name], nested[slot])
         else:
-            self.containers[-1](value)
+            values[slot] = missing[slot]()
+    return schema.construct(*values)
+
+
+def is_prefix_pattern(prefix):
+    '''True if `prefix` has ``*`` or ``**`` wildcard components'''
+    return '*' in prefix and any(
+        part == '*' or part == '**' for part in prefix.split('.'))
+
+
+class PrefixMatcher(object):
+    '''
+    A prefix pattern compiled into a deterministic automaton over the
+    components of prefixes. Pattern components are either names, ``*``
+    (matching any single component) or ``**`` (matching any number of
+    components, including none).
+
+    States are integers, with ``start`` being the state of the empty prefix.
+    Adding `component` to a prefix in state ``s`` leads to state
+    ``transitions[s].get(component, defaults[s])``. Prefixes in states for
+    which ``accepting[s]`` is true match the pattern, and those in the
+    ``dead`` state (if any, -1 otherwise) will not match it however they are
+    continued.
+    '''
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        parts = pattern.split('.') if pattern else []
+        names = set(part for part in parts if part != '*' and part != '**')
+
+        def closure(positions):
+            # ** can also match no component at all
+            positions = set(positions)
+            pending = list(positions)
+            while pending:
+                i = pending.pop()
+                if i < len(parts) and parts[i] == '**' and i + 1 not in positions:
+                    positions.add(i + 1)
+                    pending.append(i + 1)
+            return frozenset(positions)
+
+        def advance(positions, component):
+            advanced = set()
+            for i in positions:
+                if i == len(parts):
+                    continue
+                part = parts[i]
+                if part == '**':
+                    advanced.add(i)
+                elif part == '*' or part == component:
+                    advanced.add(i + 1)
+            return closure(advanced)
+
+        states = [closure([0])]
+        ids = {states[0]: 0}
+        def state_id(positions):
+            if positions not in ids:
+                ids[positions] = len(states)
+                states.append(positions)
+            return ids[positions]
+
+        self.start = 0
+        self.transitions = []
+        self.defaults = []
+        self.accepting = []
+        for positions in states:
+            default = state_id(advance(positions, None))
+            transitions = {}
+            for name in names:
+                state = state_id(advance(positions, name))
+                if state != default:
+                    transitions[name] = state
+            self.transitions.append(transitions)
+            self.defaults.append(default)
+            self.accepting.append(len(parts) in positions)
+        self.dead = ids.get(frozenset(), -1)
+        self._matches = {}
+
+    def step(self, state, component):
+        '''The state reached by adding `component` to a prefix in `state`'''
+        return self.transitions[state].get(component, self.defaults[state])
+
+    def matches(self, prefix):
+        '''Whether the (joined) `prefix` matches the pattern'''
+        try:
+            return self._matches[prefix]
+        except KeyError:
+            pass
+        state = self.start
+        if prefix:
+            for component in prefix.split('.'):
+                state = self.step(state, component)
+        if len(self._matches) >= _PREFIX_CACHE_SIZE:
+            self._matches.clear()
+        matches = self._matches[prefix] = self.accepting[state]
+        return matches
+
+    def __repr__(self):
+        return 'PrefixMatcher(%r)' % (self.pattern,)
+
+
+def _prefix_matcher(prefix):
+    '''A function telling whether a (joined) prefix matches `prefix`'''
+    if is_prefix_pattern(prefix):
+        return PrefixMatcher(prefix).matches
+    return functools.partial(operator.eq, prefix)
+
+
+_RAW_EVENTS = "Raw items can only be taken out of JSON text, not events"
 
 
 @utils.coroutine
-def items_basecoro(target, prefix, map_type=None):
+def items_basecoro(target, prefix, map_type=None, fields=None, schema=None, raw=False):
     '''
     An couroutine dispatching native Python objects constructed from the events
-    under a given prefix.
+    under a given prefix, which can also be a pattern (see PrefixMatcher).
+    If `fields` is given only those members of the objects are built, while if
+    `schema` is given they are built as described by it (see _compile_schema).
+    Events don't carry the text of values, so `raw` is not supported.
     '''
+    if raw:
+        raise ValueError(_RAW_EVENTS)
+    matches = _prefix_matcher(prefix)
+    fields, schema = _items_options(fields, schema, map_type)
+    builder = ObjectBuilder(map_type=map_type, fields=fields)
+    build = builder.event
+    containers = builder.containers
     while True:
         current, event, value = (yield)
-        if current == prefix:
-            if event in ('start_map', 'start_array'):
-                object_depth = 1
-                builder = ObjectBuilder(map_type=map_type)
-                while object_depth:
-                    builder.event(event, value)
+        if matches(current):
+            if event == 'start_map' or event == 'start_array':
+                builder.reset()
+                build(event, value)
+                while containers:
                     current, event, value = (yield)
-                    if event in ('start_map', 'start_array'):
-                        object_depth += 1
-                    elif event in ('end_map', 'end_array'):
-                        object_depth -= 1
-                del builder.containers[:]
-                target.send(builder.value)
+                    build(event, value)
+                target.send(_apply_schema(builder.value, schema))
             else:
-                target.send(value)
+                target.send(_apply_schema(value, schema))
 
 
 @utils.coroutine
 def kvitems_basecoro(target, prefix, map_type=None):
     '''
     An coroutine dispatching (key, value) pairs constructed from the events
-    under a given prefix. The prefix should point to JSON objects
+    under a given prefix, which can also be a pattern (see PrefixMatcher).
+    The prefix should point to JSON objects
     '''
-    builder = None
+    matches = _prefix_matcher(prefix)
+    builder = ObjectBuilder(map_type=map_type)
+    build = builder.event
+    containers = builder.containers
     while True:
         path, event, value = (yield)
-        while path == prefix and event == 'map_key':
-            object_depth = 0
+        while event == 'map_key' and matches(path):
             key = value
-            builder = ObjectBuilder(map_type=map_type)
+            builder.reset()
             path, event, value = (yield)
-            if event == 'start_map':
-                object_depth += 1
-            while (
-                (event != 'map_key' or object_depth != 0) and
-                (event != 'end_map' or object_depth != -1)):
-                builder.event(event, value)
+            build(event, value)
+            while containers:
                 path, event, value = (yield)
-                if event == 'start_map':
-                    object_depth += 1
-                elif event == 'end_map':
-                    object_depth -= 1
-            del builder.containers[:]
+                build(event, value)
             target.send((key, builder.value))
+            path, event, value = (yield)
+
+
+def _multi_prefixes(prefixes):
+    '''
+    Returns the (prefix, method) pairs requested from items_multi, where method
+    is either 'items' or 'kvitems'.
+    '''
+    if isinstance(prefixes, (compat.bytetype, compat.texttype)):
+        prefixes = [prefixes]
+    if hasattr(prefixes, 'items'):
+        pairs = list(prefixes.items())
+    else:
+        pairs = [(prefix, 'items') for prefix in prefixes]
+    for prefix, method in pairs:
+        if method not in ('items', 'kvitems'):
+            raise ValueError(
+                "Unknown method for prefix %r: %r (should be 'items' or 'kvitems')" %
+                (prefix, method))
+    return pairs
+
+
+@utils.coroutine
+def _prefixed_basecoro(target, prefix):
+    send = target.send
+    while True:
+        send((prefix, (yield)))
+
+
+@utils.coroutine
+def items_multi_basecoro(target, prefixes, map_type=None):
+    '''
+    A coroutine dispatching (prefix, object) pairs for the objects found under
+    any of the given prefixes, which can be an iterable of prefixes, or a
+    dictionary mapping prefixes to either 'items' or 'kvitems'. Objects found
+    under the latter are (key, value) pairs, like those given by kvitems.
+    Results are sent as soon as they are complete, so those under prefixes
+    enclosed by others come first.
+    '''
+    sends = []
+    for prefix, method in _multi_prefixes(prefixes):
+        coro = kvitems_basecoro if method == 'kvitems' else items_basecoro
+        send = coro(_prefixed_basecoro(target, prefix), prefix, map_type).send
+        # Patterns can match anywhere, so they are routed everything
+        if is_prefix_pattern(prefix):
+            prefix = ''
+        sends.append((prefix, send))
+
+    # Events are routed only to coroutines whose prefix contain them
+    routes = {}
+    while True:
+        event = (yield)
+        current = event[0]
+        try:
+            route = routes[current]
+        except KeyError:
+            if len(routes) >= _PREFIX_CACHE_SIZE:
+                routes.clear()
+            route = routes[current] = [
+                send for prefix, send in sends
+                if not prefix or current == prefix or current.startswith(prefix + '.')
+            ]
+        for send in route:
+            send(event)
+
+
+# array.array typecodes of numeric types
+_ARRAY_TYPECODES = ''.join(
+    c for c in getattr(array, 'typecodes', 'bBhHiIlLfd') if c not in 'uw')
+_NOT_NUMBERS = "Expected an array of numbers, found a %s event"
+_UNSTORABLE = "%r can't be stored in an array of type %r"
+_INFINITIES = (float('inf'), float('-inf'))
+
+
+def _store_number(values, value):
+    '''
+    Appends a number to an array.array. Non-integers, which are parsed as
+    Decimals, are only stored in arrays of floating point numbers (on python 2
+    arrays of integers would truncate them), where floats too big for them are
+    errors like with use_float.
+    '''
+    if value.__class__ is decimal.Decimal:
+        if values.typecode not in 'fd':
+            raise TypeError("Not an integer: %r" % (value,))
+        number = float(value)
+        if number in _INFINITIES:
+            raise JSONError("float overflow: %s" % (value,))
+        value = number
+    values.append(value)
+
+@utils.coroutine
+def arrays_basecoro(target, prefix, typecode='d', chunk_size=None):
+    '''
+    A coroutine dispatching array.array objects of the given `typecode` with
+    the numbers of the arrays found under a given prefix, which can also be a
+    pattern (see PrefixMatcher). If `chunk_size` is given, the numbers of each
+    array are dispatched in arrays of up to that many numbers instead.
+    '''
+    matches = _prefix_matcher(prefix)
+    send = target.send
+    while True:
+        current, event, value = (yield)
+        if not matches(current):
+            continue
+        if event != 'start_array':
+            raise ValueError(_NOT_NUMBERS % event)
+        values = array.array(typecode)
+        while True:
+            current, event, value = (yield)
+            if event == 'end_array':
+                break
+            if event != 'number':
+                raise ValueError(_NOT_NUMBERS % event)
+            try:
+                _store_number(values, value)
+            except (TypeError, OverflowError):
+                raise ValueError(_UNSTORABLE % (value, typecode))
+            if len(values) == chunk_size:
+                send(values)
+                values = array.array(typecode)
+        if values or not chunk_size:
+            send(values)
+
+
+@utils.coroutine
+def _converted_basecoro(target, convert):
+    send = target.send
+    while True:
+        send(convert((yield)))
+
+
+def _is_typecode(dtype):
+    return isinstance(dtype, str) and len(dtype) == 1 and dtype in _ARRAY_TYPECODES
+
+
+def _numpy_dtype(dtype):
+    '''Returns the numpy module and the numpy.dtype for `dtype`'''
+    try:
+        import numpy
+    except ImportError:
+        raise ValueError("dtype %r is not an array typecode (%s), and numpy is not available" %
+                         (dtype, _ARRAY_TYPECODES))
+    try:
+        return numpy, numpy.dtype(dtype)
+    except TypeError as e:
+        raise ValueError("Invalid dtype %r: %s" % (dtype, e))
+
+
+def _array_type(dtype):
+    '''
+    Returns the array.array typecode numbers are collected with to build arrays
+    of `dtype`, which is either a typecode or, if numpy is available, anything
+    numpy.dtype accepts; and the function turning the collected array.array
+    objects into numpy arrays (None for typecodes).
+    '''
+    if _is_typecode(dtype):
+        return dtype, None
+    numpy, dtype = _numpy_dtype(dtype)
+    if dtype.isnative and dtype.char in _ARRAY_TYPECODES:
+        return dtype.char, lambda values: numpy.frombuffer(values, dtype)
+    # Other numeric types are collected with a wider one, then converted
+    wide = 'q' in _ARRAY_TYPECODES
+    typecode = {'f': 'd', 'i': 'q' if wide else 'l', 'u': 'Q' if wide else 'L'}.get(dtype.kind)
+    if typecode is None:
+        raise ValueError("Unsupported dtype %r, only integer and floating point types are" % (dtype,))
+    return typecode, lambda values: numpy.frombuffer(values, typecode).astype(dtype)
+
+
+def _check_chunk_size(chunk_size):
+    if chunk_size is not None and (
+            isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size < 1):
+        raise ValueError("chunk_size must be a positive number, not %r" % (chunk_size,))
+
+
+def _arrays_options(dtype, chunk_size, config):
+    '''
+    Returns the typecode and conversion function for `dtype` (see _array_type),
+    and the configuration of the parser for arrays of that type, which parses
+    numbers as Decimals so that none fails to parse: only those in the arrays
+    are converted to the array's type (see _store_number).
+    '''
+    _check_chunk_size(chunk_size)
+    typecode, convert = _array_type(dtype)
+    return typecode, convert, dict(config, number_type='decimal')
+
+
+_NOT_OBJECTS = "Expected an array of objects, found a %s event"
+_NOT_NULLABLE = "Missing or null %r value, which can't be stored in an array of type %r"
+_NOT_SCALAR = "Found a %s event for %r, which can't be stored in an array of type %r"
+
+def _new_columns(fields, masks):
+    columns = {
+        name: [] if typecode is None else array.array(typecode)
+        for name, typecode in fields.items()
+    }
+    nulls = {name: array.array('B') for name in fields} if masks else None
+    return columns, nulls
+
+
+@utils.coroutine
+def _records_to_columns(target, fields, chunk_size, masks):
+    '''
+    A coroutine receiving the objects of arrays, and None after the last object
+    of each array, and dispatching their members as columns (see
+    columns_basecoro).
+    '''
+    send = target.send
+    columns, nulls = _new_columns(fields, masks)
+    rows = 0
+    while True:
+        record = (yield)
+        if record is None:
+            if rows or not chunk_size:
+                send((columns, nulls) if masks else columns)
+                columns, nulls = _new_columns(fields, masks)
+                rows = 0
+            continue
+        for name, column in columns.items():
+            value = record.get(name)
+            typecode = fields[name]
+            if value is None and typecode is not None:
+                if not masks:
+                    raise ValueError(_NOT_NULLABLE % (name, typecode))
+                column.append(0)
+            else:
+                try:
+                    _store_number(column, value)
+                except (TypeError, OverflowError):
+                    event = _value_event(value)
+                    if event in ('start_array', 'start_map'):
+                        raise ValueError(_NOT_SCALAR % (event, name, typecode))
+                    raise ValueError(_UNSTORABLE % (value, typecode))
+            if masks:
+                nulls[name].append(value is None)
+        rows += 1
+        if rows == chunk_size:
+            send((columns, nulls) if masks else columns)
+            columns, nulls = _new_columns(fields, masks)
+            rows = 0
+
+
+@utils.coroutine
+def columns_basecoro(target, prefix, fields, chunk_size=None, map_type=None, masks=False):
+    '''
+    A coroutine dispatching the objects of the arrays found under a given
+    prefix, which can also be a pattern (see PrefixMatcher), as columns:
+    dictionaries with the values of each member in `fields` across all
+    objects. `fields` maps member names to the array.array typecode their
+    values are stored with, or to None to store them in a list, where missing
+    and null values are None. Typed columns can't hold missing or null values,
+    unless `masks` is true: then zero is stored in their place, and (columns,
+    masks) pairs are dispatched, with masks mapping member names to
+    array.array('B') objects flagging their missing and null values. If
+    `chunk_size` is given, columns of up to that many objects are dispatched.
+    '''
+    matches = _prefix_matcher(prefix)
+    projection = {name: True for name in fields}
+    records = _records_to_columns(target, fields, chunk_size, masks)
+    builder = ObjectBuilder(map_type=map_type, fields=projection)
+    build = builder.event
+    containers = builder.containers
+    while True:
+        current, event, value = (yield)
+        if not matches(current):
+            continue
+        if event != 'start_array':
+            raise ValueError(_NOT_OBJECTS % event)
+        while True:
+            current, event, value = (yield)
+            if event == 'end_array':
+                break
+            if event != 'start_map':
+                raise ValueError(_NOT_OBJECTS % event)
+            builder.reset()
+            build(event, value)
+            while containers:
+                current, event, value = (yield)
+                build(event, value)
+            records.send(builder.value)
+        records.send(None)
+
+
+def _object_array(numpy, values):
+    # numpy.array would turn lists of lists into multidimensional arrays
+    objects = numpy.empty(len(values), dtype=object)
+    objects[:] = values
+    return objects
+
+
+def _column_type(dtype):
+    '''
+    Like _array_type, but for the values of the columns of columns_basecoro,
+    which are also collected in lists if `dtype` is None, and can also be
+    turned into numpy arrays of booleans or objects.
+    '''
+    if dtype is None or _is_typecode(dtype):
+        return dtype, None
+    numpy, dtype = _numpy_dtype(dtype)
+    if dtype.kind == 'b':
+        return 'B', lambda values: numpy.frombuffer(values, numpy.uint8).astype(dtype)
+    if dtype.kind == 'O':
+        return None, functools.partial(_object_array, numpy)
+    if dtype.kind not in 'fiu':
+        raise ValueError("Unsupported dtype %r, only boolean, integer, floating point "
+                         "and object types are" % (dtype,))
+    return _array_type(dtype)
+
+
+def _masked_columns(converters, columns_and_masks):
+    '''
+    Turns the columns and masks dispatched by columns_basecoro into the
+    columns given to users: numpy masked arrays for those with a converter,
+    and the rest as they are, as long as typed ones have no missing values.
+    '''
+    import numpy
+    columns, masks = columns_and_masks
+    for name, column in columns.items():
+        convert = converters[name]
+        if convert is not None:
+            mask = numpy.frombuffer(masks[name], numpy.uint8).astype(bool)
+            columns[name] = numpy.ma.MaskedArray(convert(column), mask=mask)
+        elif isinstance(column, array.array) and any(masks[name]):
+            raise ValueError(_NOT_NULLABLE % (name, column.typecode))
+    return columns
+
+
+def _columns_options(fields, chunk_size, config):
+    '''
+    Returns the typecodes the columns of `fields` are collected with (see
+    _column_type), whether masks must be collected for them, the function
+    turning the collected columns into the final ones, and the configuration
+    of the parser for those columns (see _arrays_options).
+    '''
+    _check_chunk_size(chunk_size)
+    if isinstance(fields, (compat.bytetype, compat.texttype)):
+        fields = [fields]
+    if not isinstance(fields, dict):
+        fields = dict.fromkeys(fields)
+    typecodes, converters = {}, {}
+    for name, dtype in fields.items():
+        typecodes[name], converters[name] = _column_type(dtype)
+    masks = any(convert is not None for convert in converters.values())
+    convert = functools.partial(_masked_columns, converters) if masks else None
+    if all(typecode is not None for typecode in typecodes.values()):
+        config = dict(config, number_type='decimal')
+    return typecodes, masks, convert, config
 
 
 def integer_or_decimal(str_value):
@@ -208,6 +1113,38 @@ def integer_or_float(str_value):
         return int(str_value)
     return float(str_value)
 
+def _number_literal(str_value):
+    if not _NUMBER_RE.match(str_value):
+        raise ValueError("Invalid number: %r" % (str_value,))
+    return compat.texttype(str_value)
+
+def _number_literal_bytes(str_value):
+    return _number_literal(str_value).encode('ascii')
+
+_NUMBER_RE = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?\Z')
+_NUMBER_CONVERTERS = {
+    'decimal': integer_or_decimal,
+    'float': integer_or_float,
+    'str': _number_literal,
+    'raw': _number_literal_bytes,
+}
+
+def number_converter(use_float=False, number_type=None):
+    '''
+    Returns the function converting the strings of numeric values into the
+    values given to users, according to the `use_float` and `number_type`
+    options. `number_type` takes precedence, and is one of "decimal" (int or
+    Decimal, the default), "float" (int or float, like `use_float`), "str"
+    (the number as written in the document) or "raw" (its bytes).
+    '''
+    if number_type is None:
+        number_type = 'float' if use_float else 'decimal'
+    try:
+        return _NUMBER_CONVERTERS[number_type]
+    except (KeyError, TypeError):
+        raise ValueError("Invalid number_type %r, expected one of %s" %
+                         (number_type, ', '.join(sorted(_NUMBER_CONVERTERS))))
+
 def number(str_value):
     warnings.warn("number() function will be removed in a later release", DeprecationWarning)
     return integer_or_decimal(str_value)
@@ -222,6 +1159,162 @@ def file_source(f, buf_size=64*1024):
             break
 
 
+def _file_chunks(f, buf_size=64*1024):
+    '''
+    Like file_source, but binary file objects with a `readinto` method are read
+    into a single buffer that is reused for all the data, which is yielded as
+    memoryviews of it. Each piece of data is overwritten by the next one, so
+    this is only for the parsing pipelines of the backends, which never keep
+    the data they are given.
+
+    mmap objects are not read at all: memoryviews of their memory are yielded
+    from their current position on, like the yajl2_c backend's generators
+    parse it in place.
+    '''
+    if isinstance(f, mmap.mmap) and not compat.IS_PY2:
+        view = memoryview(f)
+        try:
+            for start in range(f.tell(), len(view), buf_size):
+                yield view[start:start + buf_size]
+            yield view[:0]
+        finally:
+            view.release()
+        return
+    f = compat.bytes_reader(f)
+    if not hasattr(f, 'readinto') or compat.IS_PY2:
+        for data in file_source(f, buf_size):
+            yield data
+        return
+    buf = bytearray(buf_size)
+    view = memoryview(buf)
+    while True:
+        # Like read(), readinto() gives None for non-blocking streams without
+        # data available, which ends the data as well
+        data = view[:f.readinto(buf) or 0]
+        yield data
+        if not data:
+            break
+
+
+# The states of writer_coro: whether it expects a top-level value (or
+# another one), the first value of an array (or another one), the first member
+# of an object (or another one), or the value of a member
+(_WRITER_VALUE, _WRITER_NEXT_VALUE, _WRITER_ARRAY, _WRITER_NEXT_ITEM,
+ _WRITER_MAP, _WRITER_NEXT_MEMBER, _WRITER_MEMBER_VALUE) = range(7)
+# The text preceding a value in each state, and the state that follows it
+_WRITER_VALUE_STATES = {
+    _WRITER_VALUE: ('', _WRITER_NEXT_VALUE),
+    _WRITER_NEXT_VALUE: ('\n', _WRITER_NEXT_VALUE),
+    _WRITER_ARRAY: ('', _WRITER_NEXT_ITEM),
+    _WRITER_NEXT_ITEM: (',', _WRITER_NEXT_ITEM),
+    _WRITER_MEMBER_VALUE: ('', _WRITER_NEXT_MEMBER),
+}
+_UNEXPECTED_EVENT = "Unexpected %s event"
+
+def _number_text(value):
+    if value.__class__ is int:
+        return str(value)
+    if value.__class__ is float:
+        text = repr(value)
+    elif isinstance(value, compat.bytetype):
+        text = value.decode('ascii')
+    elif isinstance(value, compat.texttype):
+        text = value
+    else:
+        text = str(value)
+    if not _NUMBER_RE.match(text):
+        raise ValueError("Invalid number: %r" % (value,))
+    return text
+
+_SCALAR_WRITERS = {
+    'null': lambda value: 'null',
+    'boolean': lambda value: 'true' if value else 'false',
+    'number': _number_text,
+    'integer': _number_text,
+    'double': _number_text,
+    'string': encode_basestring,
+}
+
+@utils.coroutine
+def writer_coro(fileobj, buf_size=64*1024):
+    '''
+    Coroutine writing the events it receives, either as (event, value) or
+    (prefix, event, value) tuples like the ones generated by basic_parse and
+    parse, as compact JSON text into the binary file-like object `fileobj`.
+    Top-level values are separated by newlines.
+
+    The text is accumulated in a single list of pieces that is written (and
+    emptied) each time it reaches `buf_size`, and for the last time when the
+    coroutine is closed, which fails if any container is left open. Events
+    out of place raise a ValueError.
+    '''
+    write = fileobj.write
+    pieces = []
+    append = pieces.append
+    size = 0
+    state = _WRITER_VALUE
+    stack = []
+    while True:
+        try:
+            event = (yield)
+        except GeneratorExit:
+            if pieces:
+                write(''.join(pieces).encode('utf-8'))
+            if stack:
+                raise IncompleteJSONError('Incomplete JSON content')
+            return
+        if len(event) == 3:
+            _, event, value = event
+        else:
+            event, value = event
+
+        if event == 'map_key':
+            if state == _WRITER_MAP:
+                text = encode_basestring(value) + ':'
+            elif state == _WRITER_NEXT_MEMBER:
+                text = ',' + encode_basestring(value) + ':'
+            else:
+                raise ValueError(_UNEXPECTED_EVENT % event)
+            state = _WRITER_MEMBER_VALUE
+        elif event == 'end_map':
+            if state != _WRITER_MAP and state != _WRITER_NEXT_MEMBER:
+                raise ValueError(_UNEXPECTED_EVENT % event)
+            text = '}'
+            state = stack.pop()
+        elif event == 'end_array':
+            if state != _WRITER_ARRAY and state != _WRITER_NEXT_ITEM:
+                raise ValueError(_UNEXPECTED_EVENT % event)
+            text = ']'
+            state = stack.pop()
+        else:
+            try:
+                text, next_state = _WRITER_VALUE_STATES[state]
+            except KeyError:
+                raise ValueError(_UNEXPECTED_EVENT % event)
+            if event == 'start_map':
+                text += '{'
+                stack.append(next_state)
+                state = _WRITER_MAP
+            elif event == 'start_array':
+                text += '['
+                stack.append(next_state)
+                state = _WRITER_ARRAY
+            else:
+                try:
+                    scalar_text = _SCALAR_WRITERS[event]
+                except KeyError:
+                    raise ValueError("Unknown event: %r" % (event,))
+                text += scalar_text(value)
+                state = next_state
+
+        append(text)
+        size += len(text)
+        if size >= buf_size:
+            write(''.join(pieces).encode('utf-8'))
+            del pieces[:]
+            size = 0
+
+
 def _basic_parse_pipeline(backend, config):
     return (
         (backend['basic_parse_basecoro'], [], config),
@@ -235,15 +1328,26 @@ def _parse_pipeline(backend, config):
     )
 
 
-def _items_pipeline(backend, prefix, map_type, config):
+def _items_pipeline(backend, prefix, map_type, fields, schema, raw, config):
+    if 'items_fused_basecoro' in backend:
+        return (
+            (backend['items_fused_basecoro'], (prefix,),
+             dict(config, map_type=map_type, fields=fields, schema=schema, raw=raw)),
+        )
+    if raw:
+        raise ValueError("The %s backend doesn't support raw items" % backend['backend'])
     return (
-        (backend['items_basecoro'], (prefix,), {'map_type': map_type}),
+        (backend['items_basecoro'], (prefix,), {'map_type': map_type, 'fields': fields, 'schema': schema}),
         (backend['parse_basecoro'], [], {}),
         (backend['basic_parse_basecoro'], [], config)
     )
 
 
 def _kvitems_pipeline(backend, prefix, map_type, config):
+    if 'kvitems_fused_basecoro' in backend:
+        return (
+            (backend['kvitems_fused_basecoro'], (prefix,), dict(config, map_type=map_type)),
+        )
     return (
         (backend['kvitems_basecoro'], (prefix,), {'map_type': map_type}),
         (backend['parse_basecoro'], [], {}),
@@ -251,6 +1355,49 @@ def _kvitems_pipeline(backend, prefix, map_type, config):
     )
 
 
+def _items_multi_pipeline(backend, prefixes, map_type, config):
+    return (
+        (backend['items_multi_basecoro'], (prefixes,), {'map_type': map_type}),
+        (backend['parse_basecoro'], [], {}),
+        (backend['basic_parse_basecoro'], [], config)
+    )
+
+
+def _arrays_pipeline(backend, prefix, dtype, chunk_size, config):
+    typecode, convert, config = _arrays_options(dtype, chunk_size, config)
+    if 'arrays_fused_basecoro' in backend:
+        pipeline = (
+            (backend['arrays_fused_basecoro'], (prefix, typecode, chunk_size), config),
+        )
+    else:
+        pipeline = (
+            (backend['arrays_basecoro'], (prefix, typecode, chunk_size), {}),
+            (backend['parse_basecoro'], [], {}),
+            (backend['basic_parse_basecoro'], [], config)
+        )
+    if convert:
+        pipeline = ((_converted_basecoro, (convert,), {}),) + pipeline
+    return pipeline
+
+
+def _columns_pipeline(backend, prefix, fields, chunk_size, map_type, config):
+    typecodes, masks, convert, config = _columns_options(fields, chunk_size, config)
+    if 'columns_fused_basecoro' in backend:
+        pipeline = (
+            (backend['columns_fused_basecoro'], (prefix, typecodes, chunk_size, map_type, masks),
+             config),
+        )
+    else:
+        pipeline = (
+            (backend['columns_basecoro'], (prefix, typecodes, chunk_size, map_type, masks), {}),
+            (backend['parse_basecoro'], [], {}),
+            (backend['basic_parse_basecoro'], [], config)
+        )
+    if convert:
+        pipeline = ((_converted_basecoro, (convert,), {}),) + pipeline
+    return pipeline
+
+
 def _make_basic_parse_coro(backend):
     def basic_parse_coro(target, **config):
         return utils.chain(
@@ -270,10 +1417,11 @@ def _make_parse_coro(backend):
 
 
 def _make_items_coro(backend):
-    def items_coro(target, prefix, map_type=None, **config):
+    def items_coro(target, prefix, map_type=None, fields=None, schema=None, raw=False,
+                   **config):
         return utils.chain(
             target,
-            *_items_pipeline(backend, prefix, map_type, config)
+            *_items_pipeline(backend, prefix, map_type, fields, schema, raw, config)
         )
     return items_coro
 
@@ -287,6 +1435,33 @@ def _make_kvitems_coro(backend):
     return kvitems_coro
 
 
+def _make_items_multi_coro(backend):
+    def items_multi_coro(target, prefixes, map_type=None, **config):
+        return utils.chain(
+            target,
+            *_items_multi_pipeline(backend, prefixes, map_type, config)
+        )
+    return items_multi_coro
+
+
+def _make_arrays_coro(backend):
+    def arrays_coro(target, prefix, dtype='d', chunk_size=None, **config):
+        return utils.chain(
+            target,
+            *_arrays_pipeline(backend, prefix, dtype, chunk_size, config)
+        )
+    return arrays_coro
+
+
+def _make_columns_coro(backend):
+    def columns_coro(target, prefix, fields, chunk_size=None, map_type=None, **config):
+        return utils.chain(
+            target,
+            *_columns_pipeline(backend, prefix, fields, chunk_size, map_type, config)
+        )
+    return columns_coro
+
+
 def is_async_file(x):
     """True if x has an asynchronous `read` method"""
     return compat.IS_PY35 and hasattr(x, 'read') and inspect.iscoroutinefunction(x.read)
@@ -302,122 +1477,357 @@ def is_iterable(x):
     return hasattr(x, '__iter__')
 
 
+def map_file(path, sequential=True):
+    '''
+    Maps the file at `path` in memory for reading, advising the kernel that it
+    will be read sequentially unless `sequential` is False. The resulting mmap
+    object can be given to any ijson function; the ``yajl2_c`` backend parses
+    its memory in place, without any further reading or copying. Files that
+    can't be mapped (e.g., empty ones) are read into a BytesIO instead.
+    '''
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            return compat.BytesIO(f.read())
+    advice = getattr(mmap, 'MADV_SEQUENTIAL', None)
+    if sequential and advice is not None and hasattr(data, 'madvise'):
+        data.madvise(advice)
+    return data
+
+
 def _get_source(source):
     if isinstance(source, compat.bytetype):
         return compat.BytesIO(source)
     elif isinstance(source, compat.texttype):
         return compat.StringIO(source)
+    elif hasattr(source, '__fspath__'):
+        return map_file(source)
     return source
 
 
 def _make_basic_parse_gen(backend):
-    def basic_parse_gen(file_obj, buf_size=64*1024, **config):
-        return utils.coros2gen(
-            file_source(file_obj, buf_size=buf_size),
+    def basic_parse_gen(file_obj, buf_size=64*1024, batch=False, **config):
+        coros2gen = utils.coros2batches if batch else utils.coros2gen
+        return coros2gen(
+            _file_chunks(file_obj, buf_size=buf_size),
             *_basic_parse_pipeline(backend, config)
         )
     return basic_parse_gen
 
 
 def _make_parse_gen(backend):
-    def parse_gen(file_obj, buf_size=64*1024, **config):
-        return utils.coros2gen(
-            file_source(file_obj, buf_size=buf_size),
+    def parse_gen(file_obj, buf_size=64*1024, batch=False, **config):
+        coros2gen = utils.coros2batches if batch else utils.coros2gen
+        return coros2gen(
+            _file_chunks(file_obj, buf_size=buf_size),
             *_parse_pipeline(backend, config)
         )
     return parse_gen
 
 
 def _make_items_gen(backend):
-    def items_gen(file_obj, prefix, map_type=None, buf_size=64*1024, **config):
-        return utils.coros2gen(
-            file_source(file_obj, buf_size=buf_size),
-            *_items_pipeline(backend, prefix, map_type, config)
+    def items_gen(file_obj, prefix, map_type=None, buf_size=64*1024, fields=None, schema=None,
+                  raw=False, batch=False, **config):
+        coros2gen = utils.coros2batches if batch else utils.coros2gen
+        return coros2gen(
+            _file_chunks(file_obj, buf_size=buf_size),
+            *_items_pipeline(backend, prefix, map_type, fields, schema, raw, config)
         )
     return items_gen
 
 
 def _make_kvitems_gen(backend):
-    def kvitems_gen(file_obj, prefix, map_type=None, buf_size=64*1024, **config):
-        return utils.coros2gen(
-            file_source(file_obj, buf_size=buf_size),
+    def kvitems_gen(file_obj, prefix, map_type=None, buf_size=64*1024, batch=False, **config):
+        coros2gen = utils.coros2batches if batch else utils.coros2gen
+        return coros2gen(
+            _file_chunks(file_obj, buf_size=buf_size),
             *_kvitems_pipeline(backend, prefix, map_type, config)
         )
     return kvitems_gen
 
 
+def _make_items_multi_gen(backend):
+    def items_multi_gen(file_obj, prefixes, map_type=None, buf_size=64*1024, batch=False, **config):
+        coros2gen = utils.coros2batches if batch else utils.coros2gen
+        return coros2gen(
+            _file_chunks(file_obj, buf_size=buf_size),
+            *_items_multi_pipeline(backend, prefixes, map_type, config)
+        )
+    return items_multi_gen
+
+
+def _make_arrays_gen(backend):
+    def arrays_gen(file_obj, prefix, dtype='d', chunk_size=None, buf_size=64*1024, batch=False,
+                   **config):
+        coros2gen = utils.coros2batches if batch else utils.coros2gen
+        return coros2gen(
+            _file_chunks(file_obj, buf_size=buf_size),
+            *_arrays_pipeline(backend, prefix, dtype, chunk_size, config)
+        )
+    return arrays_gen
+
+
+def _make_columns_gen(backend):
+    def columns_gen(file_obj, prefix, fields, chunk_size=None, map_type=None, buf_size=64*1024,
+                    batch=False, **config):
+        coros2gen = utils.coros2batches if batch else utils.coros2gen
+        return coros2gen(
+            _file_chunks(file_obj, buf_size=buf_size),
+            *_columns_pipeline(backend, prefix, fields, chunk_size, map_type, config)
+        )
+    return columns_gen
+
+
+def _limit(values, limit):
+    '''
+    Yields the first `limit` values out of `values`, which is released right
+    after producing the last of them so no further input is read
+    '''
+    if limit <= 0:
+        return
+    for value in values:
+        limit -= 1
+        if not limit:
+            break
+        yield value
+    else:
+        return
+    # generators without a close method are released by dropping them
+    close = getattr(values, 'close', None)
+    if close:
+        close()
+    values = close = None
+    yield value
+
+
+def _limited(values, limit):
+    if limit is None:
+        return values
+    if hasattr(values, '__anext__'):
+        from . import utils35
+        return utils35.limited_async_iterable(values, limit)
+    return _limit(values, limit)
+
+
+def _check_batch(batch, limit):
+    '''Validates the batch option, returning whether values come in batches'''
+    if batch is False:
+        return False
+    if batch is not True and (isinstance(batch, bool) or not isinstance(batch, int) or batch < 1):
+        raise ValueError("batch must be True, False or a positive number, not %r" % (batch,))
+    if limit is not None:
+        raise ValueError("batch and limit can't be used together")
+    return True
+
+
+def _rebatch(batches, size):
+    '''Yields the values of `batches` in lists of `size` values'''
+    values = []
+    for batch in batches:
+        values += batch
+        if len(values) >= size:
+            end = len(values) - len(values) % size
+            for start in range(0, end, size):
+                yield values[start:start + size]
+            values = values[end:]
+    if values:
+        yield values
+
+
+def _batched(batches, batch):
+    if batch is True or batch is False:
+        return batches
+    if hasattr(batches, '__anext__'):
+        from . import utils35
+        return utils35.rebatched_async_iterable(batches, batch)
+    return _rebatch(batches, batch)
+
+
 def _make_basic_parse(backend):
-    def basic_parse(source, buf_size=64*1024, **config):
+    def basic_parse(source, buf_size=64*1024, batch=False, **config):
         source = _get_source(source)
+        batched = _check_batch(batch, None)
         if is_async_file(source):
-            return backend['basic_parse_async'](
-                source, buf_size=buf_size, **config
-            )
+            return _batched(backend['basic_parse_async'](
+                source, buf_size=buf_size, batch=batched, **config
+            ), batch)
         elif is_file(source):
-            return backend['basic_parse_gen'](
-                source, buf_size=buf_size, **config
-            )
+            return _batched(backend['basic_parse_gen'](
+                source, buf_size=buf_size, batch=batched, **config
+            ), batch)
         raise ValueError("Unknown source type: %r" % type(source))
     return basic_parse
 
 
 def _make_parse(backend):
-    def parse(source, buf_size=64*1024, **config):
+    def parse(source, buf_size=64*1024, batch=False, **config):
         source = _get_source(source)
+        batched = _check_batch(batch, None)
         if is_async_file(source):
-            return backend['parse_async'](
-                source, buf_size=buf_size, **config
-            )
+            return _batched(backend['parse_async'](
+                source, buf_size=buf_size, batch=batched, **config
+            ), batch)
         elif is_file(source):
-            return backend['parse_gen'](
-                source, buf_size=buf_size, **config
-            )
+            return _batched(backend['parse_gen'](
+                source, buf_size=buf_size, batch=batched, **config
+            ), batch)
         elif is_iterable(source):
-            return utils.coros2gen(source,
+            coros2gen = utils.coros2batches if batched else utils.coros2gen
+            return _batched(coros2gen(source,
                 (parse_basecoro, (), {})
-            )
+            ), batch)
         raise ValueError("Unknown source type: %r" % type(source))
     return parse
 
 
 def _make_items(backend):
-    def items(source, prefix, map_type=None, buf_size=64*1024, **config):
+    def items(source, prefix, map_type=None, buf_size=64*1024, limit=None, fields=None,
+              schema=None, raw=False, batch=False, **config):
         source = _get_source(source)
+        batched = _check_batch(batch, limit)
         if is_async_file(source):
-            return backend['items_async'](
-                source, prefix, map_type=map_type, buf_size=buf_size, **config
-            )
+            return _batched(_limited(backend['items_async'](
+                source, prefix, map_type=map_type, buf_size=buf_size, fields=fields,
+                schema=schema, raw=raw, batch=batched, **config
+            ), limit), batch)
         elif is_file(source):
-            return backend['items_gen'](
-                source, prefix, map_type=map_type, buf_size=buf_size, **config
-            )
+            return _batched(_limited(backend['items_gen'](
+                source, prefix, map_type=map_type, buf_size=buf_size, fields=fields,
+                schema=schema, raw=raw, batch=batched, **config
+            ), limit), batch)
         elif is_iterable(source):
-            return utils.coros2gen(source,
-                (backend['items_basecoro'], (prefix,), {'map_type': map_type})
-            )
+            coros2gen = utils.coros2batches if batched else utils.coros2gen
+            return _batched(_limited(coros2gen(source,
+                (backend['items_basecoro'], (prefix,),
+                 {'map_type': map_type, 'fields': fields, 'schema': schema, 'raw': raw})
+            ), limit), batch)
         raise ValueError("Unknown source type: %r" % type(source))
     return items
 
 
 def _make_kvitems(backend):
-    def kvitems(source, prefix, map_type=None, buf_size=64*1024, **config):
+    def kvitems(source, prefix, map_type=None, buf_size=64*1024, limit=None, batch=False,
+                **config):
         source = _get_source(source)
+        batched = _check_batch(batch, limit)
         if is_async_file(source):
-            return backend['kvitems_async'](
-                source, prefix, map_type=map_type, buf_size=buf_size, **config
-            )
+            return _batched(_limited(backend['kvitems_async'](
+                source, prefix, map_type=map_type, buf_size=buf_size, batch=batched, **config
+            ), limit), batch)
         elif is_file(source):
-            return backend['kvitems_gen'](
-                source, prefix, map_type=map_type, buf_size=buf_size, **config
-            )
+            return _batched(_limited(backend['kvitems_gen'](
+                source, prefix, map_type=map_type, buf_size=buf_size, batch=batched, **config
+            ), limit), batch)
         elif is_iterable(source):
-            return utils.coros2gen(source,
+            coros2gen = utils.coros2batches if batched else utils.coros2gen
+            return _batched(_limited(coros2gen(source,
                 (backend['kvitems_basecoro'], (prefix,), {'map_type': map_type})
-            )
+            ), limit), batch)
         raise ValueError("Unknown source type: %r" % type(source))
     return kvitems
 
 
+def _make_items_multi(backend):
+    def items_multi(source, prefixes, map_type=None, buf_size=64*1024, limit=None, batch=False,
+                    **config):
+        source = _get_source(source)
+        batched = _check_batch(batch, limit)
+        if is_async_file(source):
+            return _batched(_limited(backend['items_multi_async'](
+                source, prefixes, map_type=map_type, buf_size=buf_size, batch=batched, **config
+            ), limit), batch)
+        elif is_file(source):
+            return _batched(_limited(backend['items_multi_gen'](
+                source, prefixes, map_type=map_type, buf_size=buf_size, batch=batched, **config
+            ), limit), batch)
+        elif is_iterable(source):
+            coros2gen = utils.coros2batches if batched else utils.coros2gen
+            return _batched(_limited(coros2gen(source,
+                (backend['items_multi_basecoro'], (prefixes,), {'map_type': map_type})
+            ), limit), batch)
+        raise ValueError("Unknown source type: %r" % type(source))
+    return items_multi
+
+
+def _make_arrays(backend):
+    def arrays(source, prefix, dtype='d', chunk_size=None, buf_size=64*1024, limit=None,
+               batch=False, **config):
+        source = _get_source(source)
+        batched = _check_batch(batch, limit)
+        if is_async_file(source):
+            return _batched(_limited(backend['arrays_async'](
+                source, prefix, dtype=dtype, chunk_size=chunk_size, buf_size=buf_size,
+                batch=batched, **config
+            ), limit), batch)
+        elif is_file(source):
+            return _batched(_limited(backend['arrays_gen'](
+                source, prefix, dtype=dtype, chunk_size=chunk_size, buf_size=buf_size,
+                batch=batched, **config
+            ), limit), batch)
+        elif is_iterable(source):
+            typecode, convert, _ = _arrays_options(dtype, chunk_size, {})
+            pipeline = ((backend['arrays_basecoro'], (prefix, typecode, chunk_size), {}),)
+            if convert:
+                pipeline = ((_converted_basecoro, (convert,), {}),) + pipeline
+            coros2gen = utils.coros2batches if batched else utils.coros2gen
+            return _batched(_limited(coros2gen(source, *pipeline), limit), batch)
+        raise ValueError("Unknown source type: %r" % type(source))
+    return arrays
+
+
+def _make_columns(backend):
+    def columns(source, prefix, fields, chunk_size=None, map_type=None, buf_size=64*1024,
+                limit=None, batch=False, **config):
+        source = _get_source(source)
+        batched = _check_batch(batch, limit)
+        if is_async_file(source):
+            return _batched(_limited(backend['columns_async'](
+                source, prefix, fields, chunk_size=chunk_size, map_type=map_type,
+                buf_size=buf_size, batch=batched, **config
+            ), limit), batch)
+        elif is_file(source):
+            return _batched(_limited(backend['columns_gen'](
+                source, prefix, fields, chunk_size=chunk_size, map_type=map_type,
+                buf_size=buf_size, batch=batched, **config
+            ), limit), batch)
+        elif is_iterable(source):
+            typecodes, masks, convert, _ = _columns_options(fields, chunk_size, {})
+            pipeline = (
+                (backend['columns_basecoro'], (prefix, typecodes, chunk_size, map_type, masks), {}),
+            )
+            if convert:
+                pipeline = ((_converted_basecoro, (convert,), {}),) + pipeline
+            coros2gen = utils.coros2batches if batched else utils.coros2gen
+            return _batched(_limited(coros2gen(source, *pipeline), limit), batch)
+        raise ValueError("Unknown source type: %r" % type(source))
+    return columns
+
+
+def _make_get(backend):
+    def get(source, prefix, default=None, map_type=None, buf_size=64*1024, **config):
+        values = backend['items'](
+            source, prefix, map_type=map_type, buf_size=buf_size, limit=1, **config
+        )
+        if hasattr(values, '__anext__'):
+            from . import utils35
+            return utils35.first_async(values, default)
+        for value in values:
+            return value
+        return default
+    return get
+
+
+
+def _make_dump_events(backend):
+    def dump_events(events, fileobj, buf_size=64*1024):
+        writer = backend['writer_coro'](fileobj, buf_size=buf_size)
+        send = writer.send
+        for event in events:
+            send(event)
+        writer.close()
+    return dump_events
+
 _common_functions_warn = '''
 Don't use the ijson.common.* functions; instead go directly with the ijson.* ones.
 See the documentation for more information.
@@ -456,7 +1866,8 @@ def enrich_backend(backend):
     it might be missing by using the generic ones written in python.
     '''
     backend['backend'] = backend['__name__'].split('.')[-1]
-    for name in ('basic_parse', 'parse', 'items', 'kvitems'):
+    for name in ('basic_parse', 'parse', 'items', 'kvitems', 'items_multi', 'arrays',
+                 'columns'):
         basecoro_name = name + '_basecoro'
         if basecoro_name not in backend:
             backend[basecoro_name] = globals()[basecoro_name]
@@ -475,4 +1886,8 @@ def enrich_backend(backend):
                 factory = getattr(utils35, '_make_' + async_name)
                 backend[async_name] = factory(backend)
         factory = globals()['_make_' + name]
-        backend[name] = factory(backend)
\ No newline at end of file
+        backend[name] = factory(backend)
+    backend['get'] = _make_get(backend)
+    if 'writer_coro' not in backend:
+        backend['writer_coro'] = writer_coro
+    backend['dump_events'] = _make_dump_events(backend)
\ No newline at end of file
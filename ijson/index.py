@@ -0,0 +1,354 @@
+'''
+Byte-offset indexes of the values under a prefix for random access into big
+JSON documents.
+
+``build_index`` scans a document once and writes the start and end offsets of
+all the values directly under the containers at a prefix (i.e., their array
+elements or object members) into a sidecar file. ``IndexedDocument`` then uses
+this index to access individual values, reading and parsing only their bytes.
+'''
+import array
+import json
+import mmap
+import re
+import sys
+
+from ijson import common, compat
+
+
+# Tokens relevant for indexing: strings, structural characters and literals
+_TOKEN_RE = re.compile(br'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{},:]|[^\s\[\]{},:"]+')
+
+_MAGIC = b'IJSON-INDEX 1\n'
+_OFFSET_TYPECODE = 'q' if 'q' in getattr(array, 'typecodes', '') else 'l'
+_PATH_TYPES = (compat.bytetype, compat.texttype) if compat.IS_PY2 else (compat.texttype,)
+# Errors of the json module telling where its input stops being valid JSON.
+# Before python 3.5 they are plain ValueErrors, which are all taken as such
+_JSONDecodeError = getattr(json, 'JSONDecodeError', ValueError)
+_WHITESPACE_RE = re.compile(br'\s*')
+# Size of the windows through which documents that can't be mmap'ed are read
+_WINDOW_SIZE = 1024 * 1024
+
+
+class _ValueScanner(object):
+    '''
+    Finds where the JSON values starting at given offsets of a document end,
+    using the scanner of the json module, which is much faster than looking at
+    their tokens one by one. The document is given by a `read(start, end)`
+    function and its `size`.
+
+    Windows of the document are decoded as latin-1 so that offsets in the
+    decoded text are also offsets in the document (UTF-8 multi-byte sequences,
+    which can only appear inside strings, are simply seen as several
+    characters).
+    '''
+
+    window_size = _WINDOW_SIZE
+
+    def __init__(self, read, size):
+        self.read = read
+        self.size = size
+        self.base = 0
+        self.text = u''
+        self.scan_once = json.JSONDecoder().scan_once
+
+    def end(self, pos):
+        '''Returns the offset right after the end of the value starting at `pos`'''
+        size = self.window_size
+        while True:
+            text = self.text
+            rel = pos - self.base
+            if 0 <= rel < len(text):
+                at_end = self.base + len(text) >= self.size
+                try:
+                    failed_at = self.scan_once(text, rel)[1]
+                    if failed_at < len(text) or at_end:
+                        return self.base + failed_at
+                except StopIteration as e:
+                    failed_at = e.args[0] if e.args else len(text)
+                except _JSONDecodeError as e:
+                    failed_at = getattr(e, 'pos', len(text))
+                except ValueError as e:
+                    # Not about where the text stops being JSON (e.g., the
+                    # limit on the number of digits of integers), so reading
+                    # more of the document wouldn't help
+                    raise common.JSONError(
+                        'Invalid JSON content at offset %d: %s' % (pos, e))
+                if at_end:
+                    if failed_at >= len(text):
+                        raise common.IncompleteJSONError('Incomplete JSON content')
+                    raise common.JSONError('Invalid JSON content at offset %d' % (self.base + failed_at))
+                # The value might not fit in the current window
+                size = max(size, 2 * len(text))
+            self.base = pos
+            self.text = self.read(pos, pos + size).decode('latin-1')
+
+
+def _index_values(document, prefix):
+    '''
+    Yields (key, start, end) for each value directly under the containers found
+    at `prefix` in a _Document, with key being None for array elements.
+
+    Only the tokens needed to follow the location in the document are looked
+    at, so it is not fully validated: indexed values and containers that
+    can't contain the prefix are skipped whole with a _ValueScanner.
+    '''
+    parts = prefix.split('.') if prefix else []
+    indexed_depth = len(parts) + 1
+    # whether each open container whose location leads to the prefix is an
+    # object; other containers are skipped whole
+    objects = []
+    key = None
+    expect_key = False
+    size = document.size()
+    value_end = _ValueScanner(document.read, size).end
+    match_token = _TOKEN_RE.match
+    match_whitespace = _WHITESPACE_RE.match
+    base, buf = document.window(0)
+    pos = 0
+    while True:
+        # Tokens are looked for in `buf`, a window of the document starting at
+        # offset `base`, which is moved forward to `pos` when `pos` goes past
+        # it or the next token might not fit in it
+        rel = pos - base
+        if rel < len(buf):
+            rel = match_whitespace(buf, rel).end()
+        match = match_token(buf, rel)
+        if not match or match.end() == len(buf):
+            if base + len(buf) >= size:
+                if rel == len(buf):
+                    break
+                if not match:
+                    raise common.IncompleteJSONError('Incomplete JSON content')
+            else:
+                pos = base + rel
+                grown = base == pos
+                base, buf = document.window(pos, 2 * len(buf) if grown else _WINDOW_SIZE)
+                continue
+        start, pos = match.span()
+        symbol = buf[start:start + 1]
+        start += base
+        pos += base
+
+        if symbol == b':':
+            continue
+        elif symbol == b',':
+            expect_key = objects[-1]
+            continue
+        elif symbol == b']' or symbol == b'}':
+            objects.pop()
+            expect_key = False
+            continue
+        elif expect_key:
+            key = json.loads(compat.b2s(match.group()))
+            expect_key = False
+            continue
+
+        # A value, at depth len(objects)
+        depth = len(objects)
+        is_container = symbol == b'[' or symbol == b'{'
+        if depth == indexed_depth:
+            if is_container:
+                pos = value_end(start)
+            yield (key if objects[-1] else None), start, pos
+        elif is_container:
+            if depth == 0 or (key if objects[-1] else 'item') == parts[depth - 1]:
+                objects.append(symbol == b'{')
+                expect_key = objects[-1]
+            else:
+                pos = value_end(start)
+
+    if objects:
+        raise common.IncompleteJSONError('Incomplete JSON content')
+
+
+def _default_index_path(source):
+    name = source if isinstance(source, _PATH_TYPES) else getattr(source, 'name', None)
+    if not isinstance(name, _PATH_TYPES):
+        raise ValueError("index_path is required when indexing %r" % (source,))
+    return name + '.idx'
+
+
+class _Document(object):
+    '''A binary document given as a file name or file object, mmap'ed if possible'''
+
+    def __init__(self, source):
+        if isinstance(source, _PATH_TYPES):
+            self.file = open(source, 'rb')
+            self.owned = True
+        else:
+            self.file = source
+            self.owned = False
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.data = None
+
+    def size(self):
+        if self.data is not None:
+            return len(self.data)
+        self.file.seek(0, 2)
+        return self.file.tell()
+
+    def contents(self):
+        if self.data is not None:
+            return self.data
+        self.file.seek(0)
+        return self.file.read()
+
+    def read(self, start, end):
+        if self.data is not None:
+            return self.data[start:end]
+        self.file.seek(start)
+        return self.file.read(end - start)
+
+    def window(self, start, size=_WINDOW_SIZE):
+        '''
+        Returns the offset and contents of a window of at least `size` bytes
+        (less at the end) starting at or before `start`. mmap'ed documents are
+        a single window, others are read piecewise to keep memory bounded.
+        '''
+        if self.data is not None:
+            return 0, self.data
+        return start, self.read(start, start + size)
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        if self.owned:
+            self.file.close()
+
+
+def _write_index(f, prefix, size, keys, starts, ends):
+    header = {
+        'prefix': prefix, 'size': size, 'count': len(starts),
+        'byteorder': sys.byteorder, 'keys': any(key is not None for key in keys)
+    }
+    f.write(_MAGIC)
+    f.write(json.dumps(header).encode('utf-8') + b'\n')
+    f.write(starts.tostring() if compat.IS_PY2 else starts.tobytes())
+    f.write(ends.tostring() if compat.IS_PY2 else ends.tobytes())
+    if header['keys']:
+        f.write(json.dumps(keys).encode('utf-8'))
+
+
+def _read_index(f):
+    if f.readline() != _MAGIC:
+        raise ValueError('Not an ijson index')
+    header = json.loads(compat.b2s(f.readline()))
+    offsets = []
+    for _ in range(2):
+        values = array.array(_OFFSET_TYPECODE)
+        data = f.read(header['count'] * values.itemsize)
+        values.fromstring(data) if compat.IS_PY2 else values.frombytes(data)
+        if header['byteorder'] != sys.byteorder:
+            values.byteswap()
+        offsets.append(values)
+    keys = json.loads(compat.b2s(f.read())) if header['keys'] else None
+    return header, offsets[0], offsets[1], keys
+
+
+def _scan(source, prefix):
+    '''Returns the size of a document and the keys, starts and ends of its values at `prefix`'''
+    document = _Document(source)
+    try:
+        keys = []
+        starts = array.array(_OFFSET_TYPECODE)
+        ends = array.array(_OFFSET_TYPECODE)
+        for key, start, end in _index_values(document, prefix):
+            keys.append(key)
+            starts.append(start)
+            ends.append(end)
+        size = document.size()
+    finally:
+        document.close()
+    return size, keys, starts, ends
+
+
+def build_index(source, prefix, index_path=None):
+    '''
+    Scans a JSON document and writes an index with the start and end offsets of
+    all values directly under the containers at `prefix` (i.e., the elements of
+    arrays, or the members of objects, in which case their keys are also kept).
+
+    `source` is a file name or a binary file object, and the index is written
+    to `index_path`, which defaults to the name of the document plus ".idx".
+    The document is assumed to be valid JSON; it is not validated while being
+    indexed, only the values read later through the index are. Returns the
+    path of the index.
+    '''
+    if index_path is None:
+        index_path = _default_index_path(source)
+    size, keys, starts, ends = _scan(source, prefix)
+    with open(index_path, 'wb') as f:
+        _write_index(f, prefix, size, keys, starts, ends)
+    return index_path
+
+
+class IndexedDocument(object):
+    '''
+    Random access to the values of a JSON document indexed with build_index.
+
+    Values are accessed by position (``doc[k]``) or, if they are object
+    members, by key (``doc['key']``, returning the first member with that
+    key). Only the bytes of the requested value are read and parsed, using
+    `backend` (defaults to ijson's default backend) and any further options
+    given (e.g., ``map_type`` or ``use_float``).
+    '''
+
+    def __init__(self, source, index_path=None, backend=None, **config):
+        if index_path is None:
+            index_path = _default_index_path(source)
+        with open(index_path, 'rb') as f:
+            header, self._starts, self._ends, self._keys = _read_index(f)
+        self.prefix = header['prefix']
+        self._positions = None
+        if backend is None:
+            import ijson as backend
+        self._get = backend.get
+        self._config = config
+        self._document = _Document(source)
+        if self._document.size() != header['size']:
+            self._document.close()
+            raise ValueError(
+                "Index %s is out of date (document size is %d, expected %d)" %
+                (index_path, self._document.size(), header['size']))
+
+    def __len__(self):
+        return len(self._starts)
+
+    def keys(self):
+        '''The keys of the indexed values (None for array elements)'''
+        if self._keys is None:
+            return [None] * len(self)
+        return list(self._keys)
+
+    def position(self, key):
+        '''The position of the first indexed value with the given key'''
+        if self._positions is None:
+            self._positions = {}
+            for position, value_key in enumerate(self._keys or ()):
+                self._positions.setdefault(value_key, position)
+        return self._positions[key]
+
+    def raw(self, k):
+        '''The bytes of the `k`-th indexed value, or the one with key `k`'''
+        if isinstance(k, _PATH_TYPES):
+            k = self.position(k)
+        return self._document.read(self._starts[k], self._ends[k])
+
+    def __getitem__(self, k):
+        return self._get(self.raw(k), '', **self._config)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def close(self):
+        self._document.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,347 @@
+'''
+Parallel parsing of big JSON documents using a pool of processes.
+
+The array under a prefix is split into ranges of consecutive elements that
+are parsed by different worker processes. Element boundaries are either taken
+from an index built with ``ijson.build_index``, or guessed by the workers
+themselves after cutting the document at arbitrary offsets, in which case the
+guesses are validated (and mis-speculated ranges parsed again) when merging
+their results. JSON Lines documents are simply split at line boundaries.
+'''
+import bisect
+import collections
+import multiprocessing
+import os
+import re
+
+import ijson
+from ijson import common, index, utils
+
+
+# What follows an array element: a comma, or the end of the array
+_SEPARATOR_RE = re.compile(br'\s*([,\]])')
+_WHITESPACE_RE = re.compile(br'\s*')
+# Candidate element boundaries for workers resynchronizing at a random offset
+_CANDIDATE_RE = re.compile(br',\s*')
+
+
+def _split_prefix(prefix):
+    '''
+    Splits a prefix into that of the array whose elements are distributed
+    among workers, and the prefix of the objects under each of its elements.
+    '''
+    parts = prefix.split('.') if prefix else []
+    if 'item' not in parts:
+        raise ValueError("prefix %r doesn't refer to elements of an array" % (prefix,))
+    i = parts.index('item')
+    if common.is_prefix_pattern('.'.join(parts[:i + 1])):
+        raise ValueError("the array in prefix %r can't be located with a pattern" % (prefix,))
+    return '.'.join(parts[:i]), '.'.join(parts[i:])
+
+
+def _check_array(keys, prefix):
+    if keys and any(key is not None for key in keys):
+        raise ValueError("Values at %r are members of an object, not elements of an array" % (prefix,))
+
+
+def _element_offsets(path, prefix, index_path):
+    '''The start and end offsets of the elements of the array at `prefix`, read from an index'''
+    with open(index_path, 'rb') as f:
+        header, starts, ends, keys = index._read_index(f)
+    if header['prefix'] != prefix:
+        raise ValueError("Index %s is for prefix %r, not %r" % (index_path, header['prefix'], prefix))
+    if header['size'] != os.path.getsize(path):
+        raise ValueError("Index %s is out of date" % (index_path,))
+    _check_array(keys, prefix)
+    return starts, ends
+
+
+def _first_element(path, prefix):
+    '''The offset of the first element of the array at `prefix`, None if there is none'''
+    document = index._Document(path)
+    try:
+        first = next(index._index_values(document, prefix), None)
+    finally:
+        document.close()
+    if first is None:
+        return None
+    key, start, _ = first
+    _check_array([key], prefix)
+    return start
+
+
+def _ranges(starts, ends, chunk_bytes):
+    '''Groups consecutive elements into (start, end) ranges of about chunk_bytes'''
+    i = 0
+    while i < len(starts):
+        j = max(bisect.bisect_left(ends, starts[i] + chunk_bytes, i), i + 1)
+        j = min(j, len(starts))
+        yield starts[i], ends[j - 1]
+        i = j
+
+
+def _parse(chunks, method, prefix, backend, config):
+    '''The results of `method` over some chunks of data'''
+    results = utils.sendable_list()
+    coro = getattr(ijson.get_backend(backend), method + '_coro')(results, prefix, **config)
+    for chunk in chunks:
+        if chunk:
+            coro.send(chunk)
+    coro.close()
+    return results
+
+
+def _read(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def _parse_range(path, start, end, method, prefix, backend, config):
+    '''The results of `method` for the array elements between two offsets of a file'''
+    return _parse((b'[', _read(path, start, end), b']'), method, prefix, backend, config)
+
+
+def _parse_lines(path, start, end, method, prefix, backend, config):
+    '''The results of `method` for the lines between two offsets of a file'''
+    config = dict(config, multiple_values=True)
+    data = _read(path, start, end)
+    # Ranges with blank lines only have no values, but would be incomplete JSON
+    if _WHITESPACE_RE.match(data).end() == len(data):
+        return []
+    return _parse((data,), method, prefix, backend, config)
+
+
+def _line_ranges(path, chunk_bytes):
+    '''Splits a file into (start, end) ranges of whole lines of about chunk_bytes'''
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = start + chunk_bytes
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            end = min(end, size)
+            yield start, end
+            start = end
+
+
+def _elements(data, scanner, start, stop):
+    '''
+    Follows the array elements starting at offset `start` until one starts at
+    or after `stop`, returning the end of the last element that starts before
+    `stop` (`start` if none does) and the start of the next one (None if the
+    array ends first).
+    '''
+    end = pos = start
+    while pos < stop:
+        end = scanner.end(pos)
+        separator = _SEPARATOR_RE.match(data, end)
+        if not separator:
+            if _WHITESPACE_RE.match(data, end).end() == len(data):
+                raise common.IncompleteJSONError('Incomplete JSON content')
+            raise common.JSONError('Invalid JSON content at offset %d' % (end,))
+        if separator.group(1) == b']':
+            return end, None
+        pos = _WHITESPACE_RE.match(data, separator.end()).end()
+    return end, pos
+
+
+def _resynchronize(data, scanner, pos, stop):
+    '''
+    Guesses where the first array element starting at or after `pos` is, and
+    follows the elements from there like _elements.
+
+    Candidates are positions right after commas, which are rejected if the
+    values following them are not separated by commas up to `stop`. Those
+    reaching the end of an array before `stop` might be in an array nested in
+    an element, so they are used only if no candidate reaches `stop`, and then
+    the one spanning the most bytes is chosen.
+    '''
+    # Elements starting right at or after `pos` are preceded by a comma and
+    # whitespace that might be right before it
+    while pos > 0 and data[pos - 1:pos] in b' \t\n\r,':
+        pos -= 1
+    fallback = None
+    search = _CANDIDATE_RE.search
+    while True:
+        candidate = search(data, pos)
+        if not candidate or candidate.end() >= stop:
+            return fallback or (None, None, None)
+        start = candidate.end()
+        try:
+            end, next_start = _elements(data, scanner, start, stop)
+        except common.JSONError:
+            pos = start
+            continue
+        if next_start is not None:
+            return start, end, next_start
+        if fallback is None or end - start > fallback[1] - fallback[0]:
+            fallback = start, end, next_start
+        pos = end
+
+
+def _speculate_range(path, start, stop, guess, method, prefix, backend, config):
+    '''
+    Parses the array elements starting between offsets `start` and `stop`,
+    where `start` is the start of an element, or just a guess where elements
+    should be looked for. Returns the start of the first parsed element (None
+    if none could be found), that of the element after the last one (None if
+    the array ended), and the results of parsing them.
+    '''
+    document = index._Document(path)
+    try:
+        data = document.contents()
+        scanner = index._ValueScanner(document.read, len(data))
+        if guess:
+            start, end, next_start = _resynchronize(data, scanner, start, stop)
+        else:
+            end, next_start = _elements(data, scanner, start, stop)
+        del data, scanner
+    finally:
+        document.close()
+    if start is None:
+        return None, None, []
+    return start, next_start, _parse_range(path, start, end, method, prefix, backend, config)
+
+
+def _next_result(pending, ordered):
+    if ordered:
+        return pending.popleft().get()
+    while True:
+        for i, result in enumerate(pending):
+            if result.ready():
+                del pending[i]
+                return result.get()
+        pending[0].wait(0.001)
+
+
+def _run(function, tasks, workers, ordered):
+    '''
+    Runs `function` over `tasks` in a pool of `workers` processes, yielding
+    their results. At most two tasks per worker are in flight at any time.
+    '''
+    pool = multiprocessing.Pool(workers)
+    try:
+        pending = collections.deque()
+        for task in tasks:
+            pending.append(pool.apply_async(function, task))
+            if len(pending) >= 2 * workers:
+                yield _next_result(pending, ordered)
+        while pending:
+            yield _next_result(pending, ordered)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _indexed(path, array_prefix, index_path, chunk_bytes, workers, ordered, *args):
+    starts, ends = _element_offsets(path, array_prefix, index_path)
+    tasks = (
+        (path, start, end) + args
+        for start, end in _ranges(starts, ends, chunk_bytes)
+    )
+    for results in _run(_parse_range, tasks, workers, ordered):
+        for result in results:
+            yield result
+
+
+def _lines(path, chunk_bytes, workers, ordered, *args):
+    tasks = (
+        (path, start, end) + args
+        for start, end in _line_ranges(path, chunk_bytes)
+    )
+    for results in _run(_parse_lines, tasks, workers, ordered):
+        for result in results:
+            yield result
+
+
+def _speculative(path, array_prefix, chunk_bytes, workers, *args):
+    first = _first_element(path, array_prefix)
+    if first is None:
+        return
+    bounds = list(range(first, os.path.getsize(path), chunk_bytes))
+    bounds.append(os.path.getsize(path))
+    tasks = (
+        (path, bounds[i], bounds[i + 1], i > 0) + args
+        for i in range(len(bounds) - 1)
+    )
+    expected = first
+    for i, (start, next_start, results) in enumerate(_run(_speculate_range, tasks, workers, True)):
+        if start != expected:
+            start, next_start, results = _speculate_range(
+                path, expected, bounds[i + 1], False, *args)
+        for result in results:
+            yield result
+        if next_start is None:
+            break
+        expected = next_start
+
+
+def _parallel(method, path, prefix, workers, ordered, chunk_bytes, index_path, backend, config):
+    array_prefix, element_prefix = _split_prefix(prefix)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if backend is None:
+        backend = ijson.backend
+    args = (method, element_prefix, backend, config)
+    if index_path is not None:
+        return _indexed(path, array_prefix, index_path, chunk_bytes, workers, ordered, *args)
+    return _speculative(path, array_prefix, chunk_bytes, workers, *args)
+
+
+def items(path, prefix, workers=None, ordered=True, chunk_bytes=8 * 1024 * 1024,
+          index_path=None, backend=None, **config):
+    '''
+    Like ijson.items, but parses the document at `path` in parallel.
+
+    `prefix` must go through an array (e.g., "item", or "results.item.name"),
+    whose elements are split into ranges of about `chunk_bytes` that are parsed
+    by a pool of `workers` processes (defaults to the number of CPUs) using
+    the given `backend` name (defaults to ijson's default backend).
+
+    If `index_path` is given, element offsets are read from this index, built
+    with ijson.build_index for the prefix of the array (e.g., "" or
+    "results"). Otherwise the document is cut at every `chunk_bytes` and
+    workers guess where the first element after their cut starts; guesses are
+    checked against where the previous range ended, and ranges whose guess was
+    wrong are parsed again in the calling process.
+
+    Objects are yielded in document order, unless an index is given and
+    `ordered` is False, in which case they are yielded as soon as their range
+    has been parsed.
+    '''
+    return _parallel('items', path, prefix, workers, ordered, chunk_bytes,
+                     index_path, backend, config)
+
+
+def kvitems(path, prefix, workers=None, ordered=True, chunk_bytes=8 * 1024 * 1024,
+            index_path=None, backend=None, **config):
+    '''
+    Like ijson.kvitems, but parses the document at `path` in parallel. See
+    ijson.parallel.items for the rest of the arguments.
+    '''
+    return _parallel('kvitems', path, prefix, workers, ordered, chunk_bytes,
+                     index_path, backend, config)
+
+
+def items_lines(path, prefix, workers=None, ordered=True, chunk_bytes=8 * 1024 * 1024,
+                backend=None, **config):
+    '''
+    Like ijson.items with multiple_values=True, but parses the JSON Lines
+    document at `path` (i.e., one with a JSON value per line) in parallel.
+
+    The document is split into ranges of whole lines of about `chunk_bytes`
+    that are parsed by a pool of `workers` processes (defaults to the number of
+    CPUs) using the given `backend` name (defaults to ijson's default backend).
+    Objects are yielded in document order, unless `ordered` is False, in which
+    case they are yielded as soon as their range has been parsed. At most two
+    ranges per worker are read and parsed at any time.
+    '''
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if backend is None:
+        backend = ijson.backend
+    return _lines(path, chunk_bytes, workers, ordered, 'items', prefix, backend, config)
@@ -60,6 +60,32 @@ def coros2gen(source, *coro_pipeline):
             for event in events:
                 yield event
             del events[:]
+    except GeneratorExit:
+        try:
+            f.close()
+        except:
+            pass
+
+
+def coros2batches(source, *coro_pipeline):
+    '''
+    Like coros2gen, but the returned generator yields lists with all the values
+    dispatched by the coroutine pipeline after receiving each value coming from
+    `source` (if any).
+    '''
+    events = sendable_list()
+    f = chain(events, *coro_pipeline)
+    try:
+        for value in source:
+            try:
+                f.send(value)
+            except StopIteration:
+                if events:
+                    yield events[:]
+                return
+            if events:
+                yield events[:]
+                del events[:]
     except GeneratorExit:
         try:
             f.close()
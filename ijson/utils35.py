@@ -29,16 +29,23 @@ class async_iterable(object):
     '''
     A utility class that implements an async iterator returning values
     dispatched by a coroutine pipeline after *it* has received values coming
-    from an async file-like object.
+    from an async file-like object. If `batch` is True, lists with all the
+    values dispatched after each read are returned instead.
     '''
 
-    def __init__(self, f, buf_size, *coro_pipeline):
+    def __init__(self, f, buf_size, *coro_pipeline, batch=False):
         self.events = sendable_deque()
         self.coro = utils.chain(self.events, *coro_pipeline)
         self.coro_finished = False
         self.f = f
         self.buf_size = buf_size
         self.read = None
+        self.pop = self._pop_all if batch else self.events.popleft
+
+    def _pop_all(self):
+        events = list(self.events)
+        self.events.clear()
+        return events
 
     def __aiter__(self):
         return self
@@ -47,7 +54,7 @@ class async_iterable(object):
         if not self.read:
             self.read = await _get_read(self.f)
         if self.events:
-            return self.events.popleft()
+            return self.pop()
         if self.coro_finished:
             raise StopAsyncIteration
         while True:
@@ -55,38 +62,127 @@ class async_iterable(object):
             try:
                 self.coro.send(data)
                 if self.events:
-                    return self.events.popleft()
+                    return self.pop()
             except StopIteration:
                 self.coro_finished = True
                 if self.events:
-                    return self.events.popleft()
+                    return self.pop()
                 raise StopAsyncIteration
 
+class limited_async_iterable(object):
+    '''
+    An async iterator returning the first `limit` values out of another one,
+    which is released right after producing the last of them so no further
+    input is read
+    '''
+
+    def __init__(self, values, limit):
+        self.values = values
+        self.limit = limit
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.limit <= 0:
+            self.values = None
+            raise StopAsyncIteration
+        value = await self.values.__anext__()
+        self.limit -= 1
+        if not self.limit:
+            self.values = None
+        return value
+
+class rebatched_async_iterable(object):
+    '''
+    An async iterator returning the values of the batches (i.e., lists) of
+    another one in lists of `size` values
+    '''
+
+    def __init__(self, batches, size):
+        self.batches = batches
+        self.size = size
+        self.values = []
+        self.exhausted = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.exhausted and len(self.values) < self.size:
+            try:
+                self.values += await self.batches.__anext__()
+            except StopAsyncIteration:
+                self.exhausted = True
+        if not self.values:
+            raise StopAsyncIteration
+        batch = self.values[:self.size]
+        del self.values[:self.size]
+        return batch
+
+async def first_async(values, default):
+    '''Returns the first value of an async iterable, or `default`'''
+    async for value in values:
+        return value
+    return default
+
 
 def _make_basic_parse_async(backend):
-    def basic_parse_async(f, buf_size=64*1024, **config):
+    def basic_parse_async(f, buf_size=64*1024, batch=False, **config):
         return async_iterable(f, buf_size,
-            *common._basic_parse_pipeline(backend, config)
+            *common._basic_parse_pipeline(backend, config),
+            batch=batch
         )
     return basic_parse_async
 
 def _make_parse_async(backend):
-    def parse_async(f, buf_size=64*1024, **config):
+    def parse_async(f, buf_size=64*1024, batch=False, **config):
         return async_iterable(f, buf_size,
-            *common._parse_pipeline(backend, config)
+            *common._parse_pipeline(backend, config),
+            batch=batch
         )
     return parse_async
 
 def _make_items_async(backend):
-    def items_async(f, prefix, map_type=None, buf_size=64*1024, **config):
+    def items_async(f, prefix, map_type=None, buf_size=64*1024, fields=None, schema=None,
+                    raw=False, batch=False, **config):
         return async_iterable(f, buf_size,
-            *common._items_pipeline(backend, prefix, map_type, config)
+            *common._items_pipeline(backend, prefix, map_type, fields, schema, raw, config),
+            batch=batch
         )
     return items_async
 
 def _make_kvitems_async(backend):
-    def kvitems_async(f, prefix, map_type=None, buf_size=64*1024, **config):
+    def kvitems_async(f, prefix, map_type=None, buf_size=64*1024, batch=False, **config):
+        return async_iterable(f, buf_size,
+            *common._kvitems_pipeline(backend, prefix, map_type, config),
+            batch=batch
+        )
+    return kvitems_async
+
+def _make_items_multi_async(backend):
+    def items_multi_async(f, prefixes, map_type=None, buf_size=64*1024, batch=False, **config):
+        return async_iterable(f, buf_size,
+            *common._items_multi_pipeline(backend, prefixes, map_type, config),
+            batch=batch
+        )
+    return items_multi_async
+
+def _make_arrays_async(backend):
+    def arrays_async(f, prefix, dtype='d', chunk_size=None, buf_size=64*1024, batch=False,
+                     **config):
+        return async_iterable(f, buf_size,
+            *common._arrays_pipeline(backend, prefix, dtype, chunk_size, config),
+            batch=batch
+        )
+    return arrays_async
+
+
+def _make_columns_async(backend):
+    def columns_async(f, prefix, fields, chunk_size=None, map_type=None, buf_size=64*1024,
+                      batch=False, **config):
         return async_iterable(f, buf_size,
-            *common._kvitems_pipeline(backend, prefix, map_type, config)
+            *common._columns_pipeline(backend, prefix, fields, chunk_size, map_type, config),
+            batch=batch
         )
-    return kvitems_async
\ No newline at end of file
+    return columns_async
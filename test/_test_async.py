@@ -6,7 +6,7 @@ import io
 
 from ijson import compat
 
-from ._test_async_common import _get_all, _get_first
+from ._test_async_common import _get_all, _get_first, _get_value
 
 
 class AsyncReader(object):
@@ -22,3 +22,4 @@ class AsyncReader(object):
 
 get_all = _get_all(AsyncReader)
 get_first = _get_first(AsyncReader)
+get_value = _get_value(AsyncReader)
@@ -34,3 +34,13 @@ def _get_first(reader):
         _aiorun(run())
         return events[0]
     return get_first
+
+
+def _get_value(reader):
+    def get_value(routine, json_content, *args, **kwargs):
+        values = []
+        async def run():
+            values.append(await routine(reader(json_content), *args, **kwargs))
+        _aiorun(run())
+        return values[0]
+    return get_value
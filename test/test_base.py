@@ -375,6 +375,114 @@ class IJsonTestsBase(object):
         kvitems = self.get_all(self.kvitems, JSON, 'docs.item.meta')
         self.assertEqual(JSON_KVITEMS_META, kvitems)
 
+    def test_items_wildcards(self):
+        metas = [[[1], {}], {'key': 'value'}, None, []]
+        self.assertEqual(metas, self.get_all(self.items, JSON, 'docs.*.meta'))
+        self.assertEqual(metas, self.get_all(self.items, JSON, '**.meta'))
+        self.assertEqual(metas, self.get_all(self.items, JSON, '*.item.meta'))
+        self.assertEqual([1], self.get_all(self.items, JSON, '**.meta.*.*'))
+        self.assertEqual([JSON_OBJECT], self.get_all(self.items, JSON, '**'))
+        self.assertEqual([], self.get_all(self.items, JSON, '*.meta'))
+
+    def test_kvitems_wildcards(self):
+        kvitems = self.get_all(self.kvitems, JSON, 'docs.*')
+        self.assertEqual(JSON_KVITEMS, kvitems)
+        kvitems = self.get_all(self.kvitems, JSON, '**.meta')
+        self.assertEqual(JSON_KVITEMS_META, kvitems)
+
+    def test_items_skipped_siblings(self):
+        json = b'{"a": {"b": [1, {"b": 2}], "c": {"a": {"b": 3}}}, "b": {"b": 4}, "ab": [5]}'
+        self.assertEqual([[1, {'b': 2}]], self.get_all(self.items, json, 'a.b'))
+        self.assertEqual([1, {'b': 2}], self.get_all(self.items, json, 'a.b.item'))
+        self.assertEqual([3], self.get_all(self.items, json, 'a.c.a.b'))
+        self.assertEqual([[1, {'b': 2}], 4], self.get_all(self.items, json, '*.b'))
+        self.assertEqual([[1, {'b': 2}], 3, {'b': 4}], self.get_all(self.items, json, '**.b'))
+        self.assertEqual([('b', 3)], self.get_all(self.kvitems, json, 'a.c.a'))
+        self.assertEqual([], self.get_all(self.items, json, 'a.b.b'))
+
+    def test_items_fields(self):
+        docs = self.get_all(self.items, JSON, 'docs.item', fields=['integer', 'meta.item', 'meta.key'])
+        self.assertEqual([{'integer': 0}, {'meta': [[1], {}]}, {'meta': {'key': 'value'}},
+                          {'meta': None}, {'meta': []}], docs)
+        docs = self.get_all(self.items, JSON, '', fields=['docs.item.meta.key'])
+        self.assertEqual([{'docs': [{}, {'meta': []}, {'meta': {'key': 'value'}},
+                                    {'meta': None}, {'meta': []}]}], docs)
+
+    def test_items_schema(self):
+        Point = collections.namedtuple('Point', 'x y')
+        json = b'[{"x": 1, "y": 2, "z": 3}, {"y": [4], "x": {"a": null}}]'
+        self.assertEqual([Point(1, 2), Point({'a': None}, [4])],
+                         self.get_all(self.items, json, 'item', schema=Point))
+        self.assertEqual([[{'y': 2}, {'y': [4]}]],
+                         self.get_all(self.items, json, '', schema=[{'y': None}]))
+        json = b'{"p": {"y": null, "x": 1}, "ps": [{"x": 2, "y": 3}, null], "q": 4}'
+        self.assertEqual([{'p': Point(1, None), 'ps': [Point(2, 3), None]}],
+                         self.get_all(self.items, json, '', schema={'p': Point, 'ps': [Point]}))
+        docs = self.get_all(self.items, JSON, 'docs.item', schema={'integer': None, 'meta': None})
+        self.assertEqual([{'integer': 0}, {'meta': [[1], {}]}, {'meta': {'key': 'value'}},
+                          {'meta': None}, {'meta': []}], docs)
+        with self.assertRaises(ValueError):
+            self.get_all(self.items, JSON, '', fields=['docs'], schema={'docs': None})
+        # The yajl ctypes and cffi backends can't raise errors from callbacks
+        if self.backend_name in ('python', 'yajl2_c'):
+            for json, schema in ((b'[{"x": 1}]', Point), (b'[[]]', Point), (b'[{}]', [Point]),
+                                 (b'[{"p": 1}]', {'p': Point})):
+                with self.assertRaises(ValueError):
+                    self.get_all(self.items, json, 'item', schema=schema)
+
+    def test_items_schema_duplicate_keys(self):
+        # Like in dicts, the last value of duplicate keys is the one kept, and
+        # so the only one that has to agree with the schema
+        Point = collections.namedtuple('Point', 'x y')
+        json = b'[{"item": {"id": true}, "item": []}]'
+        self.assertEqual([{'item': []}], self.get_all(self.items, json, 'item', schema={'item': [None]}))
+        json = (b'[{"p": [{"x": 1}], "p": {"x": [2], "y": 3}, "q": {"x": {}, "y": 4}},'
+                b' {"q": 5, "q": {"x": 6}, "q": {"x": 7, "y": 8}}]')
+        schema = {'p': Point, 'q': Point}
+        self.assertEqual([{'p': Point([2], 3), 'q': Point({}, 4)}, {'q': Point(7, 8)}],
+                         self.get_all(self.items, json, 'item', schema=schema))
+        if self.backend_name in ('python', 'yajl2_c'):
+            json = b'[{"p": {"x": 1, "y": 2}, "p": {"x": 3}}]'
+            with self.assertRaises(ValueError):
+                self.get_all(self.items, json, 'item', schema=schema)
+            json = b'[{"p": {"x": 1, "y": 2}, "p": [{"x": 3, "y": 4}]}]'
+            with self.assertRaises(ValueError):
+                self.get_all(self.items, json, 'item', schema=schema)
+
+    def test_items_multi(self):
+        prefixes = {'docs.item.meta': 'items', 'docs.item': 'kvitems', '': 'items'}
+        results = self.get_all(self.items_multi, JSON, prefixes)
+        for prefix, method in prefixes.items():
+            expected = self.get_all(getattr(self, method), JSON, prefix)
+            self.assertEqual(expected, [obj for p, obj in results if p == prefix])
+        self.assertEqual(('', JSON_OBJECT), results[-1])
+
+    def test_items_multi_prefixes_list(self):
+        results = self.get_all(self.items_multi, ARRAY_JSON, ['item.docs.item.meta', 'item'])
+        expected_meta = self.get_all(self.items, ARRAY_JSON, 'item.docs.item.meta')
+        self.assertEqual(
+            [('item.docs.item.meta', meta) for meta in expected_meta] +
+            [('item', JSON_OBJECT)],
+            results)
+
+    def test_items_multi_overlapping_prefixes(self):
+        json = b'{"a": {"item": null, "b": {"c": [1]}}, "d": {"a": {"e": 2}}}'
+        prefixes = {'**.a': 'items', 'a': 'kvitems', 'a.b.c.item': 'items', '*': 'items'}
+        results = self.get_all(self.items_multi, json, prefixes)
+        self.assertEqual([
+            ('a', ('item', None)),
+            ('a.b.c.item', 1),
+            ('a', ('b', {'c': [1]})),
+            ('**.a', {'item': None, 'b': {'c': [1]}}),
+            ('*', {'item': None, 'b': {'c': [1]}}),
+            ('**.a', {'e': 2}),
+            ('*', {'a': {'e': 2}}),
+        ], results)
+
+    def test_items_multi_invalid_method(self):
+        with self.assertRaises(ValueError):
+            self.get_all(self.items_multi, JSON, {'docs': 'parse'})
+
     def test_basic_parse_array(self):
         events = self.get_all(self.basic_parse, ARRAY_JSON)
         self.assertEqual(events, ARRAY_JSON_EVENTS)
@@ -388,6 +496,24 @@ class IJsonTestsBase(object):
         events = self.get_all(self.parse, ARRAY_JSON)
         self.assertEqual(events, ARRAY_JSON_PARSE_EVENTS)
 
+    def test_parse_reuses_prefixes(self):
+        json = b'[{"a": {"b": 1}}, {"a": {"b": 2}}]'
+        prefixes = [prefix for prefix, event, _ in self.get_all(self.parse, json)
+                    if event == 'number']
+        self.assertEqual(['item.a.b', 'item.a.b'], prefixes)
+        self.assertIs(prefixes[0], prefixes[1])
+
+    def test_parse_empty_keys(self):
+        json = b'{"": {"item": 1, "": [{"": 2}]}, "item": 3, "a": {"": {"": 4}}}'
+        prefixes = [prefix for prefix, event, _ in self.get_all(self.parse, json)
+                    if event in ('number', 'start_array')]
+        self.assertEqual(['.item', '.', '..item.', 'item', 'a..'], prefixes)
+
+    def test_items_multi_empty_keys(self):
+        json = b'{"": {"item": 1}, "item": 3}'
+        results = self.get_all(self.items_multi, json, ['item', '.item', '*.item'])
+        self.assertEqual([('.item', 1), ('*.item', 1), ('item', 3)], results)
+
     def test_items_array(self):
         events = self.get_all(self.items, ARRAY_JSON, '')
         self.assertEqual(events, [ARRAY_JSON_OBJECT])
@@ -447,6 +573,26 @@ class IJsonTestsBase(object):
         except common.JSONError:
             pass
 
+    def test_number_type(self):
+        """Check that numbers are given as the requested type"""
+        NUMBERS_JSON = b'[1, -1.0, 1E2, 123456789012345678, -0.5e-3]'
+        def get_numbers(**kwargs):
+            events = self.get_all(self.basic_parse, NUMBERS_JSON, **kwargs)
+            return [value for event, value in events if event == 'number']
+        self.assertEqual(
+            [1, Decimal('-1.0'), Decimal('1E2'), 123456789012345678, Decimal('-0.5e-3')],
+            get_numbers(number_type='decimal'))
+        self.assertEqual([1, -1., 100., 123456789012345678, -0.0005],
+                         get_numbers(number_type='float'))
+        self.assertEqual(['1', '-1.0', '1E2', '123456789012345678', '-0.5e-3'],
+                         get_numbers(number_type='str'))
+        self.assertEqual([b'1', b'-1.0', b'1E2', b'123456789012345678', b'-0.5e-3'],
+                         get_numbers(number_type='raw'))
+        # number_type takes precedence over use_float
+        self.assertEqual(['1'], get_numbers(number_type='str', use_float=True)[:1])
+        with self.assertRaises(ValueError):
+            get_numbers(number_type='int')
+
     def test_incomplete(self):
         for json in INCOMPLETE_JSONS:
             with self.assertRaises(common.IncompleteJSONError):
@@ -522,6 +668,35 @@ class FileBasedTests(object):
             events = self.get_all(self.basic_parse, JSON, buf_size=buf_size)
             self.assertEqual(events, JSON_EVENTS)
 
+    def test_strings_different_buf_sizes(self):
+        expected = self.get_all(self.basic_parse, STRINGS_JSON)
+        for buf_size in (1, 2, 3, 5, 7):
+            events = self.get_all(self.basic_parse, STRINGS_JSON, buf_size=buf_size)
+            self.assertEqual(expected, events)
+
+    def test_long_strings(self):
+        value = '\\"abc\\\\' * 10000
+        json = ('["%s", 12345678]' % value).encode('utf-8')
+        for buf_size in (1000, 1001, 1002):
+            events = self.get_all(self.basic_parse, json, buf_size=buf_size)
+            self.assertEqual(
+                [('start_array', None), ('string', '"abc\\' * 10000),
+                 ('number', 12345678), ('end_array', None)],
+                events)
+
+    def test_items_different_buf_sizes(self):
+        json = b'[' + b', '.join([JSON] * 10) + b']'
+        for buf_size in (64, 256, 1024, 4098):
+            objects = self.get_all(self.items, json, 'item', buf_size=buf_size)
+            self.assertEqual([JSON_OBJECT] * 10, objects)
+            kvitems = self.get_all(self.kvitems, json, 'item', buf_size=buf_size)
+            self.assertEqual(list(JSON_OBJECT.items()) * 10, kvitems)
+
+    def test_items_invalid_values(self):
+        for json in (b'[{"a": NaN}]', b'[[Infinity]]', b'[{"a": [-Infinity]}]'):
+            with self.assertRaises(common.JSONError):
+                self.get_all(self.items, json, 'item')
+
 
 def generate_backend_specific_tests(module, classname_prefix, method_suffix,
                                     *bases, **kwargs):
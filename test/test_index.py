@@ -0,0 +1,101 @@
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import ijson
+
+from test.test_base import JSON, JSON_KVITEMS, JSON_OBJECT, generate_backend_specific_tests
+
+
+class IndexTests(object):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.tmpdir, 'doc.json')
+        with open(self.fname, 'wb') as f:
+            f.write(JSON)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _indexed(self, prefix, **config):
+        ijson.build_index(self.fname, prefix)
+        return ijson.IndexedDocument(self.fname, backend=self.backend, **config)
+
+    def test_array_elements(self):
+        index_path = ijson.build_index(self.fname, 'docs')
+        self.assertEqual(self.fname + '.idx', index_path)
+        with ijson.IndexedDocument(self.fname, backend=self.backend) as doc:
+            self.assertEqual(len(JSON_OBJECT['docs']), len(doc))
+            self.assertEqual(JSON_OBJECT['docs'], list(doc))
+            self.assertEqual(JSON_OBJECT['docs'][3], doc[3])
+            self.assertEqual(JSON_OBJECT['docs'][-1], doc[-1])
+            self.assertEqual([None] * len(doc), doc.keys())
+
+    def test_object_members(self):
+        with self._indexed('docs.item') as doc:
+            # The members in document order, which dicts don't keep in python 2
+            expected = JSON_KVITEMS
+            self.assertEqual([key for key, _ in expected], doc.keys())
+            self.assertEqual([value for _, value in expected], list(doc))
+            self.assertEqual(JSON_OBJECT['docs'][0]['string'], doc['string'])
+            self.assertEqual(doc.position('string'), doc.keys().index('string'))
+            with self.assertRaises(KeyError):
+                doc['missing']
+
+    def test_raw(self):
+        with self._indexed('') as doc:
+            self.assertEqual(['docs'], doc.keys())
+            raw = doc.raw('docs')
+            self.assertTrue(raw.startswith(b'['))
+            self.assertTrue(raw.endswith(b']'))
+
+    def test_config(self):
+        with self._indexed('docs.item', use_float=True) as doc:
+            self.assertIsInstance(doc['double'], float)
+
+    def test_file_object(self):
+        index_path = os.path.join(self.tmpdir, 'other.idx')
+        with self.assertRaises(ValueError):
+            ijson.build_index(io.BytesIO(JSON), 'docs')
+        ijson.build_index(io.BytesIO(JSON), 'docs', index_path=index_path)
+        doc = ijson.IndexedDocument(io.BytesIO(JSON), index_path, backend=self.backend)
+        self.assertEqual(JSON_OBJECT['docs'], list(doc))
+        doc.close()
+
+    def test_out_of_date_index(self):
+        ijson.build_index(self.fname, 'docs')
+        with open(self.fname, 'ab') as f:
+            f.write(b'\n')
+        with self.assertRaises(ValueError):
+            ijson.IndexedDocument(self.fname, backend=self.backend)
+
+    def test_incomplete_document(self):
+        with self.assertRaises(ijson.IncompleteJSONError):
+            ijson.build_index(io.BytesIO(JSON[:-10]), 'docs', os.path.join(self.tmpdir, 'x.idx'))
+
+    def test_big_file_object(self):
+        # Documents that can't be mmap'ed are read in windows, which values
+        # and tokens of all sizes must be able to cross
+        values = [{'s': 'x' * (i * 7919 % 300000), 'n': [i] * (i % 7)} for i in range(40)]
+        values.append('y' * 3 * 1024 * 1024)
+        data = json.dumps({'values': values, '  key  ': 'z' * 1024 * 1024}).encode('ascii')
+        index_path = os.path.join(self.tmpdir, 'big.idx')
+        ijson.build_index(io.BytesIO(data), 'values', index_path=index_path)
+        with ijson.IndexedDocument(io.BytesIO(data), index_path, backend=self.backend) as doc:
+            self.assertEqual(values, list(doc))
+
+    @unittest.skipUnless(hasattr(sys, 'get_int_max_str_digits'), 'no limit on int digits')
+    def test_invalid_value(self):
+        data = b'[[1], [' + b'1' * (sys.get_int_max_str_digits() + 1) + b'], [2]]'
+        with self.assertRaises(ijson.JSONError) as cm:
+            ijson.build_index(io.BytesIO(data), '', os.path.join(self.tmpdir, 'x.idx'))
+        self.assertNotIsInstance(cm.exception, ijson.IncompleteJSONError)
+        self.assertIn('offset 6', str(cm.exception))
+
+
+generate_backend_specific_tests(globals(), 'Index', '', IndexTests)
@@ -1,6 +1,14 @@
+import array
+import collections
+from decimal import Decimal
+import mmap
+import os
+import shutil
+import sys
+import tempfile
 import unittest
 
-from ijson import common, compat
+from ijson import common, compat, utils
 
 from .test_base import warning_catcher
 from test.test_base import JSON, JSON_EVENTS, JSON_PARSE_EVENTS, JSON_OBJECT,\
@@ -16,6 +24,159 @@ class Misc(unittest.TestCase):
         self.assertEqual(len(warns), 1)
         self.assertEqual(DeprecationWarning, warns[0].category)
 
+    def test_prefix_matcher(self):
+        matcher = common.PrefixMatcher('a.**.b.*')
+        for prefix in ('a.b.c', 'a.x.y.b.c', 'a.b.b.b'):
+            self.assertTrue(matcher.matches(prefix), prefix)
+        for prefix in ('', 'a', 'a.b', 'b.b.c', 'a.b.c.d'):
+            self.assertFalse(matcher.matches(prefix), prefix)
+
+    def test_file_chunks_reuse_buffer(self):
+        chunks = [
+            (bytes(chunk), getattr(chunk, 'obj', None))
+            for chunk in common._file_chunks(compat.BytesIO(b'abcdefg'), buf_size=3)
+        ]
+        self.assertEqual([b'abc', b'def', b'g', b''], [data for data, _ in chunks])
+        if not compat.IS_PY2:
+            self.assertEqual(1, len(set(id(buf) for _, buf in chunks)))
+
+    def test_file_source_chunks_can_be_kept(self):
+        chunks = list(common.file_source(compat.BytesIO(b'abcdefg'), buf_size=3))
+        self.assertEqual([b'abc', b'def', b'g', b''], chunks)
+
+    @unittest.skipIf(compat.IS_PY2, "memoryviews of mmaps need python 3")
+    def test_file_chunks_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b'abcdefg')
+            f.flush()
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            data.seek(1)
+            chunks = list(common._file_chunks(data, buf_size=4))
+            self.assertEqual([b'bcde', b'fg', b''], [bytes(chunk) for chunk in chunks])
+            self.assertTrue(all(chunk.obj is data for chunk in chunks))
+            del chunks
+            data.close()
+
+    def test_file_chunks_non_blocking(self):
+        class NonBlockingReader(compat.BytesIO):
+            def readinto(self, buf):
+                return compat.BytesIO.readinto(self, buf) or None
+        chunks = common._file_chunks(NonBlockingReader(b'abcd'), buf_size=3)
+        self.assertEqual([b'abc', b'd', b''], [bytes(chunk) for chunk in chunks])
+
+    def test_prefix_patterns(self):
+        self.assertTrue(common.is_prefix_pattern('a.*'))
+        self.assertTrue(common.is_prefix_pattern('**.a'))
+        self.assertFalse(common.is_prefix_pattern('a.b*'))
+        self.assertFalse(common.is_prefix_pattern(''))
+
+    def test_object_builder_reset(self):
+        builder = common.ObjectBuilder(fields=['a'])
+        for event, value in JSON_EVENTS[:5]:
+            builder.event(event, value)
+        builder.reset()
+        events = [('start_map', None), ('map_key', 'a'), ('start_array', None),
+                  ('integer', 1), ('end_array', None), ('map_key', 'b'),
+                  ('integer', 2), ('end_map', None)]
+        for event, value in events:
+            builder.event(event, value)
+        self.assertEqual({'a': [1]}, builder.value)
+        self.assertFalse(hasattr(builder, '__dict__'))
+
+    @unittest.skipIf(sys.version_info < (3, 7), "dataclasses were added in python 3.7")
+    def test_schema_classes(self):
+        import dataclasses
+        import typing
+        Tag = collections.namedtuple('Tag', 'name')
+        Record = dataclasses.make_dataclass('Record', [
+            ('id', int),
+            ('tags', typing.List[Tag], dataclasses.field(default_factory=list)),
+            ('parent', typing.Optional[Tag], None)
+        ])
+        schema = common._compile_schema(Record)
+        self.assertEqual({'id': True, 'tags': {'item': {'name': True}}, 'parent': {'name': True}},
+                         common._schema_projection(schema))
+        self.assertEqual(Record(1, [Tag('a')], Tag('b')), common._apply_schema(
+            {'id': 1, 'tags': [{'name': 'a', 'weight': 2}], 'parent': {'name': 'b'}}, schema))
+        self.assertEqual(Record(2), common._apply_schema({'id': 2}, schema))
+        with self.assertRaises(ValueError):
+            common._apply_schema({'tags': []}, schema)
+
+        class Slotted(object):
+            __slots__ = ('x', 'y')
+        value = common._apply_schema({'x': 1}, common._compile_schema(Slotted))
+        self.assertEqual(1, value.x)
+        self.assertFalse(hasattr(value, 'y'))
+        with self.assertRaises(ValueError):
+            common._compile_schema(object)
+
+
+class PythonFusedCoroutines(unittest.TestCase):
+    '''
+    The fused coroutines of the python backend decode values found whole in
+    each chunk with the json module, and fall back to parsing them event by
+    event otherwise; feeding the same document in chunks of every size
+    exercises both ways.
+    '''
+
+    DOC = b'{"a": [{"b": [1, {"c": "d\\u00e9"}]}, 2, [3.5, 4]], "e": {"b": [5, 6.5, 7]}}'
+
+    def _results(self, coro, doc, *args):
+        from ijson.backends import python
+        expected = None
+        for chunk_size in range(1, len(doc) + 1):
+            results = utils.sendable_list()
+            target = getattr(python, coro)(results, *args)
+            for start in range(0, len(doc), chunk_size):
+                target.send(doc[start:start + chunk_size])
+            target.close()
+            if expected is None:
+                expected = results
+            self.assertEqual(expected, results, chunk_size)
+        return expected
+
+    def test_items(self):
+        self.assertEqual(
+            [{'b': [1, {'c': u'd\xe9'}]}, 2, [Decimal('3.5'), 4]],
+            self._results('_items_basecoro', self.DOC, 'a.item', None, False))
+
+    def test_kvitems(self):
+        self.assertEqual(
+            [('b', [5, Decimal('6.5'), 7])],
+            self._results('_items_basecoro', self.DOC, 'e', None, True))
+
+    def test_raw_items(self):
+        self.assertEqual(
+            [b'{"b": [1, {"c": "d\\u00e9"}]}', b'2', b'[3.5, 4]'],
+            self._results('_raw_items_basecoro', self.DOC, 'a.item'))
+
+    def test_arrays(self):
+        self.assertEqual(
+            [array.array('d', [5, 6.5, 7])],
+            self._results('_arrays_basecoro', self.DOC, 'e.b', 'd', None))
+        self.assertEqual(
+            [array.array('l', [1, 2]), array.array('l', [3])],
+            self._results('_arrays_basecoro', b'[1, 2, 3]', '', 'l', 2))
+
+    def test_records(self):
+        self.assertEqual(
+            [{'x': 1}, {'x': [2], 'y': {}}, None],
+            self._results('_records_basecoro', b'[{"x": 1}, {"x": [2], "y": {}}]', '', None))
+
+    def test_items_rejected_by_json(self):
+        # Too deeply nested for the json module, but not for the parser
+        from ijson.backends import python
+        depth = sys.getrecursionlimit() * 2
+        results = utils.sendable_list()
+        coro = python._items_basecoro(results, 'item', None, False)
+        coro.send(b'[' + b'[' * depth + b']' * depth + b']')
+        coro.close()
+        value = results[0]
+        for _ in range(depth - 1):
+            value, = value
+        self.assertEqual([], value)
+
+
 class MainEntryPoints(object):
 
     def _assert_invalid_type(self, routine, *args, **kwargs):
@@ -86,4 +247,226 @@ class MainEntryPoints(object):
     def test_rich_kvitems(self):
         self._assert_entry_point(JSON_KVITEMS, self.parse, self.kvitems, 'docs.item')
 
+    def test_rich_items_multi(self):
+        expected = [('docs.item', kv) for kv in JSON_KVITEMS] + [('', JSON_OBJECT)]
+        self._assert_entry_point(expected, self.parse, self.items_multi,
+                                 {'': 'items', 'docs.item': 'kvitems'})
+
+    def test_rich_items_limit(self):
+        expected = [JSON_OBJECT['docs'][1]['meta'], JSON_OBJECT['docs'][2]['meta']]
+        self._assert_entry_point(expected, self.parse, self.items,
+                                 'docs.item.meta', limit=2)
+
+    def test_rich_kvitems_limit(self):
+        self._assert_entry_point(JSON_KVITEMS[:3], self.parse, self.kvitems,
+                                 'docs.item', limit=3)
+
+    def test_items_limit_stops_reading(self):
+        f = compat.BytesIO(JSON)
+        self.assertEqual([None], list(self.items(f, 'docs.item.null', limit=1, buf_size=16)))
+        self.assertLess(f.tell(), JSON.index(b'"boolean"') + 16)
+        f = compat.BytesIO(JSON)
+        self.assertEqual([], list(self.items(f, 'docs.item', limit=0)))
+        self.assertEqual(0, f.tell())
+
+    def test_get(self):
+        self.assertEqual(JSON_OBJECT['docs'][1]['meta'], self.get(JSON, 'docs.item.meta'))
+        self.assertEqual(0, self.get(compat.BytesIO(JSON), 'docs.item.integer'))
+        self.assertEqual(0, self.get(self.parse(JSON), 'docs.item.integer'))
+        self.assertIsNone(self.get(JSON, 'docs.item.missing'))
+        self.assertEqual('default', self.get(JSON, 'missing', default='default'))
+        if compat.IS_PY35:
+            from ._test_async import get_value
+            self.assertEqual(0, get_value(self.get, JSON, 'docs.item.integer'))
+
+    def test_buffer_chunks(self):
+        for buffer_type in (bytearray, memoryview):
+            results = utils.sendable_list()
+            coro = self.items_coro(results, 'docs.item')
+            for i in range(0, len(JSON), 16):
+                coro.send(buffer_type(JSON[i:i + 16]))
+            coro.close()
+            self.assertEqual(JSON_OBJECT['docs'], results)
+
+    def test_intern_strings(self):
+        self._assert_entry_point(JSON_EVENTS, None, self.basic_parse, intern_strings=True)
+        self._assert_entry_point([JSON_OBJECT], self.parse, self.items, '', intern_strings=True)
+        if self.backend_name == 'yajl2_c':
+            docs = list(self.items(JSON, 'docs.item'))
+            self.assertIs(sorted(docs[1])[0], sorted(docs[2])[0])
+            values = list(self.items(b'["repeated value", "repeated value"]', 'item',
+                                     intern_strings=True))
+            self.assertIs(values[0], values[1])
+
+    def test_batch(self):
+        self._assert_entry_point([JSON_EVENTS], None, self.basic_parse, batch=1000)
+        self._assert_entry_point([JSON_PARSE_EVENTS], self.basic_parse, self.parse, batch=1000)
+        self._assert_entry_point([[JSON_OBJECT]], self.parse, self.items, '', batch=10)
+        for batch in (True, 1, 3):
+            batches = list(self.kvitems(compat.BytesIO(JSON), 'docs.item', buf_size=16, batch=batch))
+            self.assertEqual(JSON_KVITEMS, [kv for kvs in batches for kv in kvs])
+            if batch is True:
+                self.assertGreater(len(batches), 1)
+                self.assertTrue(all(batches))
+            else:
+                self.assertEqual([batch] * (len(batches) - 1), [len(kvs) for kvs in batches[:-1]])
+        for batch in (0, -1, 1.5):
+            with self.assertRaises(ValueError):
+                self.items(JSON, '', batch=batch)
+        with self.assertRaises(ValueError):
+            self.items(JSON, '', batch=True, limit=1)
+
+    def test_arrays(self):
+        doc = b'{"a": [[1, -2.5, 3e2], []], "b": {"c": [-4, 5, 6, 7, 8]}}'
+        self.assertEqual([array.array('d', [1, -2.5, 300]), array.array('d')],
+                         list(self.arrays(doc, 'a.item')))
+        self.assertEqual([array.array('h', [-4, 5, 6, 7, 8])],
+                         list(self.arrays(compat.BytesIO(doc), '**.c', 'h', buf_size=5)))
+        self.assertEqual([array.array('i', [-4, 5]), array.array('i', [6, 7]), array.array('i', [8])],
+                         list(self.arrays(self.parse(doc), 'b.c', 'i', chunk_size=2)))
+        self.assertEqual([[array.array('f', [1, -2.5, 300]), array.array('f')]],
+                         list(self.arrays(doc, 'a.item', 'f', batch=True)))
+        results = utils.sendable_list()
+        coro = self.arrays_coro(results, 'b.c', 'l')
+        coro.send(doc)
+        coro.close()
+        self.assertEqual([array.array('l', [-4, 5, 6, 7, 8])], results)
+        if compat.IS_PY35:
+            from ._test_async import get_all
+            self.assertEqual([array.array('q', [-4, 5, 6, 7, 8])], get_all(self.arrays, doc, 'b.c', 'q'))
+        for kwargs in ({'dtype': 'x'}, {'chunk_size': 0}, {'chunk_size': 1.5}):
+            with self.assertRaises(ValueError):
+                self.arrays(doc, 'b.c', **kwargs)
+        # The yajl ctypes and cffi backends can't raise errors from callbacks
+        if self.backend_name in ('python', 'yajl2_c'):
+            for prefix, dtype in (('a', 'd'), ('b', 'd'), ('a.item', 'l'), ('b.c', 'B')):
+                with self.assertRaises(ValueError):
+                    list(self.arrays(doc, prefix, dtype))
+
+    def test_arrays_converted_numbers(self):
+        # Only the numbers of the arrays are converted to their type
+        doc = b'{"x": [1, 2.5], "y": [1e400, 1.5], "z": {"n": -1e400}}'
+        self.assertEqual([array.array('d', [1, 2.5])], list(self.arrays(doc, 'x')))
+        self.assertEqual([{'n': array.array('l', [-1])}],
+                         list(self.columns(b'[{"n": -1, "m": 1e400}]', '', {'n': 'l'})))
+        if self.backend_name in ('python', 'yajl2_c'):
+            with self.assertRaises(common.JSONError):
+                list(self.arrays(doc, 'y'))
+            with self.assertRaises(common.JSONError):
+                list(self.columns(b'[{"n": 1e400}]', '', {'n': 'd'}))
+            with self.assertRaises(ValueError):
+                list(self.arrays(doc, 'x', 'l'))
+
+    def test_columns(self):
+        doc = (b'{"a": [{"x": 1, "y": "one", "z": [1]}, {"y": null, "x": 2, "x": -3}],'
+               b' "b": {"c": [{"x": 4}, {"x": 5, "y": {"n": 6}}, {"x": 7}]}}')
+        self.assertEqual([{'x': array.array('l', [1, -3]), 'y': ['one', None]}],
+                         list(self.columns(doc, 'a', {'x': 'l', 'y': None})))
+        self.assertEqual([{'x': [4, 5], 'y': [None, {'n': 6}]}, {'x': [7], 'y': [None]}],
+                         list(self.columns(compat.BytesIO(doc), '**.c', ['x', 'y'],
+                                           chunk_size=2, buf_size=5)))
+        self.assertEqual([{'x': array.array('d', [4, 5, 7])}],
+                         list(self.columns(self.parse(doc), 'b.c', {'x': 'd'})))
+        self.assertEqual([[{'z': [[1], None]}]], list(self.columns(doc, 'a', 'z', batch=True)))
+        results = utils.sendable_list()
+        coro = self.columns_coro(results, 'b.c', {'x': 'B'})
+        coro.send(doc)
+        coro.close()
+        self.assertEqual([{'x': array.array('B', [4, 5, 7])}], results)
+        if compat.IS_PY35:
+            from ._test_async import get_all
+            self.assertEqual([{'x': array.array('q', [4, 5, 7])}], get_all(self.columns, doc, 'b.c', {'x': 'q'}))
+        for kwargs in ({'fields': {'x': 'x'}}, {'fields': {'x': 'd'}, 'chunk_size': 0}):
+            with self.assertRaises(ValueError):
+                self.columns(doc, 'b.c', **kwargs)
+        # The yajl ctypes and cffi backends can't raise errors from callbacks
+        if self.backend_name in ('python', 'yajl2_c'):
+            for prefix, fields in (('b', ['x']), ('a.item', ['x']), ('a', {'y': 'l'}),
+                                   ('a', {'z': 'l'}), ('b.c', {'y': 'd'})):
+                with self.assertRaises(ValueError):
+                    list(self.columns(doc, prefix, fields))
+
+    def test_items_raw(self):
+        doc = b'{"a": [1.50, "\\u00e9\xc3\xa9", {"b" : [ true ]}], "c": {"b": null}}'
+        if self.backend_name not in ('python', 'yajl2_c'):
+            with self.assertRaises(ValueError):
+                list(self.items(doc, 'a.item', raw=True))
+            return
+        expected = [b'1.50', b'"\\u00e9\xc3\xa9"', b'{"b" : [ true ]}']
+        self.assertEqual(expected, list(self.items(doc, 'a.item', raw=True)))
+        self.assertEqual(expected, list(self.items(compat.BytesIO(doc), 'a.item', raw=True, buf_size=3)))
+        self.assertEqual([b'[ true ]', b'null'], list(self.items(doc, '**.b', raw=True)))
+        self.assertEqual([doc], list(self.items(b' ' + doc + b'\n', '', raw=True)))
+        results = utils.sendable_list()
+        coro = self.items_coro(results, 'c', raw=True)
+        for i in range(len(doc)):
+            coro.send(doc[i:i + 1])
+        coro.close()
+        self.assertEqual([b'{"b": null}'], results)
+        if compat.IS_PY35:
+            from ._test_async import get_all
+            self.assertEqual(expected, get_all(self.items, doc, 'a.item', raw=True, buf_size=4))
+        with self.assertRaises(ValueError):
+            list(self.items(self.parse(doc), 'a.item', raw=True))
+        with self.assertRaises(ValueError):
+            list(self.items(doc, 'a.item', raw=True, fields=['b']))
+        with self.assertRaises(common.IncompleteJSONError):
+            list(self.items(doc[:-2], 'c', raw=True))
+
+    def test_dump_events(self):
+        doc = b'{"a": [1, -2.5, "\\"\\n\xc3\xa9", null, true, {}], "b": {"c": []}}'
+        out = compat.BytesIO()
+        self.dump_events(self.basic_parse(doc), out)
+        self.assertEqual(b'{"a":[1,-2.5,"\\"\\n\xc3\xa9",null,true,{}],"b":{"c":[]}}',
+                         out.getvalue())
+        out = compat.BytesIO()
+        self.dump_events(self.parse(doc + b' [1e2]', multiple_values=True, use_float=True),
+                         out, buf_size=3)
+        self.assertEqual(b'{"a":[1,-2.5,"\\"\\n\xc3\xa9",null,true,{}],"b":{"c":[]}}\n[100.0]',
+                         out.getvalue())
+        out = compat.BytesIO()
+        writer = self.writer_coro(out)
+        writer.send(('start_array', None))
+        writer.send(('', 'string', u'\x00\x1f'))
+        writer.send(('', 'number', 2 ** 64))
+        with self.assertRaises(common.IncompleteJSONError):
+            writer.close()
+        self.assertEqual(b'["\\u0000\\u001f",18446744073709551616', out.getvalue())
+        for event in (('end_map', None), ('map_key', 'a'), ('number', float('nan')),
+                      ('number', '1.'), ('unknown', None)):
+            writer = self.writer_coro(compat.BytesIO())
+            writer.send(('start_array', None))
+            with self.assertRaises(ValueError):
+                writer.send(event)
+
+    def test_file_sources(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            fname = os.path.join(tmpdir, 'doc.json')
+            with open(fname, 'wb') as f:
+                f.write(b'skipped' + JSON)
+            data = common.map_file(fname)
+            data.seek(len(b'skipped'))
+            self.assertEqual(JSON_OBJECT['docs'], list(self.items(data, 'docs.item', buf_size=7)))
+            if self.backend_name in ('python', 'yajl2_c'):
+                data.seek(len(b'skipped'))
+                self.assertEqual([b'[[1], {}]', b'{"key": "value"}', b'null', b'[]'],
+                                 list(self.items(data, 'docs.item.meta', raw=True, buf_size=5)))
+            prefixes = {'': 'items', 'docs.item.meta': 'items'}
+            data.seek(len(b'skipped'))
+            self.assertEqual(list(self.items_multi(JSON, prefixes)),
+                             list(self.items_multi(data, prefixes, buf_size=7)))
+            data.close()
+            with open(fname, 'wb') as f:
+                f.write(JSON)
+            if not compat.IS_PY2:
+                import pathlib
+                self.assertEqual(JSON_KVITEMS, list(self.kvitems(pathlib.Path(fname), 'docs.item')))
+                with open(fname, 'wb') as f:
+                    pass
+                with self.assertRaises(common.IncompleteJSONError):
+                    list(self.items(pathlib.Path(fname), ''))
+        finally:
+            shutil.rmtree(tmpdir)
+
 generate_backend_specific_tests(globals(), 'MainEntryPoints', '', MainEntryPoints)
\ No newline at end of file
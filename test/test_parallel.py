@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import ijson
+from ijson import parallel
+
+from test.test_base import JSON, JSON_OBJECT
+
+
+class ParallelTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.tmpdir, 'doc.json')
+        with open(self.fname, 'wb') as f:
+            f.write(JSON)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _items(self, prefix, **kwargs):
+        kwargs.setdefault('chunk_bytes', 1)
+        return list(parallel.items(self.fname, prefix, workers=2, **kwargs))
+
+    def test_items(self):
+        self.assertEqual(JSON_OBJECT['docs'], self._items('docs.item'))
+        self.assertEqual(
+            list(ijson.items(JSON, 'docs.item.meta.item')),
+            self._items('docs.item.meta.item'))
+
+    def test_kvitems(self):
+        self.assertEqual(
+            list(ijson.kvitems(JSON, 'docs.item')),
+            list(parallel.kvitems(self.fname, 'docs.item', workers=2, chunk_bytes=1)))
+        self.assertEqual(
+            list(ijson.kvitems(JSON, 'docs.item.meta')),
+            list(parallel.kvitems(self.fname, 'docs.item.meta', workers=2, chunk_bytes=10)))
+
+    def test_items_misspeculated(self):
+        # Cuts fall inside the nested arrays of every element
+        with open(self.fname, 'wb') as f:
+            f.write(b'[' + b', '.join([b'[[1, 2, 3, 4], [5, 6, [7, 8, 9]]]'] * 20) + b']')
+        expected = [[[1, 2, 3, 4], [5, 6, [7, 8, 9]]]] * 20
+        for chunk_bytes in (1, 5, 10, 30, 100):
+            self.assertEqual(expected, self._items('item', chunk_bytes=chunk_bytes))
+
+    def test_items_unordered(self):
+        values = self._items('docs.item.meta', ordered=False, backend='python')
+        expected = [doc['meta'] for doc in JSON_OBJECT['docs'] if 'meta' in doc]
+        self.assertEqual(len(expected), len(values))
+        for value in expected:
+            self.assertIn(value, values)
+
+    def test_items_with_index(self):
+        index_path = ijson.build_index(self.fname, 'docs')
+        self.assertEqual(JSON_OBJECT['docs'], self._items('docs.item', index_path=index_path))
+        self.assertEqual(
+            list(ijson.items(JSON, 'docs.item.meta.item')),
+            self._items('docs.item.meta.item', index_path=index_path))
+        index_path = ijson.build_index(self.fname, '')
+        with self.assertRaises(ValueError):
+            self._items('docs.item', index_path=index_path)
+
+    def test_items_config(self):
+        values = self._items('docs.item.double', use_float=True)
+        self.assertEqual([0.5], values)
+        self.assertIsInstance(values[0], float)
+
+    def test_invalid_prefixes(self):
+        for prefix in ('', 'docs', '*.item', 'item'):
+            with self.assertRaises(ValueError):
+                self._items(prefix)
+
+    def test_items_lines(self):
+        lines = b'{"a": 1, "b": [1, 2]}\n[3, 4]\n\n{"a": {"c": "d"}}\n"e"\n{"a": [5]}'
+        with open(self.fname, 'wb') as f:
+            f.write(lines)
+        for prefix in ('', 'a', 'item', 'b.item'):
+            expected = list(ijson.items(lines, prefix, multiple_values=True))
+            for chunk_bytes in (1, 10, 100):
+                values = list(parallel.items_lines(
+                    self.fname, prefix, workers=2, chunk_bytes=chunk_bytes))
+                self.assertEqual(expected, values)
+        values = list(parallel.items_lines(self.fname, '', workers=2, chunk_bytes=1, ordered=False))
+        self.assertEqual(5, len(values))
+
+    def test_items_lines_blank_lines(self):
+        lines = b''.join(b'{"i": %d}\n' % i + (b'\n' * 12 if i % 10 == 9 else b'')
+                         for i in range(100)) + b'\n\n'
+        with open(self.fname, 'wb') as f:
+            f.write(lines)
+        expected = list(ijson.items(lines, '', multiple_values=True))
+        self.assertEqual(100, len(expected))
+        for chunk_bytes in (1, 5, 10, 100):
+            values = list(parallel.items_lines(
+                self.fname, '', workers=2, chunk_bytes=chunk_bytes))
+            self.assertEqual(expected, values)
+
+    def test_items_lines_invalid(self):
+        with open(self.fname, 'wb') as f:
+            f.write(b'[1]\n[2\n[3]\n')
+        with self.assertRaises(ijson.JSONError):
+            list(parallel.items_lines(self.fname, 'item', workers=2, chunk_bytes=1))